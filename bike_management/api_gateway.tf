@@ -55,12 +55,24 @@ resource "aws_api_gateway_resource" "availability" {
   path_part   = "availability"
 }
 
+resource "aws_api_gateway_resource" "bikes_bulk" {
+  rest_api_id = aws_api_gateway_rest_api.bike_api.id
+  parent_id   = aws_api_gateway_resource.bikes.id
+  path_part   = "bulk"
+}
+
 resource "aws_api_gateway_resource" "bookings" {
   rest_api_id = aws_api_gateway_rest_api.bike_api.id
   parent_id   = aws_api_gateway_rest_api.bike_api.root_resource_id
   path_part   = "bookings"
 }
 
+resource "aws_api_gateway_resource" "booking_rollups" {
+  rest_api_id = aws_api_gateway_rest_api.bike_api.id
+  parent_id   = aws_api_gateway_resource.bookings.id
+  path_part   = "rollups"
+}
+
 ############################
 # METHODS & INTEGRATIONS   #
 ############################
@@ -189,6 +201,88 @@ resource "aws_api_gateway_integration_response" "update_bikes_integ_resp" {
   depends_on = [aws_api_gateway_integration.update_bikes_integration]
 }
 
+# ---------- POST /bikes/bulk (bulk add) ----------
+resource "aws_api_gateway_method" "bulk_add_bikes" {
+  rest_api_id   = aws_api_gateway_rest_api.bike_api.id
+  resource_id   = aws_api_gateway_resource.bikes_bulk.id
+  http_method   = "POST"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "bulk_add_bikes_integration" {
+  rest_api_id             = aws_api_gateway_rest_api.bike_api.id
+  resource_id             = aws_api_gateway_resource.bikes_bulk.id
+  http_method             = aws_api_gateway_method.bulk_add_bikes.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.manage_bikes.invoke_arn
+}
+
+resource "aws_api_gateway_method_response" "bulk_add_bikes_response" {
+  rest_api_id = aws_api_gateway_rest_api.bike_api.id
+  resource_id = aws_api_gateway_resource.bikes_bulk.id
+  http_method = aws_api_gateway_method.bulk_add_bikes.http_method
+  status_code = "200"
+
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Origin" = true
+  }
+}
+
+resource "aws_api_gateway_integration_response" "bulk_add_bikes_integ_resp" {
+  rest_api_id = aws_api_gateway_rest_api.bike_api.id
+  resource_id = aws_api_gateway_resource.bikes_bulk.id
+  http_method = aws_api_gateway_method.bulk_add_bikes.http_method
+  status_code = aws_api_gateway_method_response.bulk_add_bikes_response.status_code
+
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Origin" = "'*'"
+  }
+
+  depends_on = [aws_api_gateway_integration.bulk_add_bikes_integration]
+}
+
+# ---------- PUT /bikes/bulk (bulk update) ----------
+resource "aws_api_gateway_method" "bulk_update_bikes" {
+  rest_api_id   = aws_api_gateway_rest_api.bike_api.id
+  resource_id   = aws_api_gateway_resource.bikes_bulk.id
+  http_method   = "PUT"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "bulk_update_bikes_integration" {
+  rest_api_id             = aws_api_gateway_rest_api.bike_api.id
+  resource_id             = aws_api_gateway_resource.bikes_bulk.id
+  http_method             = aws_api_gateway_method.bulk_update_bikes.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.manage_bikes.invoke_arn
+}
+
+resource "aws_api_gateway_method_response" "bulk_update_bikes_response" {
+  rest_api_id = aws_api_gateway_rest_api.bike_api.id
+  resource_id = aws_api_gateway_resource.bikes_bulk.id
+  http_method = aws_api_gateway_method.bulk_update_bikes.http_method
+  status_code = "200"
+
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Origin" = true
+  }
+}
+
+resource "aws_api_gateway_integration_response" "bulk_update_bikes_integ_resp" {
+  rest_api_id = aws_api_gateway_rest_api.bike_api.id
+  resource_id = aws_api_gateway_resource.bikes_bulk.id
+  http_method = aws_api_gateway_method.bulk_update_bikes.http_method
+  status_code = aws_api_gateway_method_response.bulk_update_bikes_response.status_code
+
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Origin" = "'*'"
+  }
+
+  depends_on = [aws_api_gateway_integration.bulk_update_bikes_integration]
+}
+
 # ---------- GET /bikes/availability ----------
 resource "aws_api_gateway_method" "check_availability" {
   rest_api_id   = aws_api_gateway_rest_api.bike_api.id
@@ -272,6 +366,47 @@ resource "aws_api_gateway_integration_response" "book_bike_integ_resp" {
   depends_on = [aws_api_gateway_integration.book_bike_integration]
 }
 
+# ---------- GET /bookings/rollups ----------
+resource "aws_api_gateway_method" "get_booking_rollups" {
+  rest_api_id   = aws_api_gateway_rest_api.bike_api.id
+  resource_id   = aws_api_gateway_resource.booking_rollups.id
+  http_method   = "GET"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "get_booking_rollups_integration" {
+  rest_api_id             = aws_api_gateway_rest_api.bike_api.id
+  resource_id             = aws_api_gateway_resource.booking_rollups.id
+  http_method             = aws_api_gateway_method.get_booking_rollups.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.get_booking_rollups.invoke_arn
+}
+
+resource "aws_api_gateway_method_response" "get_booking_rollups_response" {
+  rest_api_id = aws_api_gateway_rest_api.bike_api.id
+  resource_id = aws_api_gateway_resource.booking_rollups.id
+  http_method = aws_api_gateway_method.get_booking_rollups.http_method
+  status_code = "200"
+
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Origin" = true
+  }
+}
+
+resource "aws_api_gateway_integration_response" "get_booking_rollups_integ_resp" {
+  rest_api_id = aws_api_gateway_rest_api.bike_api.id
+  resource_id = aws_api_gateway_resource.booking_rollups.id
+  http_method = aws_api_gateway_method.get_booking_rollups.http_method
+  status_code = aws_api_gateway_method_response.get_booking_rollups_response.status_code
+
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Origin" = "'*'"
+  }
+
+  depends_on = [aws_api_gateway_integration.get_booking_rollups_integration]
+}
+
 #####################################
 # LAMBDA PERMISSIONS FOR API GATEWAY
 #####################################
@@ -308,6 +443,14 @@ resource "aws_lambda_permission" "perm_book_bike" {
   source_arn    = "${aws_api_gateway_rest_api.bike_api.execution_arn}/*/*"
 }
 
+resource "aws_lambda_permission" "perm_get_booking_rollups" {
+  statement_id  = "AllowGetBookingRollups"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.get_booking_rollups.function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_api_gateway_rest_api.bike_api.execution_arn}/*/*"
+}
+
 #############################
 # DEPLOYMENT & STAGE         #
 #############################
@@ -326,8 +469,15 @@ resource "aws_api_gateway_deployment" "bike_api_deployment" {
     aws_api_gateway_integration.update_bikes_integration,
     aws_api_gateway_integration.check_availability_integration,
     aws_api_gateway_integration.book_bike_integration,
+    aws_api_gateway_method.bulk_add_bikes,
+    aws_api_gateway_method.bulk_update_bikes,
+    aws_api_gateway_integration.bulk_add_bikes_integration,
+    aws_api_gateway_integration.bulk_update_bikes_integration,
+    aws_api_gateway_method.get_booking_rollups,
+    aws_api_gateway_integration.get_booking_rollups_integration,
     # Add CORS methods
     aws_api_gateway_method.bikes_options,
+    aws_api_gateway_method.bikes_bulk_options,
     aws_api_gateway_method.bookings_options,
     aws_api_gateway_method.availability_options
   ]
@@ -337,10 +487,15 @@ resource "aws_api_gateway_deployment" "bike_api_deployment" {
       aws_api_gateway_resource.bikes.id,
       aws_api_gateway_resource.availability.id,
       aws_api_gateway_resource.bookings.id,
+      aws_api_gateway_resource.bikes_bulk.id,
+      aws_api_gateway_resource.booking_rollups.id,
       aws_api_gateway_method.update_bikes.id,
+      aws_api_gateway_method.bulk_add_bikes.id,
+      aws_api_gateway_method.bulk_update_bikes.id,
       aws_api_gateway_method.get_bikes.id,
       aws_api_gateway_method.check_availability.id,
-      aws_api_gateway_method.book_bike.id
+      aws_api_gateway_method.book_bike.id,
+      aws_api_gateway_method.get_booking_rollups.id
     ]))
   }
 
@@ -496,4 +651,45 @@ resource "aws_api_gateway_integration_response" "availability_options_integ_resp
     "method.response.header.Access-Control-Allow-Origin"  = "'*'"
   }
   depends_on = [aws_api_gateway_integration.availability_options_integration]
-}
\ No newline at end of file
+}
+
+# OPTIONS /bikes/bulk
+resource "aws_api_gateway_method" "bikes_bulk_options" {
+  rest_api_id   = aws_api_gateway_rest_api.bike_api.id
+  resource_id   = aws_api_gateway_resource.bikes_bulk.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "bikes_bulk_options_integration" {
+  rest_api_id = aws_api_gateway_rest_api.bike_api.id
+  resource_id = aws_api_gateway_resource.bikes_bulk.id
+  http_method = aws_api_gateway_method.bikes_bulk_options.http_method
+  type        = "MOCK"
+  request_templates = { "application/json" = "{\"statusCode\":200}" }
+}
+
+resource "aws_api_gateway_method_response" "bikes_bulk_options_resp" {
+  rest_api_id = aws_api_gateway_rest_api.bike_api.id
+  resource_id = aws_api_gateway_resource.bikes_bulk.id
+  http_method = aws_api_gateway_method.bikes_bulk_options.http_method
+  status_code = "200"
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = true
+    "method.response.header.Access-Control-Allow-Methods" = true
+    "method.response.header.Access-Control-Allow-Origin"  = true
+  }
+}
+
+resource "aws_api_gateway_integration_response" "bikes_bulk_options_integ_resp" {
+  rest_api_id = aws_api_gateway_rest_api.bike_api.id
+  resource_id = aws_api_gateway_resource.bikes_bulk.id
+  http_method = aws_api_gateway_method.bikes_bulk_options.http_method
+  status_code = aws_api_gateway_method_response.bikes_bulk_options_resp.status_code
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token'"
+    "method.response.header.Access-Control-Allow-Methods" = "'POST,PUT,OPTIONS'"
+    "method.response.header.Access-Control-Allow-Origin"  = "'*'"
+  }
+  depends_on = [aws_api_gateway_integration.bikes_bulk_options_integration]
+}
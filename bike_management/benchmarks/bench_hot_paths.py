@@ -0,0 +1,543 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the bike management hot paths (get_bikes, check_availability,
+book_bike, manage_bikes). The handlers run in-process against moto, or
+against DynamoDB Local when AWS_ENDPOINT_URL_DYNAMODB is set. The tables and
+GSIs are read from the Terraform definitions, so the benchmark follows
+schema changes.
+
+Every scenario reports p50/p95/p99 latency, DynamoDB calls per request and
+estimated read units per request. Latency against a local stand-in is only
+useful relative to another run. Calls and read units are the numbers to watch
+for regressions.
+
+The default fleet (10k bikes, 1M bookings) needs DynamoDB Local. moto answers
+every query by walking the whole table, so use it with smaller fleets.
+
+Requires boto3, plus moto (pip install 'moto[dynamodb]') when no endpoint is set.
+
+Usage:
+    AWS_ENDPOINT_URL_DYNAMODB=http://localhost:8000 python bike_management/benchmarks/bench_hot_paths.py
+    python bike_management/benchmarks/bench_hot_paths.py --bikes 2000 --bookings 100000 --iterations 10
+    python bike_management/benchmarks/bench_hot_paths.py --scenario book_bike --json results.json
+"""
+
+import argparse
+import contextlib
+import json
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+import boto3
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+LAMBDA_DIR = REPO_ROOT / 'bike_management' / 'lambda_functions'
+LAYER_DIR = REPO_ROOT / 'shared_layer' / 'layer' / 'python'
+
+# Terraform files and the aws_dynamodb_table resources the handlers use,
+# mapped to the environment variable each handler reads the table name from
+TABLE_SOURCES = [
+    (REPO_ROOT / 'bike_management' / 'main.tf', 'bikes', 'BIKES_TABLE'),
+    (REPO_ROOT / 'bike_management' / 'main.tf', 'bookings', 'BOOKINGS_TABLE'),
+    (REPO_ROOT / 'bike_management' / 'main.tf', 'catalogue_meta', 'CATALOGUE_META_TABLE'),
+    (REPO_ROOT / 'virtual_assistant' / 'main.tf', 'booking_references', 'BOOKING_REFERENCES_TABLE'),
+]
+
+BIKE_TYPES = ['Gyroscooter', 'eBike', 'Segway']
+LOCATIONS = ['Halifax Downtown', 'Dartmouth', 'Bedford', 'Clayton Park']
+FEATURES = ['GPS', 'Basket', 'Lights', 'Bell', 'Phone Mount']
+
+# Share of bikes marked available and of bookings that are live reservations
+AVAILABLE_SHARE = 0.9
+ACTIVE_BOOKING_SHARE = 0.02
+
+# Above this many bookings moto becomes impractically slow
+MOTO_BOOKINGS_WARNING = 100000
+
+READ_UNIT_BYTES = 4096
+BATCH_WRITE_SIZE = 25
+
+
+#####################################
+# TERRAFORM TABLE DEFINITIONS       #
+#####################################
+
+def _blocks(text, header_pattern):
+    """Yields (match, body) for every brace-delimited block whose header matches."""
+    for match in re.finditer(header_pattern, text):
+        depth = 0
+        for index in range(match.end() - 1, len(text)):
+            if text[index] == '{':
+                depth += 1
+            elif text[index] == '}':
+                depth -= 1
+                if depth == 0:
+                    yield match, text[match.end():index]
+                    break
+
+
+def _setting(body, name):
+    match = re.search(rf'^\s*{name}\s*=\s*"([^"]*)"', body, re.MULTILINE)
+    return match.group(1) if match else None
+
+
+def read_table_definition(tf_path, resource_name):
+    """
+    Reads the key schema, attributes and GSIs of one aws_dynamodb_table
+    resource. Only the subset of HCL used by this repo's tables is understood.
+    """
+    text = tf_path.read_text()
+    header = rf'resource\s+"aws_dynamodb_table"\s+"{resource_name}"\s*\{{'
+    for _, body in _blocks(text, header):
+        attributes = [
+            {'AttributeName': _setting(block, 'name'), 'AttributeType': _setting(block, 'type')}
+            for _, block in _blocks(body, r'\battribute\s*\{')
+        ]
+
+        indexes = []
+        for _, block in _blocks(body, r'\bglobal_secondary_index\s*\{'):
+            key_schema = [{'AttributeName': _setting(block, 'hash_key'), 'KeyType': 'HASH'}]
+            if _setting(block, 'range_key'):
+                key_schema.append({'AttributeName': _setting(block, 'range_key'), 'KeyType': 'RANGE'})
+            projection = {'ProjectionType': _setting(block, 'projection_type')}
+            non_key = re.search(r'non_key_attributes\s*=\s*\[([^\]]*)\]', block)
+            if non_key:
+                projection['NonKeyAttributes'] = re.findall(r'"([^"]+)"', non_key.group(1))
+            indexes.append({'IndexName': _setting(block, 'name'), 'KeySchema': key_schema, 'Projection': projection})
+
+        # Table-level keys sit outside the nested blocks
+        top_level = re.sub(r'\{[^{}]*\}', '', body)
+        key_schema = [{'AttributeName': _setting(top_level, 'hash_key'), 'KeyType': 'HASH'}]
+        if _setting(top_level, 'range_key'):
+            key_schema.append({'AttributeName': _setting(top_level, 'range_key'), 'KeyType': 'RANGE'})
+
+        return {'attributes': attributes, 'key_schema': key_schema, 'indexes': indexes}
+
+    raise ValueError(f'aws_dynamodb_table.{resource_name} not found in {tf_path}')
+
+
+def create_tables(client):
+    """Creates every table the handlers use under a bench- prefix and exports its name."""
+    definitions = {}
+    for tf_path, resource_name, env_name in TABLE_SOURCES:
+        definition = read_table_definition(tf_path, resource_name)
+        table_name = f'bench-{resource_name}'
+
+        kwargs = {
+            'TableName': table_name,
+            'BillingMode': 'PAY_PER_REQUEST',
+            'AttributeDefinitions': definition['attributes'],
+            'KeySchema': definition['key_schema']
+        }
+        if definition['indexes']:
+            kwargs['GlobalSecondaryIndexes'] = definition['indexes']
+
+        client.create_table(**kwargs)
+        client.get_waiter('table_exists').wait(TableName=table_name)
+        os.environ[env_name] = table_name
+        definitions[table_name] = definition
+    return definitions
+
+
+#####################################
+# SYNTHETIC DATA                    #
+#####################################
+
+def item_size(item):
+    """Approximates the DynamoDB size of a low-level item in bytes."""
+    size = 0
+    for name, value in item.items():
+        size += len(name.encode('utf-8'))
+        (kind, data), = value.items()
+        if kind == 'S':
+            size += len(data.encode('utf-8'))
+        elif kind == 'N':
+            size += len(data.lstrip('-').replace('.', '')) // 2 + 1
+        elif kind == 'BOOL':
+            size += 1
+        elif kind == 'L':
+            size += 3 + sum(item_size({'': element}) + 1 for element in data)
+    return size
+
+
+class SizeTracker:
+    """Tracks average item sizes per table and per GSI, for read unit estimates."""
+
+    def __init__(self, definitions):
+        self.definitions = definitions
+        self.totals = Counter()
+        self.counts = Counter()
+
+    def add(self, table_name, item):
+        definition = self.definitions[table_name]
+        size = item_size(item)
+        self.totals[(table_name, None)] += size
+        self.counts[(table_name, None)] += 1
+
+        table_keys = [key['AttributeName'] for key in definition['key_schema']]
+        for index in definition['indexes']:
+            index_keys = [key['AttributeName'] for key in index['KeySchema']]
+            if not all(key in item for key in index_keys):
+                continue  # sparse index, item not projected
+            projection = index['Projection']
+            if projection['ProjectionType'] == 'ALL':
+                projected_size = size
+            else:
+                names = set(table_keys + index_keys + projection.get('NonKeyAttributes', []))
+                projected_size = item_size({name: value for name, value in item.items() if name in names})
+            self.totals[(table_name, index['IndexName'])] += projected_size
+            self.counts[(table_name, index['IndexName'])] += 1
+
+    def average(self, table_name, index_name=None):
+        count = self.counts[(table_name, index_name)]
+        return self.totals[(table_name, index_name)] / count if count else 0
+
+
+def write_items(client, table_name, items, sizes):
+    """Writes low-level items with BatchWriteItem, retrying unprocessed ones."""
+    batch = []
+    written = 0
+    for item in items:
+        sizes.add(table_name, item)
+        batch.append({'PutRequest': {'Item': item}})
+        if len(batch) == BATCH_WRITE_SIZE:
+            _flush(client, table_name, batch)
+            written += len(batch)
+            batch = []
+    if batch:
+        _flush(client, table_name, batch)
+        written += len(batch)
+    return written
+
+
+def _flush(client, table_name, batch):
+    requests = {table_name: batch}
+    while requests:
+        response = client.batch_write_item(RequestItems=requests)
+        requests = response.get('UnprocessedItems') or {}
+
+
+def generate_bikes(count, rng):
+    for _ in range(count):
+        yield {
+            'bike_id': {'S': str(uuid.UUID(int=rng.getrandbits(128)))},
+            'bike_type': {'S': rng.choice(BIKE_TYPES)},
+            'franchise_id': {'S': f'franchise-{rng.randint(1, 20)}'},
+            'hourly_rate': {'N': str(rng.choice([8, 10, 12.5, 15, 20]))},
+            'location': {'S': rng.choice(LOCATIONS)},
+            'features': {'L': [{'S': feature} for feature in rng.sample(FEATURES, rng.randint(1, 3))]},
+            'access_code': {'S': f'ACCESS-{rng.getrandbits(32):08X}'},
+            'available': {'BOOL': rng.random() < AVAILABLE_SHARE},
+            'battery_life': {'S': rng.choice(['Standard', 'Extended'])},
+            'height_adjustment': {'BOOL': rng.random() < 0.5},
+            'created_date': {'S': '2024-01-01T00:00:00'}
+        }
+
+
+def generate_bookings(count, bike_ids, now, rng):
+    """
+    Yields historical (completed) bookings plus a share of live reservations
+    in the next two weeks. Live bookings of one bike never overlap, as on the
+    real calendar.
+    """
+    next_free = {}
+    for _ in range(count):
+        bike_id = rng.choice(bike_ids)
+        booking_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        hours = rng.randint(1, 4)
+
+        if rng.random() < ACTIVE_BOOKING_SHARE:
+            start = next_free.get(bike_id, now) + timedelta(hours=rng.randint(1, 24))
+            next_free[bike_id] = start + timedelta(hours=hours)
+            status = 'active'
+        else:
+            start = now - timedelta(days=rng.randint(1, 365), hours=rng.randint(0, 23))
+            status = 'completed'
+        end = start + timedelta(hours=hours)
+
+        item = {
+            'booking_id': {'S': booking_id},
+            'booking_reference': {'S': f'BOOK-{booking_id[:8].upper()}'},
+            'customer_id': {'S': f'customer-{rng.randint(1, 50000)}'},
+            'bike_id': {'S': bike_id},
+            'start_date': {'S': start.isoformat()},
+            'end_date': {'S': end.isoformat()},
+            'booking_date': {'S': (start - timedelta(days=1)).date().isoformat()},
+            'duration_hours': {'N': str(hours)},
+            'total_cost': {'N': str(hours * 10)},
+            'status': {'S': status},
+            'access_code': {'S': 'ACCESS-00000000'}
+        }
+        if status == 'active':
+            item['calendar_bike_id'] = {'S': bike_id}
+        yield item
+
+
+#####################################
+# CALL AND READ UNIT ACCOUNTING     #
+#####################################
+
+class CallRecorder:
+    """
+    Counts DynamoDB calls and estimates consumed read units by hooking the
+    botocore events of every client the handlers create. Read units follow
+    DynamoDB's rules: items read (including ones dropped by a filter) are
+    summed and rounded up to 4 KB, halved for eventually consistent reads.
+    """
+
+    def __init__(self, sizes):
+        self.sizes = sizes
+        self.lock = threading.Lock()
+        self.calls = Counter()
+        self.read_units = 0.0
+
+    def reset(self):
+        with self.lock:
+            calls, read_units = self.calls, self.read_units
+            self.calls = Counter()
+            self.read_units = 0.0
+        return calls, read_units
+
+    def register(self, events):
+        events.register('before-parameter-build.dynamodb', self.before_call)
+        events.register('after-call.dynamodb', self.after_call)
+        # Stand in for the notification Lambda without leaving the process
+        events.register('before-call.lambda.Invoke', self.fake_invoke)
+
+    def before_call(self, params, model, context, **kwargs):
+        context['bench'] = {
+            'operation': model.name,
+            'table': params.get('TableName'),
+            'index': params.get('IndexName'),
+            'consistent': bool(params.get('ConsistentRead'))
+        }
+
+    def after_call(self, parsed, context, **kwargs):
+        request = context.get('bench')
+        if not request:
+            return
+
+        read_units = 0.0
+        if request['operation'] == 'GetItem':
+            size = self.sizes.average(request['table']) if 'Item' in parsed else 0
+            read_units = self._units(size, request['consistent'])
+        elif request['operation'] in ('Query', 'Scan'):
+            scanned = parsed.get('ScannedCount', parsed.get('Count', 0))
+            size = scanned * self.sizes.average(request['table'], request['index'])
+            read_units = self._units(size, request['consistent'])
+
+        with self.lock:
+            self.calls[request['operation']] += 1
+            self.read_units += read_units
+
+    def fake_invoke(self, **kwargs):
+        return SimpleNamespace(status_code=202, headers={}), {'StatusCode': 202}
+
+    @staticmethod
+    def _units(size, consistent):
+        units = max(1, math.ceil(size / READ_UNIT_BYTES))
+        return units if consistent else units / 2
+
+
+#####################################
+# SCENARIOS                         #
+#####################################
+
+def build_scenarios(bike_ids, now, rng):
+    def future_slot(days_out):
+        start = now + timedelta(days=days_out, hours=rng.randint(0, 23))
+        return start.isoformat(), (start + timedelta(hours=rng.randint(1, 4))).isoformat()
+
+    def availability_event(with_type):
+        start, end = future_slot(rng.randint(1, 14))
+        params = {'start_date': start, 'end_date': end}
+        if with_type:
+            params['type'] = rng.choice(BIKE_TYPES)
+        return {'queryStringParameters': params}
+
+    def book_event():
+        # Far enough out that most requests miss the seeded reservations
+        start, end = future_slot(rng.randint(30, 3650))
+        return {'body': json.dumps({
+            'bike_id': rng.choice(bike_ids),
+            'customer_id': f'customer-{rng.randint(1, 50000)}',
+            'customer_email': 'bench@example.com',
+            'start_date': start,
+            'end_date': end
+        })}
+
+    def bulk_event():
+        rows = [
+            {'bike_type': rng.choice(BIKE_TYPES), 'hourly_rate': 10, 'franchise_id': 'franchise-bench',
+             'location': rng.choice(LOCATIONS), 'features': ['GPS']}
+            for _ in range(100)
+        ]
+        return {'httpMethod': 'POST', 'resource': '/bikes/bulk', 'body': json.dumps(rows)}
+
+    return {
+        'get_bikes_first_page': ('get_bikes', lambda: {'queryStringParameters': {'limit': '50'}}),
+        'get_bikes_filtered': ('get_bikes', lambda: {'queryStringParameters': {
+            'type': rng.choice(BIKE_TYPES), 'available': 'true', 'location': rng.choice(LOCATIONS), 'limit': '50'}}),
+        'check_availability_by_type': ('check_availability', lambda: availability_event(True)),
+        'check_availability_all': ('check_availability', lambda: availability_event(False)),
+        'book_bike': ('book_bike', book_event),
+        'update_bike': ('manage_bikes', lambda: {'httpMethod': 'PUT', 'body': json.dumps({
+            'bike_id': rng.choice(bike_ids), 'hourly_rate': rng.choice([9, 11, 14])})}),
+        'bulk_add_bikes': ('manage_bikes', bulk_event),
+    }
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    rank = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[rank]
+
+
+def run_scenario(handler, make_event, iterations, recorder):
+    latencies = []
+    calls = Counter()
+    read_units = 0.0
+    statuses = Counter()
+
+    # One untimed call warms imports, pools and caches, as in a warm container
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        handler(make_event(), None)
+    recorder.reset()
+
+    for _ in range(iterations):
+        event = make_event()
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            started = time.perf_counter()
+            response = handler(event, None)
+            latencies.append((time.perf_counter() - started) * 1000)
+        statuses[response.get('statusCode')] += 1
+        request_calls, request_units = recorder.reset()
+        calls.update(request_calls)
+        read_units += request_units
+
+    latencies.sort()
+    return {
+        'iterations': iterations,
+        'p50_ms': round(percentile(latencies, 0.50), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'calls_per_request': round(sum(calls.values()) / iterations, 2),
+        'calls_by_operation': {operation: round(count / iterations, 2) for operation, count in sorted(calls.items())},
+        'read_units_per_request': round(read_units / iterations, 2),
+        'status_codes': {str(code): count for code, count in sorted(statuses.items(), key=str)}
+    }
+
+
+def print_report(results):
+    print()
+    print(f"{'scenario':<28}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'calls':>9}{'RCU':>10}  statuses")
+    for name, result in results.items():
+        print(
+            f"{name:<28}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+            f"{result['calls_per_request']:>9.2f}{result['read_units_per_request']:>10.2f}  {result['status_codes']}"
+        )
+        print(f"{'':<28}{result['calls_by_operation']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--bikes', type=int, default=10000)
+    parser.add_argument('--bookings', type=int, default=1000000)
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--scenario', action='append', help='run only this scenario (repeatable)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+    os.environ.setdefault('NOTIFICATION_PROCESSOR_ARN', 'arn:aws:lambda:us-east-1:123456789012:function:bench-notifications')
+
+    mock = None
+    if not os.environ.get('AWS_ENDPOINT_URL_DYNAMODB'):
+        from moto import mock_aws
+        os.environ.update(AWS_ACCESS_KEY_ID='testing', AWS_SECRET_ACCESS_KEY='testing')
+        mock = mock_aws()
+        mock.start()
+        if args.bookings > MOTO_BOOKINGS_WARNING:
+            print(f"⚠️  {args.bookings} bookings on moto will be very slow; "
+                  f"set AWS_ENDPOINT_URL_DYNAMODB to use DynamoDB Local")
+
+    rng = random.Random(args.seed)
+    now = datetime.now().replace(minute=0, second=0, microsecond=0)
+
+    # Seeding uses its own session so it is not counted
+    seed_client = boto3.session.Session().client('dynamodb')
+    definitions = create_tables(seed_client)
+    sizes = SizeTracker(definitions)
+
+    print(f"🚲 Seeding {args.bikes} bikes...")
+    started = time.perf_counter()
+    bikes = list(generate_bikes(args.bikes, rng))
+    write_items(seed_client, os.environ['BIKES_TABLE'], bikes, sizes)
+    bike_ids = [bike['bike_id']['S'] for bike in bikes if bike['available']['BOOL']]
+
+    print(f"📅 Seeding {args.bookings} bookings...")
+    write_items(seed_client, os.environ['BOOKINGS_TABLE'],
+                generate_bookings(args.bookings, [bike['bike_id']['S'] for bike in bikes], now, rng), sizes)
+    print(f"✅ Seeded in {time.perf_counter() - started:.1f}s")
+
+    # Handlers build their clients on the default session; hook it before
+    # they are imported
+    recorder = CallRecorder(sizes)
+    boto3.setup_default_session()
+    recorder.register(boto3.DEFAULT_SESSION.events)
+
+    sys.path.insert(0, str(LAYER_DIR))
+    sys.path.insert(0, str(LAMBDA_DIR))
+    import book_bike
+    import check_availability
+    import get_bikes
+    import manage_bikes
+    handlers = {
+        'get_bikes': get_bikes.lambda_handler,
+        'check_availability': check_availability.lambda_handler,
+        'book_bike': book_bike.lambda_handler,
+        'manage_bikes': manage_bikes.lambda_handler,
+    }
+
+    scenarios = build_scenarios(bike_ids, now, rng)
+    selected = args.scenario or list(scenarios)
+    unknown = [name for name in selected if name not in scenarios]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}; choose from {', '.join(scenarios)}")
+
+    results = {}
+    for name in selected:
+        handler_name, make_event = scenarios[name]
+        print(f"⏱️  {name}...")
+        results[name] = run_scenario(handlers[handler_name], make_event, args.iterations, recorder)
+
+    print_report(results)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({
+            'bikes': args.bikes,
+            'bookings': args.bookings,
+            'results': results
+        }, indent=2))
+        print(f"\n📄 Results written to {args.json}")
+
+    if mock:
+        mock.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from boto3.dynamodb.conditions import Key
+
+# Number of calendar queries allowed in flight at once. Kept at or below the
+# botocore connection pool size so workers never queue for a socket.
+AVAILABILITY_MAX_WORKERS = int(os.environ.get('AVAILABILITY_MAX_WORKERS', '10'))
+
+# Sparse GSI on the bookings table. Only live reservations carry the
+# calendar_bike_id attribute, and entries are sorted by start_date.
+# booking_lifecycle removes the attribute once a booking ends, so calendar
+# reads only ever touch current and future bookings. Like any GSI it lags
+# writes, so it only serves availability listings.
+CALENDAR_INDEX = 'BikeCalendarIndex'
+CALENDAR_KEY = 'calendar_bike_id'
+
+# The bike item's own calendar, which book_bike reads with ConsistentRead and
+# rewrites in the transaction that advances booking_seq, so the conflict check
+# on the write path reads exactly the data the seq guards:
+#   booking_calendar = {booking_id: [start_date, end_date]}
+# for live bookings, dates in the naive UTC form of to_calendar_timestamp.
+# Ended entries are dropped whenever the calendar is rewritten, and by the
+# booking_lifecycle sweep.
+BIKE_CALENDAR_ATTRIBUTE = 'booking_calendar'
+
+
+def parse_timestamp(value):
+    """
+    Parses an ISO 8601 timestamp as a naive UTC datetime. Values with an
+    offset are converted to UTC; values without one are taken as UTC, so
+    naive and aware inputs always compare.
+    """
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def to_calendar_timestamp(value):
+    """
+    Normalizes an ISO 8601 timestamp to naive UTC so that string order
+    matches time order on the calendar index sort key.
+    """
+    return parse_timestamp(value).isoformat()
+
+
+def calendar_attributes(bike_id, start_date, end_date):
+    """
+    Returns the attributes a live booking must carry to appear on the
+    bike's booking calendar.
+    """
+    return {
+        CALENDAR_KEY: bike_id,
+        'start_date': to_calendar_timestamp(start_date),
+        'end_date': to_calendar_timestamp(end_date)
+    }
+
+
+def find_preceding_booking(client, table_name, bike_id, requested_end):
+    """
+    Reads the live booking of a bike with the latest start before
+    requested_end. Live bookings of one bike never overlap each other, so this
+    is the only booking that can conflict with a period ending at requested_end.
+    Returns the item or None.
+    """
+    response = client.query(
+        TableName=table_name,
+        IndexName=CALENDAR_INDEX,
+        KeyConditionExpression=Key(CALENDAR_KEY).eq(bike_id) & Key('start_date').lt(requested_end.isoformat()),
+        ProjectionExpression='booking_id, start_date, end_date',
+        ScanIndexForward=False,
+        Limit=1
+    )
+    items = response.get('Items', [])
+    return items[0] if items else None
+
+
+def find_calendar_conflict(bike, start_date, end_date):
+    """
+    Returns the ID of the booking on the bike item's calendar that overlaps
+    [start_date, end_date), or None when the period is free.
+    """
+    requested_start = parse_timestamp(start_date)
+    requested_end = parse_timestamp(end_date)
+
+    for booking_id, (booking_start, booking_end) in (bike.get(BIKE_CALENDAR_ATTRIBUTE) or {}).items():
+        if parse_timestamp(booking_start) < requested_end and parse_timestamp(booking_end) > requested_start:
+            return booking_id
+    return None
+
+
+def claim_calendar(bike, booking_id, start_date, end_date, now=None):
+    """
+    Returns the bike's calendar with the new booking added and the bookings
+    that ended before now dropped.
+    """
+    cutoff = (now or datetime.now(timezone.utc).replace(tzinfo=None)).isoformat()
+    calendar = {
+        existing_id: interval
+        for existing_id, interval in (bike.get(BIKE_CALENDAR_ATTRIBUTE) or {}).items()
+        if to_calendar_timestamp(interval[1]) > cutoff
+    }
+    calendar[booking_id] = [to_calendar_timestamp(start_date), to_calendar_timestamp(end_date)]
+    return calendar
+
+
+def load_calendar_neighbours(bookings_table, bike_ids, requested_end):
+    """
+    Loads the neighbouring calendar entry of every bike in bike_ids using a
+    bounded pool of concurrent one-item queries.
+    Returns (intervals, failed_bike_ids) where intervals is a list of
+    (start, end, bike_id) tuples.
+    """
+    # The low-level client is thread safe, the Table resource is not
+    client = bookings_table.meta.client
+    table_name = bookings_table.name
+
+    def fetch(bike_id):
+        try:
+            return bike_id, find_preceding_booking(client, table_name, bike_id, requested_end), True
+        except Exception as e:
+            print(f"Error loading booking calendar for {bike_id}: {e}")
+            return bike_id, None, False
+
+    intervals = []
+    failed_bike_ids = set()
+
+    with ThreadPoolExecutor(max_workers=AVAILABILITY_MAX_WORKERS) as executor:
+        for bike_id, booking, ok in executor.map(fetch, bike_ids):
+            if not ok:
+                failed_bike_ids.add(bike_id)
+                continue
+            if booking is None:
+                continue
+
+            try:
+                intervals.append((
+                    parse_timestamp(booking['start_date']),
+                    parse_timestamp(booking['end_date']),
+                    bike_id
+                ))
+            except (KeyError, ValueError):
+                print(f"Skipping malformed booking for {bike_id}: {booking}")
+
+    return intervals, failed_bike_ids
+
+
+def find_booked_bikes(intervals, requested_start, requested_end):
+    """
+    Resolves every overlap against the requested period in a single
+    sort-and-sweep pass over all loaded booking intervals.
+    Returns the set of bike IDs that have at least one conflicting booking.
+    """
+    booked_bike_ids = set()
+
+    for booking_start, booking_end, bike_id in sorted(intervals, key=lambda interval: interval[0]):
+        # Sorted by start, so nothing after this point can overlap
+        if booking_start >= requested_end:
+            break
+
+        if booking_end > requested_start:
+            booked_bike_ids.add(bike_id)
+
+    return booked_bike_ids
+
+
+def filter_available_bike_ids(bookings_table, bike_ids, start_date, end_date):
+    """
+    Returns the subset of bike_ids with no live booking overlapping
+    [start_date, end_date). Bikes whose calendar could not be read are
+    treated as unavailable.
+    """
+    requested_start = parse_timestamp(start_date)
+    requested_end = parse_timestamp(end_date)
+
+    intervals, failed_bike_ids = load_calendar_neighbours(bookings_table, bike_ids, requested_end)
+    booked_bike_ids = find_booked_bikes(intervals, requested_start, requested_end)
+
+    return {
+        bike_id for bike_id in bike_ids
+        if bike_id not in booked_bike_ids and bike_id not in failed_bike_ids
+    }
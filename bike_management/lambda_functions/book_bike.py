@@ -1,30 +1,33 @@
 import json
-import boto3
 from datetime import datetime
 import uuid
 import os
 from decimal import Decimal, ROUND_HALF_UP
 
-# Initialize AWS clients
-dynamodb = boto3.resource('dynamodb')
-lambda_client = boto3.client('lambda')
+from dalscooter_common import (
+    change_attributes, get_client, get_resource, get_table, json_response, reference_key, to_native
+)
+
+from availability import (
+    BIKE_CALENDAR_ATTRIBUTE, calendar_attributes, claim_calendar, find_calendar_conflict, parse_timestamp
+)
+
+# Initialize AWS clients. The Lambda client is only created when a booking
+# actually needs a notification.
+dynamodb = get_resource('dynamodb')
 
 # Initialize DynamoDB tables from environment variables
-bikes_table = dynamodb.Table(os.environ['BIKES_TABLE'])
-bookings_table = dynamodb.Table(os.environ['BOOKINGS_TABLE'])
+bikes_table = get_table(os.environ['BIKES_TABLE'])
+bookings_table = get_table(os.environ['BOOKINGS_TABLE'])
 # NEW: Table for chatbot booking references
-booking_refs_table = dynamodb.Table(os.environ['BOOKING_REFERENCES_TABLE'])
+booking_refs_table = get_table(os.environ['BOOKING_REFERENCES_TABLE'])
 
 # NEW: ARN for the notification Lambda
 NOTIFICATION_PROCESSOR_ARN = os.environ['NOTIFICATION_PROCESSOR_ARN']
 
-
-# Custom JSON encoder to handle Decimal types for the final response
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, o):
-        if isinstance(o, Decimal):
-            return float(o)
-        return super(DecimalEncoder, self).default(o)
+# How many times a booking is re-checked and re-committed after losing a race
+# for the same bike to a concurrent booking
+BOOKING_COMMIT_ATTEMPTS = int(os.environ.get('BOOKING_COMMIT_ATTEMPTS', '3'))
 
 
 def send_booking_notification(booking_details):
@@ -45,7 +48,7 @@ def send_booking_notification(booking_details):
             }
         }
         
-        lambda_client.invoke(
+        get_client('lambda').invoke(
             FunctionName=NOTIFICATION_PROCESSOR_ARN,
             InvocationType='Event',  # Asynchronous invocation
             Payload=json.dumps(payload)
@@ -57,6 +60,69 @@ def send_booking_notification(booking_details):
         print(f"ERROR: Failed to invoke notification lambda: {e}")
 
 
+def commit_booking(bike, booking_item, booking_reference_item):
+    """
+    Claims the bike's time slot and persists the booking together with its
+    chatbot reference record in a single DynamoDB transaction.
+
+    The slot is claimed by writing the bike's calendar with the new booking
+    and advancing its booking_seq from the values read (consistently) before
+    the conflict check. Any booking committed for the same bike in the
+    meantime advances it first, so this transaction is cancelled instead of
+    double-booking. Also re-validates that the bike still exists and is available.
+    Returns True on success, False if any condition failed and the caller
+    should re-check and retry: the bike changed, or the generated booking ID
+    or reference is already taken (the retry generates new ones).
+    """
+    calendar = claim_calendar(bike, booking_item['booking_id'], booking_item['start_date'], booking_item['end_date'])
+    if 'booking_seq' in bike:
+        seq_condition = 'booking_seq = :seq'
+        expression_values = {':seq': bike['booking_seq'], ':next': bike['booking_seq'] + 1}
+    else:
+        seq_condition = 'attribute_not_exists(booking_seq)'
+        expression_values = {':next': 1}
+    expression_values.update({':true': True, ':calendar': calendar})
+
+    try:
+        dynamodb.meta.client.transact_write_items(
+            TransactItems=[
+                {
+                    'Update': {
+                        'TableName': bikes_table.name,
+                        'Key': {'bike_id': booking_item['bike_id']},
+                        'UpdateExpression': f'SET booking_seq = :next, {BIKE_CALENDAR_ATTRIBUTE} = :calendar',
+                        'ConditionExpression': f'attribute_exists(bike_id) AND available = :true AND {seq_condition}',
+                        'ExpressionAttributeValues': expression_values
+                    }
+                },
+                {
+                    'Put': {
+                        'TableName': bookings_table.name,
+                        'Item': booking_item,
+                        'ConditionExpression': 'attribute_not_exists(booking_id)'
+                    }
+                },
+                {
+                    'Put': {
+                        'TableName': booking_refs_table.name,
+                        'Item': booking_reference_item,
+                        'ConditionExpression': 'attribute_not_exists(booking_reference)'
+                    }
+                }
+            ]
+        )
+        return True
+
+    except dynamodb.meta.client.exceptions.TransactionCanceledException as e:
+        # One reason per item, in order: bike, booking, booking reference
+        reasons = [reason.get('Code') for reason in e.response.get('CancellationReasons', [])]
+        if 'ConditionalCheckFailed' in reasons:
+            if 'ConditionalCheckFailed' in reasons[1:]:
+                print(f"Booking {booking_item['booking_id']} / {booking_item['booking_reference']} collided with an existing record")
+            return False
+        raise
+
+
 def lambda_handler(event, context):
     try:
         # Parse request body
@@ -68,74 +134,86 @@ def lambda_handler(event, context):
         customer_email = body['customer_email'] 
         start_date = body['start_date']
         end_date = body['end_date']
-        
-        # 1. Check if the bike exists
-        bike_response = bikes_table.get_item(Key={'bike_id': bike_id})
-        
-        if 'Item' not in bike_response:
-            return {'statusCode': 404, 'headers': {'Access-Control-Allow-Origin': '*'}, 'body': json.dumps({'error': 'Bike not found'})}
-        
-        bike = bike_response['Item']
-        
-        # 2. Check if the bike is marked as available
-        if not bike.get('available', False):
-            return {'statusCode': 400, 'headers': {'Access-Control-Allow-Origin': '*'}, 'body': json.dumps({'error': 'Bike is currently unavailable for booking'})}
-        
-        # 3. Check for any conflicting bookings for the requested period
-        booking_response = bookings_table.query(
-            IndexName='BikeIndex',
-            KeyConditionExpression=boto3.dynamodb.conditions.Key('bike_id').eq(bike_id)
-        )
-        
-        requested_start = datetime.fromisoformat(start_date)
-        requested_end = datetime.fromisoformat(end_date)
-
-        for booking in booking_response['Items']:
-            if booking.get('status') == 'active':
-                booking_start = datetime.fromisoformat(booking['start_date'])
-                booking_end = datetime.fromisoformat(booking['end_date'])
-                
-                if not (requested_end <= booking_start or requested_start >= booking_end):
-                    return {'statusCode': 409, 'headers': {'Access-Control-Allow-Origin': '*'}, 'body': json.dumps({'error': 'Bike is already booked for this period'})}
-        
-        # 4. Create the booking item
-        booking_id = str(uuid.uuid4())
-        booking_reference = f"BOOK-{booking_id[:8].upper()}"
-        
-        duration_in_seconds = (requested_end - requested_start).total_seconds()
-        duration_hours = Decimal(str(duration_in_seconds / 3600)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-        total_cost = (duration_hours * bike['hourly_rate']).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
 
-        booking_item = {
-            'booking_id': booking_id,
-            'booking_reference': booking_reference,
-            'customer_id': customer_id,
-            'bike_id': bike_id,
-            'start_date': start_date,
-            'end_date': end_date,
-            'booking_date': datetime.now().isoformat(),
-            'duration_hours': duration_hours,
-            'total_cost': total_cost,
-            'status': 'active',
-            'bike_type': bike.get('bike_type', 'N/A'),
-            'access_code': bike.get('access_code', 'N/A')
-        }
-        
-        # --- DATABASE WRITE 1: Main bookings table ---
-        bookings_table.put_item(Item=booking_item)
-        
-        # --- DATABASE WRITE 2: Chatbot reference table ---
-        booking_reference_item = {
-            'booking_reference': booking_reference, # Partition Key
-            'bike_type': bike.get('bike_type', 'N/A'),
-            'bike_number': bike.get('bike_number', bike_id),
-            'access_code': bike.get('access_code', 'N/A'),
-            'start_time': start_date,
-            'end_time': end_date,
-            'rental_duration': f"{duration_hours} hours",
-            'status': 'active'
-        }
-        booking_refs_table.put_item(Item=booking_reference_item)
+        try:
+            requested_start = parse_timestamp(start_date)
+            requested_end = parse_timestamp(end_date)
+        except ValueError:
+            return {'statusCode': 400, 'headers': {'Access-Control-Allow-Origin': '*'}, 'body': json.dumps({'error': 'start_date and end_date must be ISO 8601 timestamps'})}
+
+        if requested_end <= requested_start:
+            return {'statusCode': 400, 'headers': {'Access-Control-Allow-Origin': '*'}, 'body': json.dumps({'error': 'end_date must be after start_date'})}
+
+        for attempt in range(BOOKING_COMMIT_ATTEMPTS):
+            # 1. Check if the bike exists. Strongly consistent, so the calendar
+            # read below is the one booking_seq guards.
+            bike_response = bikes_table.get_item(
+                Key={'bike_id': bike_id},
+                ProjectionExpression=('bike_id, bike_type, bike_number, hourly_rate, access_code, available, '
+                                      f'booking_seq, franchise_id, {BIKE_CALENDAR_ATTRIBUTE}'),
+                ConsistentRead=True
+            )
+            
+            if 'Item' not in bike_response:
+                return {'statusCode': 404, 'headers': {'Access-Control-Allow-Origin': '*'}, 'body': json.dumps({'error': 'Bike not found'})}
+            
+            bike = bike_response['Item']
+            
+            # 2. Check if the bike is marked as available
+            if not bike.get('available', False):
+                return {'statusCode': 400, 'headers': {'Access-Control-Allow-Origin': '*'}, 'body': json.dumps({'error': 'Bike is currently unavailable for booking'})}
+            
+            # 3. Check the bike's own calendar for a conflicting live booking
+            if find_calendar_conflict(bike, start_date, end_date):
+                return {'statusCode': 409, 'headers': {'Access-Control-Allow-Origin': '*'}, 'body': json.dumps({'error': 'Bike is already booked for this period'})}
+            
+            # 4. Create the booking item
+            booking_id = str(uuid.uuid4())
+            booking_reference = f"BOOK-{booking_id[:8].upper()}"
+            
+            duration_in_seconds = (requested_end - requested_start).total_seconds()
+            duration_hours = Decimal(str(duration_in_seconds / 3600)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+            total_cost = (duration_hours * bike['hourly_rate']).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+            booking_item = {
+                'booking_id': booking_id,
+                'booking_reference': booking_reference,
+                'customer_id': customer_id,
+                'bike_id': bike_id,
+                # start_date, end_date and the calendar key for BikeCalendarIndex
+                **calendar_attributes(bike_id, start_date, end_date),
+                'booking_date': datetime.now().isoformat(),
+                'duration_hours': duration_hours,
+                'total_cost': total_cost,
+                'status': 'active',
+                'bike_type': bike.get('bike_type', 'N/A'),
+                # Carried on the booking for the per-franchise rollups
+                'franchise_id': bike.get('franchise_id', 'unknown'),
+                'access_code': bike.get('access_code', 'N/A'),
+                # updated_at/change_day for the analytics export's ChangeIndex
+                **change_attributes(booking_id)
+            }
+            
+            booking_reference_item = {
+                'booking_reference': booking_reference, # Partition Key
+                'reference_key': reference_key(booking_reference), # ReferenceKeyIndex
+                'bike_type': bike.get('bike_type', 'N/A'),
+                'bike_number': bike.get('bike_number', bike_id),
+                'access_code': bike.get('access_code', 'N/A'),
+                'start_time': start_date,
+                'end_time': end_date,
+                'rental_duration': f"{duration_hours} hours",
+                'status': 'active'
+            }
+
+            # --- DATABASE WRITE: bookings and chatbot reference tables, one transaction ---
+            if commit_booking(bike, booking_item, booking_reference_item):
+                break
+
+            # Another booking for this bike committed first; re-check the calendar
+            print(f"Booking commit for bike {bike_id} was cancelled by a condition (attempt {attempt + 1})")
+        else:
+            return {'statusCode': 409, 'headers': {'Access-Control-Allow-Origin': '*'}, 'body': json.dumps({'error': 'Bike is being booked by someone else, please try again'})}
         
         # --- SEND NOTIFICATION ---
         notification_details = {
@@ -149,18 +227,15 @@ def lambda_handler(event, context):
         send_booking_notification(notification_details)
 
         # 5. Return a successful response
-        return {
-            'statusCode': 201,
-            'headers': {'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({
-                'booking_id': booking_id,
-                'booking_reference': booking_reference,
-                'message': 'Booking created successfully',
-                'total_cost': total_cost,
-                'duration_hours': duration_hours,
-                'access_code': bike.get('access_code')
-            }, cls=DecimalEncoder)
-        }
+        # Money is computed in Decimal; convert once for the response
+        return json_response(201, to_native({
+            'booking_id': booking_id,
+            'booking_reference': booking_reference,
+            'message': 'Booking created successfully',
+            'total_cost': total_cost,
+            'duration_hours': duration_hours,
+            'access_code': bike.get('access_code')
+        }))
         
     except Exception as e:
         print(f"An error occurred: {e}")
@@ -0,0 +1,214 @@
+import gzip
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from dalscooter_common import change_attributes, deserialize_item, dumps, get_client, get_table
+
+from availability import BIKE_CALENDAR_ATTRIBUTE, CALENDAR_INDEX, CALENDAR_KEY
+
+# Scheduled booking lifecycle jobs, selected by the 'action' of the event:
+#   sweep   - completes live bookings whose end_date has passed and takes them
+#             off the per-bike calendar index and the bike item's calendar, so
+#             hot paths only see current and future bookings
+#   archive - moves completed bookings older than ARCHIVE_AFTER_DAYS to S3 as
+#             gzipped JSON Lines partitioned by end date, then deletes them
+bookings_table = get_table(os.environ['BOOKINGS_TABLE'])
+bikes_table = get_table(os.environ['BIKES_TABLE'])
+booking_refs_table = get_table(os.environ['BOOKING_REFERENCES_TABLE'])
+ARCHIVE_BUCKET = os.environ['BOOKING_ARCHIVE_BUCKET']
+
+ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', '30'))
+ARCHIVE_PREFIX = os.environ.get('ARCHIVE_PREFIX', 'bookings')
+# Rows archived per invocation; the next run picks up where this one stopped
+ARCHIVE_MAX_ROWS = int(os.environ.get('ARCHIVE_MAX_ROWS', '200000'))
+LIFECYCLE_SCAN_SEGMENTS = int(os.environ.get('LIFECYCLE_SCAN_SEGMENTS', '4'))
+LIFECYCLE_MAX_WORKERS = int(os.environ.get('LIFECYCLE_MAX_WORKERS', '10'))
+BATCH_WRITE_SIZE = 25
+BATCH_WRITE_ATTEMPTS = 5
+
+
+def lambda_handler(event, context):
+    action = (event or {}).get('action', 'sweep')
+    now = datetime.now()
+
+    if action == 'sweep':
+        result = sweep_finished_bookings(now)
+    elif action == 'archive':
+        result = archive_completed_bookings(now - timedelta(days=ARCHIVE_AFTER_DAYS))
+    else:
+        raise ValueError(f"Unknown lifecycle action: {action}")
+
+    print(f"Booking lifecycle {action}: {dumps(result)}")
+    return result
+
+
+def sweep_finished_bookings(now):
+    """
+    Marks every live booking that ended before now as completed. Only the
+    sparse calendar index is scanned, so the cost follows the number of live
+    bookings, not the size of the bookings history.
+    """
+    cutoff = now.isoformat()
+    finished = parallel_scan(
+        IndexName=CALENDAR_INDEX,
+        ProjectionExpression=f'booking_id, {CALENDAR_KEY}, end_date',
+        FilterExpression='end_date <= :now',
+        ExpressionAttributeValues={':now': {'S': cutoff}}
+    )
+
+    # The low-level client is thread safe, the Table resource is not
+    client = bookings_table.meta.client
+    def complete(booking):
+        # Completion is a change the analytics export picks up
+        changes = change_attributes(booking['booking_id'])
+        try:
+            response = client.update_item(
+                TableName=bookings_table.name,
+                Key={'booking_id': booking['booking_id']},
+                UpdateExpression=(f'SET #status = :completed, completed_at = :now, '
+                                  f'updated_at = :updated_at, change_day = :change_day REMOVE {CALENDAR_KEY}'),
+                ConditionExpression='#status = :active',
+                ExpressionAttributeNames={'#status': 'status'},
+                ExpressionAttributeValues={':completed': 'completed', ':active': 'active', ':now': cutoff,
+                                           ':updated_at': changes['updated_at'], ':change_day': changes['change_day']},
+                ReturnValues='ALL_NEW'
+            )
+        except client.exceptions.ConditionalCheckFailedException:
+            return False
+        except Exception as e:
+            print(f"Error completing booking {booking['booking_id']}: {e}")
+            return False
+
+        # Keep the chatbot's view of the booking in step
+        booking_reference = response['Attributes'].get('booking_reference')
+        if booking_reference:
+            try:
+                booking_refs_table.meta.client.update_item(
+                    TableName=booking_refs_table.name,
+                    Key={'booking_reference': booking_reference},
+                    UpdateExpression='SET #status = :completed',
+                    ConditionExpression='attribute_exists(booking_reference)',
+                    ExpressionAttributeNames={'#status': 'status'},
+                    ExpressionAttributeValues={':completed': 'completed'}
+                )
+            except Exception as e:
+                print(f"Error completing booking reference {booking_reference}: {e}")
+
+        # book_bike also drops ended entries whenever it rewrites the calendar
+        try:
+            client.update_item(
+                TableName=bikes_table.name,
+                Key={'bike_id': booking[CALENDAR_KEY]},
+                UpdateExpression=f'REMOVE {BIKE_CALENDAR_ATTRIBUTE}.#booking_id',
+                ConditionExpression=f'attribute_exists({BIKE_CALENDAR_ATTRIBUTE})',
+                ExpressionAttributeNames={'#booking_id': booking['booking_id']}
+            )
+        except client.exceptions.ConditionalCheckFailedException:
+            pass
+        except Exception as e:
+            print(f"Error removing booking {booking['booking_id']} from the bike calendar: {e}")
+        return True
+
+    with ThreadPoolExecutor(max_workers=LIFECYCLE_MAX_WORKERS) as executor:
+        completed = sum(executor.map(complete, finished))
+
+    return {'finished': len(finished), 'completed': completed}
+
+
+def archive_completed_bookings(cutoff):
+    """
+    Writes completed bookings that ended before cutoff to S3, one gzipped
+    JSON Lines object per end date, then deletes them from the bookings table.
+    Objects are written before rows are deleted, so a failed run can archive a
+    row twice but never loses one; booking_id identifies duplicates.
+    """
+    bookings = parallel_scan(
+        max_items=ARCHIVE_MAX_ROWS,
+        FilterExpression='#status = :completed AND end_date < :cutoff',
+        ExpressionAttributeNames={'#status': 'status'},
+        ExpressionAttributeValues={':completed': {'S': 'completed'}, ':cutoff': {'S': cutoff.isoformat()}}
+    )
+
+    partitions = {}
+    for booking in bookings:
+        partitions.setdefault(booking['end_date'][:10], []).append(booking)
+
+    run_id = uuid.uuid4().hex[:12]
+    deleted = 0
+    failed = 0
+    for end_day, partition in sorted(partitions.items()):
+        write_archive_part(end_day, run_id, partition)
+        not_deleted = delete_bookings([booking['booking_id'] for booking in partition])
+        deleted += len(partition) - len(not_deleted)
+        failed += len(not_deleted)
+
+    return {'archived': len(bookings), 'deleted': deleted, 'failed_deletes': failed, 'partitions': len(partitions)}
+
+
+def write_archive_part(end_day, run_id, bookings):
+    """Uploads one partition as <prefix>/end_date=<day>/part-<run>.jsonl.gz."""
+    body = gzip.compress(('\n'.join(dumps(booking) for booking in bookings) + '\n').encode('utf-8'))
+    key = f"{ARCHIVE_PREFIX}/end_date={end_day}/part-{run_id}.jsonl.gz"
+    get_client('s3').put_object(
+        Bucket=ARCHIVE_BUCKET,
+        Key=key,
+        Body=body,
+        ContentType='application/x-ndjson',
+        ContentEncoding='gzip'
+    )
+    print(f"Archived {len(bookings)} bookings to s3://{ARCHIVE_BUCKET}/{key}")
+
+
+def delete_bookings(booking_ids):
+    """
+    Deletes bookings in 25-item BatchWriteItem chunks, retrying unprocessed
+    items with exponential backoff. Returns the IDs that could not be deleted.
+    """
+    client = get_client('dynamodb')
+    not_deleted = []
+
+    for start in range(0, len(booking_ids), BATCH_WRITE_SIZE):
+        requests = [
+            {'DeleteRequest': {'Key': {'booking_id': {'S': booking_id}}}}
+            for booking_id in booking_ids[start:start + BATCH_WRITE_SIZE]
+        ]
+        try:
+            for attempt in range(BATCH_WRITE_ATTEMPTS):
+                response = client.batch_write_item(RequestItems={bookings_table.name: requests})
+                requests = response.get('UnprocessedItems', {}).get(bookings_table.name, [])
+                if not requests:
+                    break
+                time.sleep(0.05 * (2 ** attempt))
+        except Exception as e:
+            print(f"Error deleting archived bookings: {e}")
+        not_deleted.extend(request['DeleteRequest']['Key']['booking_id']['S'] for request in requests)
+
+    return not_deleted
+
+
+def parallel_scan(max_items=None, **scan_kwargs):
+    """
+    Scans the bookings table (or one of its indexes) in LIFECYCLE_SCAN_SEGMENTS
+    parallel segments through a plain client and returns the matching items
+    deserialized to native values. With max_items, each segment stops once it
+    holds its share.
+    """
+    client = get_client('dynamodb')
+    segments = LIFECYCLE_SCAN_SEGMENTS
+    segment_cap = -(-max_items // segments) if max_items else None
+
+    def scan_segment(segment):
+        kwargs = dict(scan_kwargs, TableName=bookings_table.name, Segment=segment, TotalSegments=segments)
+        items = []
+        while True:
+            response = client.scan(**kwargs)
+            items.extend(deserialize_item(item) for item in response.get('Items', []))
+            if 'LastEvaluatedKey' not in response or (segment_cap and len(items) >= segment_cap):
+                return items
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    with ThreadPoolExecutor(max_workers=segments) as executor:
+        return [item for items in executor.map(scan_segment, range(segments)) for item in items]
@@ -0,0 +1,281 @@
+import os
+import time
+import zlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from dalscooter_common import LRUCache, deserialize_item, get_client
+
+# Booking utilization and revenue rollups for the franchise dashboards.
+#
+# Rollup items are keyed by series ("<dimension>#<granularity>#<shard>", e.g.
+# "bike_type#day#3") and period ("<period>#<value>", e.g. "2026-10-18#ebike"
+# or "2026-10-18T09#ebike"). Each booking counts in one of ROLLUP_SHARDS
+# shards (from its booking_id), so the rollup writes of concurrent bookings
+# spread over that many partitions instead of four hot ones; a date range of
+# one series is one Query per shard with period BETWEEN, summed on read.
+# Writers and readers must agree on ROLLUP_SHARDS, so it is a constant;
+# rebuild_booking_rollups.py re-keys the table after it changes. Each item
+# holds:
+#   bookings      - bookings starting in the period
+#   revenue       - total_cost of those bookings
+#   booked_hours  - utilization: hours of any booking that fall in the period
+# Periods are UTC. Hour items expire through TTL after HOUR_RETENTION_DAYS;
+# day items are kept.
+ROLLUPS_TABLE = os.environ.get('BOOKING_ROLLUPS_TABLE', 'dalscooter-booking-rollups')
+BIKES_TABLE = os.environ.get('BIKES_TABLE')
+HOUR_RETENTION_DAYS = int(os.environ.get('ROLLUP_HOUR_RETENTION_DAYS', '90'))
+ROLLUP_SHARDS = 8
+QUERY_WORKERS = ROLLUP_SHARDS
+
+DIMENSIONS = ('bike_type', 'franchise_id')
+GRANULARITIES = ('hour', 'day')
+# Bookings in these states no longer count; archiving deletes rows but keeps
+# them in the rollups (the stream consumer ignores REMOVE records)
+UNCOUNTED_STATUSES = frozenset({'cancelled'})
+UNKNOWN = 'unknown'
+HOURS_PRECISION = Decimal('0.000001')
+
+# Franchises rarely change; bookings made before book_bike stamped
+# franchise_id look their bike up once
+bike_franchises = LRUCache(max_items=10000, ttl_seconds=3600)
+
+
+def series_key(dimension, granularity, shard):
+    return f"{dimension}#{granularity}#{shard}"
+
+
+def rollup_shard(booking_id):
+    """The shard a booking counts in; stable across processes, unlike hash()."""
+    return zlib.crc32(str(booking_id).encode('utf-8')) % ROLLUP_SHARDS
+
+
+def period_key(period, value):
+    return f"{period}#{value}"
+
+
+def parse_time(value):
+    """Booking timestamp as a naive UTC datetime, or None."""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def hour_period(moment):
+    return moment.strftime('%Y-%m-%dT%H')
+
+
+def day_period(moment):
+    return moment.strftime('%Y-%m-%d')
+
+
+def hour_expiry(period):
+    """Epoch seconds at which an hour item may be dropped (TTL attribute)."""
+    start = datetime.strptime(period, '%Y-%m-%dT%H').replace(tzinfo=timezone.utc)
+    return int((start + timedelta(days=HOUR_RETENTION_DAYS)).timestamp())
+
+
+def retained_hour(period, now=None):
+    return hour_expiry(period) > (now or time.time())
+
+
+def lookup_franchises(bike_ids):
+    """Returns {bike_id: franchise_id}, reading unknown bikes from the bikes table in batches of 100."""
+    found = {}
+    missing = []
+    for bike_id in set(bike_ids):
+        franchise_id = bike_franchises.get(bike_id)
+        if franchise_id is None:
+            missing.append(bike_id)
+        else:
+            found[bike_id] = franchise_id
+
+    if missing and BIKES_TABLE:
+        client = get_client('dynamodb')
+        for start in range(0, len(missing), 100):
+            keys = [{'bike_id': {'S': bike_id}} for bike_id in missing[start:start + 100]]
+            request = {BIKES_TABLE: {'Keys': keys, 'ProjectionExpression': 'bike_id, franchise_id'}}
+            while request:
+                response = client.batch_get_item(RequestItems=request)
+                for item in response.get('Responses', {}).get(BIKES_TABLE, []):
+                    bike = deserialize_item(item)
+                    found[bike['bike_id']] = bike.get('franchise_id') or UNKNOWN
+                request = response.get('UnprocessedKeys') or None
+
+    for bike_id in missing:
+        found.setdefault(bike_id, UNKNOWN)
+        bike_franchises.put(bike_id, found[bike_id])
+    return found
+
+
+def booked_hours_by_hour(start, end):
+    """Yields (hour start, hours of [start, end) inside that hour)."""
+    hour = start.replace(minute=0, second=0, microsecond=0)
+    while hour < end:
+        following = hour + timedelta(hours=1)
+        overlap = (min(end, following) - max(start, hour)).total_seconds()
+        yield hour, (Decimal(str(overlap)) / 3600).quantize(HOURS_PRECISION)
+        hour = following
+
+
+def new_deltas():
+    """{(dimension, granularity, period, value): {counter: change}}"""
+    return defaultdict(lambda: defaultdict(Decimal))
+
+
+def add_booking(deltas, booking, franchise_id, sign):
+    """Adds sign (+1/-1) times the booking's contribution to every rollup it belongs to."""
+    if booking.get('status') in UNCOUNTED_STATUSES:
+        return
+    start = parse_time(booking.get('start_date'))
+    end = parse_time(booking.get('end_date'))
+    if not start or not end or end <= start:
+        return
+
+    values = {
+        'bike_type': booking.get('bike_type') or UNKNOWN,
+        'franchise_id': booking.get('franchise_id') or franchise_id or UNKNOWN
+    }
+    revenue = Decimal(str(booking.get('total_cost') or 0))
+    hours = list(booked_hours_by_hour(start, end))
+    starts = [('day', day_period(start))]
+    if retained_hour(hour_period(start)):
+        starts.append(('hour', hour_period(start)))
+
+    for dimension in DIMENSIONS:
+        value = values[dimension]
+        for granularity, period in starts:
+            counters = deltas[(dimension, granularity, period, value)]
+            counters['bookings'] += sign
+            counters['revenue'] += sign * revenue
+
+        for hour, booked in hours:
+            deltas[(dimension, 'day', day_period(hour), value)]['booked_hours'] += sign * booked
+            if retained_hour(hour_period(hour)):
+                deltas[(dimension, 'hour', hour_period(hour), value)]['booked_hours'] += sign * booked
+
+
+def update_request(dimension, granularity, period, value, counters, shard):
+    """
+    Builds a low-level Update that adds counters to one rollup item of a
+    shard, stamping its dimension value and, on hour items, the expiry.
+    """
+    names = {'#dimension': dimension}
+    values = {':value': {'S': value}}
+    additions = []
+    for position, (counter, change) in enumerate(sorted(counters.items())):
+        names[f'#c{position}'] = counter
+        values[f':c{position}'] = {'N': str(change)}
+        additions.append(f'#c{position} :c{position}')
+
+    assignments = ['#dimension = :value', 'period_start = :period']
+    values[':period'] = {'S': period}
+    if granularity == 'hour':
+        assignments.append('expires_at = :expires_at')
+        values[':expires_at'] = {'N': str(hour_expiry(period))}
+
+    return {
+        'TableName': ROLLUPS_TABLE,
+        'Key': {
+            'series': {'S': series_key(dimension, granularity, shard)},
+            'period': {'S': period_key(period, value)}
+        },
+        'UpdateExpression': 'SET ' + ', '.join(assignments) + ' ADD ' + ', '.join(additions),
+        'ExpressionAttributeNames': names,
+        'ExpressionAttributeValues': values
+    }
+
+
+def update_requests(deltas, shard):
+    """Update requests in one shard for every rollup with a non-zero change."""
+    updates = []
+    for (dimension, granularity, period, value), counters in sorted(deltas.items()):
+        counters = {counter: change for counter, change in counters.items() if change}
+        if counters:
+            updates.append(update_request(dimension, granularity, period, value, counters, shard))
+    return updates
+
+
+def period_bounds(granularity, start_day, end_day):
+    """First and last period of a UTC date range [start_day, end_day]."""
+    if granularity == 'hour':
+        return f"{start_day.isoformat()}T00", f"{end_day.isoformat()}T23"
+    return start_day.isoformat(), end_day.isoformat()
+
+
+def query_rollups(dimension, granularity, start_day, end_day, value=None):
+    """
+    Rollup items of one series between two dates (inclusive), oldest first,
+    with the shards of each period and value summed. One Query per shard, in
+    parallel; value narrows it to one bike type or franchise.
+    """
+    first, last = period_bounds(granularity, start_day, end_day)
+    client = get_client('dynamodb')
+
+    def query_shard(shard):
+        kwargs = {
+            'TableName': ROLLUPS_TABLE,
+            'KeyConditionExpression': '#series = :series AND #period BETWEEN :first AND :last',
+            'ExpressionAttributeNames': {'#series': 'series', '#period': 'period'},
+            'ExpressionAttributeValues': {
+                ':series': {'S': series_key(dimension, granularity, shard)},
+                ':first': {'S': first},
+                # Sorts after every '<last>#<value>'
+                ':last': {'S': f"{last}#\uffff"}
+            }
+        }
+        if value:
+            kwargs['FilterExpression'] = '#dimension = :value'
+            kwargs['ExpressionAttributeNames']['#dimension'] = dimension
+            kwargs['ExpressionAttributeValues'][':value'] = {'S': value}
+
+        items = []
+        while True:
+            response = client.query(**kwargs)
+            items.extend(deserialize_item(item) for item in response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                return items
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    merged = {}
+    with ThreadPoolExecutor(max_workers=QUERY_WORKERS) as executor:
+        for items in executor.map(query_shard, range(ROLLUP_SHARDS)):
+            for item in items:
+                key = period_key(item['period_start'], item.get(dimension, UNKNOWN))
+                total = merged.setdefault(key, {
+                    'period_start': item['period_start'], dimension: item.get(dimension, UNKNOWN),
+                    'bookings': 0, 'booked_hours': 0, 'revenue': 0
+                })
+                for counter in ('bookings', 'booked_hours', 'revenue'):
+                    total[counter] += item.get(counter, 0)
+    return [merged[key] for key in sorted(merged)]
+
+
+def rollup_row(item, dimension):
+    return {
+        'period': item['period_start'],
+        dimension: item.get(dimension, UNKNOWN),
+        'bookings': int(item.get('bookings', 0)),
+        'booked_hours': round(float(item.get('booked_hours', 0)), 2),
+        'revenue': round(float(item.get('revenue', 0)), 2)
+    }
+
+
+def summarize(items, dimension):
+    """Per-value totals of rollup items over the whole range."""
+    totals = {}
+    for item in items:
+        total = totals.setdefault(item.get(dimension, UNKNOWN), {'bookings': 0, 'booked_hours': 0.0, 'revenue': 0.0})
+        total['bookings'] += int(item.get('bookings', 0))
+        total['booked_hours'] += float(item.get('booked_hours', 0))
+        total['revenue'] += float(item.get('revenue', 0))
+    return {
+        value: dict(total, booked_hours=round(total['booked_hours'], 2), revenue=round(total['revenue'], 2))
+        for value, total in sorted(totals.items())
+    }
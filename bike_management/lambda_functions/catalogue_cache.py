@@ -0,0 +1,117 @@
+import os
+import time
+from bisect import bisect_right
+
+from dalscooter_common import deserialize_item, get_client
+
+# Read-through copy of the bike catalogue kept in the warm Lambda container.
+# Writers bump a version stamp in the catalogue meta table; readers compare it
+# with the stamp of their cached copy before trusting it.
+CATALOGUE_CACHE_TTL_SECONDS = int(os.environ.get('CATALOGUE_CACHE_TTL_SECONDS', '300'))
+CATALOGUE_CACHE_MAX_ITEMS = int(os.environ.get('CATALOGUE_CACHE_MAX_ITEMS', '5000'))
+
+CATALOGUE_META_KEY = 'catalogue'
+
+# Attributes kept for each bike: everything the catalogue views show, and
+# nothing else (no access codes). 'location' is a reserved word.
+CATALOGUE_PROJECTION = 'bike_id, bike_type, hourly_rate, features, available, #location, battery_life, height_adjustment'
+CATALOGUE_ATTRIBUTE_NAMES = {'#location': 'location'}
+
+_cache = {
+    'version': None,
+    'loaded_at': 0.0,
+    'bikes': None,
+    'bike_ids': None
+}
+
+
+def read_catalogue_version(meta_table):
+    """Reads the current catalogue version stamp (0 if never written)."""
+    response = meta_table.get_item(
+        Key={'meta_key': CATALOGUE_META_KEY},
+        ProjectionExpression='version'
+    )
+    return int(response.get('Item', {}).get('version', 0))
+
+
+def bump_catalogue_version(meta_table):
+    """
+    Invalidates every container's cached catalogue. Must be called after the
+    bikes table write has completed.
+    """
+    try:
+        meta_table.update_item(
+            Key={'meta_key': CATALOGUE_META_KEY},
+            UpdateExpression='ADD version :one',
+            ExpressionAttributeValues={':one': 1}
+        )
+    except Exception as e:
+        # Readers still pick the change up once their TTL runs out
+        print(f"Error bumping catalogue version: {e}")
+
+
+def get_catalogue(bikes_table, meta_table):
+    """
+    Returns the full catalogue as a list of bikes sorted by bike_id, or None
+    when the catalogue is too large to hold in memory and callers should read
+    the bikes table directly.
+    Costs one meta table read on a hit and a full projected scan on a miss.
+    """
+    version = read_catalogue_version(meta_table)
+    age = time.monotonic() - _cache['loaded_at']
+
+    if _cache['version'] == version and age < CATALOGUE_CACHE_TTL_SECONDS:
+        return _cache['bikes']
+
+    # The version is read before the scan, so a write that lands mid-scan
+    # bumps the stamp past this one and the next reader reloads.
+    bikes = scan_catalogue(bikes_table)
+    if bikes is not None:
+        bikes.sort(key=lambda bike: bike['bike_id'])
+
+    _cache['version'] = version
+    _cache['loaded_at'] = time.monotonic()
+    _cache['bikes'] = bikes
+    _cache['bike_ids'] = [bike['bike_id'] for bike in bikes] if bikes is not None else None
+    return bikes
+
+
+def scan_catalogue(bikes_table):
+    """
+    Scans every bike with the catalogue projection, giving up past the size cap.
+    Items are read through a plain client (not the resource's, which would
+    build Decimals) and deserialized straight to ints and floats, so the
+    cached catalogue is JSON-ready.
+    """
+    client = get_client('dynamodb')
+    scan_kwargs = {
+        'TableName': bikes_table.name,
+        'ProjectionExpression': CATALOGUE_PROJECTION,
+        'ExpressionAttributeNames': dict(CATALOGUE_ATTRIBUTE_NAMES)
+    }
+
+    bikes = []
+    while True:
+        response = client.scan(**scan_kwargs)
+        # Items without a bike_id are corrupted data and never listed
+        bikes.extend(deserialize_item(item) for item in response.get('Items', []) if 'bike_id' in item)
+
+        if len(bikes) > CATALOGUE_CACHE_MAX_ITEMS:
+            print(f"Catalogue exceeds {CATALOGUE_CACHE_MAX_ITEMS} bikes, not caching")
+            return None
+
+        if 'LastEvaluatedKey' not in response:
+            return bikes
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def bikes_after(bikes, bike_id):
+    """
+    Returns the bikes of a catalogue returned by get_catalogue that sort after
+    bike_id, for cursor pagination over the cached copy.
+    """
+    if bikes is not _cache['bikes'] or _cache['bike_ids'] is None:
+        bike_ids = [bike['bike_id'] for bike in bikes]
+    else:
+        bike_ids = _cache['bike_ids']
+    return bikes[bisect_right(bike_ids, bike_id):]
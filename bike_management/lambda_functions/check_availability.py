@@ -2,19 +2,16 @@ import json
 import boto3
 from datetime import datetime
 import os
-from decimal import Decimal
 
-# Initialize AWS clients
-dynamodb = boto3.resource('dynamodb')
-bikes_table = dynamodb.Table(os.environ['BIKES_TABLE'])
-bookings_table = dynamodb.Table(os.environ['BOOKINGS_TABLE'])
+from dalscooter_common import get_table, json_response, to_native
 
-# Custom JSON encoder to handle Decimal types for the final response
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, o):
-        if isinstance(o, Decimal):
-            return float(o)
-        return super(DecimalEncoder, self).default(o)
+from availability import filter_available_bike_ids
+from catalogue_cache import get_catalogue
+
+# Initialize DynamoDB tables from environment variables
+bikes_table = get_table(os.environ['BIKES_TABLE'])
+bookings_table = get_table(os.environ['BOOKINGS_TABLE'])
+catalogue_meta_table = get_table(os.environ['CATALOGUE_META_TABLE'])
 
 def lambda_handler(event, context):
     try:
@@ -23,18 +20,34 @@ def lambda_handler(event, context):
         start_date = query_params.get('start_date')
         end_date = query_params.get('end_date')
         
-        # Query for bikes based on type or get all bikes
-        if bike_type:
-            bikes_response = bikes_table.query(
+        if start_date and end_date:
+            try:
+                datetime.fromisoformat(start_date)
+                datetime.fromisoformat(end_date)
+            except ValueError:
+                return {
+                    'statusCode': 400,
+                    'headers': {'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'error': 'start_date and end_date must be ISO 8601 timestamps'})
+                }
+
+        # Use the warm-container catalogue when it fits in memory, otherwise
+        # query for bikes based on type or get all bikes
+        catalogue = get_catalogue(bikes_table, catalogue_meta_table)
+        if catalogue is not None:
+            bikes = [bike for bike in catalogue if not bike_type or bike.get('bike_type') == bike_type]
+        elif bike_type:
+            bikes = read_all_pages(
+                bikes_table.query,
                 IndexName='BikeTypeIndex',
                 KeyConditionExpression=boto3.dynamodb.conditions.Key('bike_type').eq(bike_type)
             )
         else:
-            bikes_response = bikes_table.scan()
+            bikes = read_all_pages(bikes_table.scan)
         
-        available_bikes = []
+        candidate_bikes = []
         
-        for bike in bikes_response['Items']:
+        for bike in bikes:
             # FIX 1: Safely get the bike_id and skip if it's missing (corrupted data)
             bike_id = bike.get('bike_id')
             if not bike_id:
@@ -44,33 +57,38 @@ def lambda_handler(event, context):
             # Skip if the bike is explicitly marked as unavailable
             if not bike.get('available', False):
                 continue
-                
-            # If dates are provided, check for booking conflicts
-            if start_date and end_date:
-                is_available_in_period = check_bike_availability(bike_id, start_date, end_date)
-                if not is_available_in_period:
-                    continue
-            
-            # FIX 2: Use .get() for all attributes to prevent KeyErrors
-            available_bikes.append({
-                'bike_id': bike_id,
+
+            candidate_bikes.append(bike)
+
+        # If dates are provided, load the bookings of every candidate at once
+        # and drop the ones with a conflict in the requested period
+        if start_date and end_date and candidate_bikes:
+            free_bike_ids = filter_available_bike_ids(
+                bookings_table,
+                [bike['bike_id'] for bike in candidate_bikes],
+                start_date,
+                end_date
+            )
+            candidate_bikes = [bike for bike in candidate_bikes if bike['bike_id'] in free_bike_ids]
+
+        # FIX 2: Use .get() for all attributes to prevent KeyErrors
+        available_bikes = [
+            {
+                'bike_id': bike['bike_id'],
                 'bike_type': bike.get('bike_type', 'N/A'),
                 'hourly_rate': bike.get('hourly_rate', 0),
                 'location': bike.get('location', ''),
                 'features': bike.get('features', []),
                 'battery_life': bike.get('battery_life', 'Standard'),
                 'height_adjustment': bike.get('height_adjustment', False)
-            })
+            }
+            for bike in candidate_bikes
+        ]
         
-        # FIX 3: Use the custom DecimalEncoder in the JSON response
-        return {
-            'statusCode': 200,
-            'headers': {'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({
-                'available_bikes': available_bikes,
-                'count': len(available_bikes)
-            }, cls=DecimalEncoder)
-        }
+        return json_response(200, {
+            'available_bikes': available_bikes,
+            'count': len(available_bikes)
+        }, event)
         
     except Exception as e:
         print(f"An error occurred: {e}")
@@ -81,33 +99,28 @@ def lambda_handler(event, context):
         }
 
 
+def read_all_pages(operation, **kwargs):
+    """
+    Runs a DynamoDB scan or query and follows LastEvaluatedKey until every
+    page has been read. Items come back with native numbers.
+    """
+    items = []
+    while True:
+        response = operation(**kwargs)
+        items.extend(to_native(response.get('Items', [])))
+
+        if 'LastEvaluatedKey' not in response:
+            return items
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
 def check_bike_availability(bike_id, start_date, end_date):
     """
     Checks if a specific bike has any conflicting active bookings in the given time range.
     Returns True if available, False otherwise.
     """
     try:
-        bookings_response = bookings_table.query(
-            IndexName='BikeIndex',
-            KeyConditionExpression=boto3.dynamodb.conditions.Key('bike_id').eq(bike_id)
-        )
-        
-        requested_start = datetime.fromisoformat(start_date)
-        requested_end = datetime.fromisoformat(end_date)
-        
-        for booking in bookings_response['Items']:
-            if booking.get('status') != 'active':
-                continue
-                
-            booking_start = datetime.fromisoformat(booking['start_date'])
-            booking_end = datetime.fromisoformat(booking['end_date'])
-            
-            # Check for overlap: it's booked if the requested period is not completely
-            # before or completely after the existing booking.
-            if not (requested_end <= booking_start or requested_start >= booking_end):
-                return False # Found a conflict, so it's not available
-        
-        return True # No conflicts found
+        return bike_id in filter_available_bike_ids(bookings_table, [bike_id], start_date, end_date)
         
     except Exception as e:
         print(f"Error checking bike availability for {bike_id}: {e}")
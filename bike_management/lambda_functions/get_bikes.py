@@ -1,34 +1,71 @@
 import json
-import boto3
-from boto3.dynamodb.conditions import Key
+import base64
+from boto3.dynamodb.conditions import Key, Attr
 import os
-from decimal import Decimal
 
-dynamodb = boto3.resource('dynamodb')
-bikes_table = dynamodb.Table(os.environ['BIKES_TABLE'])
+from dalscooter_common import get_table, json_response, to_native
 
-# Add this class to handle Decimals in the JSON response
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, o):
-        if isinstance(o, Decimal):
-            return float(o)
-        return super(DecimalEncoder, self).default(o)
+from catalogue_cache import get_catalogue, bikes_after, CATALOGUE_PROJECTION, CATALOGUE_ATTRIBUTE_NAMES
+
+bikes_table = get_table(os.environ['BIKES_TABLE'])
+catalogue_meta_table = get_table(os.environ['CATALOGUE_META_TABLE'])
+
+DEFAULT_PAGE_SIZE = int(os.environ.get('DEFAULT_PAGE_SIZE', '50'))
+MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', '500'))
+# Marks cursors of cached pages, which are in bike_id order; table pages are
+# in scan/index order, so a cursor only continues on the path that issued it
+CACHED_CURSOR_FLAG = 'cached'
 
 def lambda_handler(event, context):
     try:
         query_params = event.get('queryStringParameters', {}) or {}
         bike_type = query_params.get('type')
-        
-        if bike_type:
-            response = bikes_table.query(
-                IndexName='BikeTypeIndex',
-                KeyConditionExpression=Key('bike_type').eq(bike_type)
-            )
+        location = query_params.get('location')
+
+        try:
+            page_size = parse_page_size(query_params.get('limit'))
+            start_key = decode_cursor(query_params.get('cursor'), bike_type)
+            available = parse_available(query_params.get('available'))
+        except ValueError as e:
+            return {
+                'statusCode': 400,
+                'headers': {'Access-Control-Allow-Origin': '*'},
+                'body': json.dumps({'error': str(e)})
+            }
+
+        # Serve from the warm-container catalogue when it fits in memory,
+        # otherwise page through the bikes table directly. A listing started
+        # on the table stays on the table.
+        cached_cursor = bool(start_key and start_key.pop(CACHED_CURSOR_FLAG, False))
+        catalogue = get_catalogue(bikes_table, catalogue_meta_table) if cached_cursor or not start_key else None
+        if catalogue is not None:
+            bikes, last_key = read_cached_page(catalogue, bike_type, available, location, page_size, start_key)
+        elif cached_cursor:
+            # The catalogue outgrew the cache mid-listing; table order differs
+            return {
+                'statusCode': 400,
+                'headers': {'Access-Control-Allow-Origin': '*'},
+                'body': json.dumps({'error': 'cursor has expired, list the bikes again without a cursor'})
+            }
         else:
-            response = bikes_table.scan()
-        
-        bikes = response['Items']
-        
+            request_kwargs = {
+                'ProjectionExpression': CATALOGUE_PROJECTION,
+                'ExpressionAttributeNames': dict(CATALOGUE_ATTRIBUTE_NAMES)
+            }
+
+            filter_expression = build_filter(available, location)
+            if filter_expression is not None:
+                request_kwargs['FilterExpression'] = filter_expression
+
+            if bike_type:
+                operation = bikes_table.query
+                request_kwargs['IndexName'] = 'BikeTypeIndex'
+                request_kwargs['KeyConditionExpression'] = Key('bike_type').eq(bike_type)
+            else:
+                operation = bikes_table.scan
+
+            bikes, last_key = read_page(operation, request_kwargs, page_size, start_key)
+
         formatted_bikes = []
         for bike in bikes:
             # FIX: Use .get() to prevent crashing on missing keys
@@ -37,23 +74,19 @@ def lambda_handler(event, context):
                 'bike_type': bike.get('bike_type', 'N/A'), # Provide default if missing
                 'hourly_rate': bike.get('hourly_rate', 0),
                 'features': bike.get('features', []),
-                'access_code': bike.get('access_code', ''),
                 'available': bike.get('available', True),
                 'location': bike.get('location', ''),
                 'battery_life': bike.get('battery_life', 'N/A'),
                 'height_adjustment': bike.get('height_adjustment', False)
             })
-        
-        return {
-            'statusCode': 200,
-            'headers': {'Access-Control-Allow-Origin': '*'},
-            # Use the DecimalEncoder to properly format numbers
-            'body': json.dumps({
-                'bikes': formatted_bikes,
-                'count': len(formatted_bikes)
-            }, cls=DecimalEncoder)
-        }
-        
+
+        # Numbers are already native, so this serializes without callbacks
+        return json_response(200, {
+            'bikes': formatted_bikes,
+            'count': len(formatted_bikes),
+            'next_cursor': encode_cursor(last_key)
+        }, event)
+
     except Exception as e:
         print(f"Error: {e}")
         return {
@@ -61,3 +94,128 @@ def lambda_handler(event, context):
             'headers': {'Access-Control-Allow-Origin': '*'},
             'body': json.dumps({'error': str(e)})
         }
+
+
+def read_page(operation, request_kwargs, page_size, start_key):
+    """
+    Reads up to page_size matching bikes starting after start_key.
+    DynamoDB applies Limit before the filter, so filtered reads keep going
+    until the page is full or the table/index is exhausted.
+    Returns (items, last_evaluated_key) where the key is None on the last page.
+    Items come back with native numbers.
+    """
+    items = []
+    last_key = start_key
+
+    while True:
+        kwargs = dict(request_kwargs, Limit=page_size - len(items))
+        if last_key:
+            kwargs['ExclusiveStartKey'] = last_key
+
+        response = operation(**kwargs)
+        items.extend(to_native(response.get('Items', [])))
+        last_key = response.get('LastEvaluatedKey')
+
+        if not last_key or len(items) >= page_size:
+            return items, last_key
+
+
+def read_cached_page(catalogue, bike_type, available, location, page_size, start_key):
+    """
+    Same contract as read_page, over the cached catalogue (sorted by bike_id).
+    The returned key is flagged as a cached cursor: it only continues the
+    listing while the catalogue is cached, because table pages come in scan
+    or index order, not bike_id order.
+    """
+    bikes = bikes_after(catalogue, start_key['bike_id']) if start_key else catalogue
+
+    items = []
+    for bike in bikes:
+        if bike_type and bike.get('bike_type') != bike_type:
+            continue
+        if available is not None and bike.get('available') != available:
+            continue
+        if location and bike.get('location') != location:
+            continue
+
+        # Read one match past the page to know whether another page exists
+        if len(items) == page_size:
+            last_key = {'bike_id': items[-1]['bike_id'], CACHED_CURSOR_FLAG: True}
+            if bike_type:
+                last_key['bike_type'] = bike_type
+            return items, last_key
+        items.append(bike)
+
+    return items, None
+
+
+def build_filter(available, location):
+    """Builds the optional server-side filter for availability and location."""
+    conditions = []
+
+    if available is not None:
+        conditions.append(Attr('available').eq(available))
+
+    if location:
+        conditions.append(Attr('location').eq(location))
+
+    if not conditions:
+        return None
+
+    expression = conditions[0]
+    for condition in conditions[1:]:
+        expression = expression & condition
+    return expression
+
+
+def parse_available(value):
+    if value is None:
+        return None
+    if value.lower() not in ('true', 'false'):
+        raise ValueError('available must be true or false')
+    return value.lower() == 'true'
+
+
+def parse_page_size(value):
+    if value is None:
+        return DEFAULT_PAGE_SIZE
+    try:
+        page_size = int(value)
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    if page_size < 1:
+        raise ValueError('limit must be at least 1')
+    return min(page_size, MAX_PAGE_SIZE)
+
+
+def encode_cursor(last_key):
+    """Turns a LastEvaluatedKey into an opaque, URL-safe cursor."""
+    if not last_key:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(last_key, separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor, bike_type=None):
+    """
+    Returns the start key in a cursor. It must hold exactly the keys the
+    listing issues, as strings: bike_id, plus bike_type (the requested type)
+    when filtering by type, plus the cached flag on cached pages. Anything
+    else would fail in DynamoDB.
+    """
+    if not cursor:
+        return None
+    try:
+        last_key = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception:
+        raise ValueError('cursor is invalid')
+    if not isinstance(last_key, dict):
+        raise ValueError('cursor is invalid')
+
+    expected = {'bike_id', 'bike_type'} if bike_type else {'bike_id'}
+    if last_key.get(CACHED_CURSOR_FLAG) is True:
+        expected.add(CACHED_CURSOR_FLAG)
+    key_values = [value for key, value in last_key.items() if key != CACHED_CURSOR_FLAG]
+    if (last_key.keys() != expected or not all(isinstance(value, str) for value in key_values)
+            or (bike_type and last_key['bike_type'] != bike_type)):
+        raise ValueError('cursor is invalid')
+    return last_key
@@ -0,0 +1,64 @@
+import os
+from datetime import date, datetime, timezone
+
+from dalscooter_common import json_response
+
+from booking_rollups import DIMENSIONS, GRANULARITIES, query_rollups, rollup_row, summarize
+
+# GET /bookings/rollups?from=YYYY-MM-DD[&to=YYYY-MM-DD][&granularity=day|hour]
+#                      [&group_by=bike_type|franchise_id][&bike_type=...|&franchise_id=...]
+# Bookings, booked hours and revenue per bike type or franchise for each UTC
+# hour or day of a date range, read from the rollups only.
+MAX_RANGE_DAYS = {
+    'hour': int(os.environ.get('ROLLUP_MAX_HOURLY_DAYS', '31')),
+    'day': int(os.environ.get('ROLLUP_MAX_DAILY_DAYS', '731'))
+}
+
+
+def lambda_handler(event, context):
+    try:
+        query_params = event.get('queryStringParameters', {}) or {}
+
+        try:
+            granularity, group_by, start_day, end_day = parse_range(query_params)
+        except ValueError as e:
+            return json_response(400, {'error': str(e)}, event)
+        value = query_params.get(group_by)
+
+        items = query_rollups(group_by, granularity, start_day, end_day, value)
+
+        return json_response(200, {
+            'granularity': granularity,
+            'group_by': group_by,
+            'from': start_day.isoformat(),
+            'to': end_day.isoformat(),
+            'rows': [rollup_row(item, group_by) for item in items],
+            'totals': summarize(items, group_by),
+            'generated_at': datetime.now(timezone.utc).isoformat()
+        }, event)
+
+    except Exception as e:
+        print(f"Error: {e}")
+        return json_response(500, {'error': str(e)}, event)
+
+
+def parse_range(query_params):
+    granularity = query_params.get('granularity') or 'day'
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of: {', '.join(GRANULARITIES)}")
+    group_by = query_params.get('group_by') or 'bike_type'
+    if group_by not in DIMENSIONS:
+        raise ValueError(f"group_by must be one of: {', '.join(DIMENSIONS)}")
+
+    if not query_params.get('from'):
+        raise ValueError('from is required (YYYY-MM-DD)')
+    try:
+        start_day = date.fromisoformat(query_params['from'])
+        end_day = date.fromisoformat(query_params.get('to') or query_params['from'])
+    except ValueError:
+        raise ValueError('from and to must be dates (YYYY-MM-DD)')
+    if end_day < start_day:
+        raise ValueError('to must not be before from')
+    if (end_day - start_day).days + 1 > MAX_RANGE_DAYS[granularity]:
+        raise ValueError(f"{granularity} rollups cover at most {MAX_RANGE_DAYS[granularity]} days per request")
+    return granularity, group_by, start_day, end_day
@@ -1,18 +1,46 @@
 import json
-import boto3
+import csv
+import io
+import time
 import uuid
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from decimal import Decimal
 
-dynamodb = boto3.resource('dynamodb')
-bikes_table = dynamodb.Table(os.environ['BIKES_TABLE'])
+from dalscooter_common import get_table
+
+from catalogue_cache import bump_catalogue_version
+
+bikes_table = get_table(os.environ['BIKES_TABLE'])
+catalogue_meta_table = get_table(os.environ['CATALOGUE_META_TABLE'])
+
+# Bulk onboarding limits. DynamoDB accepts at most 25 items per BatchWriteItem.
+MAX_BULK_ROWS = int(os.environ.get('MAX_BULK_ROWS', '1000'))
+BULK_MAX_WORKERS = int(os.environ.get('BULK_MAX_WORKERS', '8'))
+BATCH_WRITE_SIZE = 25
+BATCH_WRITE_ATTEMPTS = 5
+
+# Define which fields are updatable
+updatable_fields = {
+    "hourly_rate": "Decimal",
+    "available": "Boolean",
+    "location": "String", # 'location' is a reserved word
+    "features": "List",
+    "battery_life": "String",
+    "height_adjustment": "Boolean"
+}
 
 def lambda_handler(event, context):
     try:
         http_method = event['httpMethod']
-        
-        if http_method == 'POST':
+        is_bulk = (event.get('resource') or event.get('path') or '').endswith('/bulk')
+
+        if http_method == 'POST' and is_bulk:
+            return bulk_add_bikes(event)
+        elif http_method == 'PUT' and is_bulk:
+            return bulk_update_bikes(event)
+        elif http_method == 'POST':
             return add_bike(event)
         elif http_method == 'PUT':
             return update_bike(event)
@@ -22,7 +50,7 @@ def lambda_handler(event, context):
                 'headers': {'Access-Control-Allow-Origin': '*'},
                 'body': json.dumps({'error': 'Method not allowed'})
             }
-            
+
     except Exception as e:
         print(f"Error: {e}")
         return {
@@ -33,33 +61,19 @@ def lambda_handler(event, context):
 
 def add_bike(event):
     body = json.loads(event['body'])
-    
-    bike_id = str(uuid.uuid4())
-    access_code = f"ACCESS-{str(uuid.uuid4())[:8].upper()}"
-    
-    bike_item = {
-        'bike_id': bike_id,
-        'bike_type': body['bike_type'],
-        'hourly_rate': Decimal(str(body['hourly_rate'])),
-        'franchise_id': body['franchise_id'],
-        'location': body.get('location', ''),
-        'features': body.get('features', []),
-        'access_code': access_code,
-        'available': body.get('available', True),
-        'battery_life': body.get('battery_life', 'Standard'),
-        'height_adjustment': body.get('height_adjustment', False),
-        'created_date': datetime.now().isoformat()
-    }
-    
+
+    bike_item = build_bike_item(body, generate_access_code())
+
     bikes_table.put_item(Item=bike_item)
-    
+    bump_catalogue_version(catalogue_meta_table)
+
     return {
         'statusCode': 201,
         'headers': {'Access-Control-Allow-Origin': '*'},
         'body': json.dumps({
-            'bike_id': bike_id,
+            'bike_id': bike_item['bike_id'],
             'message': 'Bike added successfully',
-            'access_code': access_code
+            'access_code': bike_item['access_code']
         })
     }
 
@@ -70,33 +84,124 @@ def update_bike(event):
     if not bike_id:
         return {'statusCode': 400, 'body': json.dumps({'error': 'bike_id is required'})}
 
-    # 1. CRITICAL FIX: Check if the bike exists first
     try:
-        response = bikes_table.get_item(Key={'bike_id': bike_id})
-        if 'Item' not in response:
-            return {
-                'statusCode': 404,
-                'headers': {'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({'error': f'Bike with ID {bike_id} not found'})
-            }
-    except Exception as e:
-        return {'statusCode': 500, 'body': json.dumps({'error': str(e)})}
+        update_kwargs = build_update(body)
+    except ValueError as e:
+        return {
+            'statusCode': 400,
+            'headers': {'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': str(e)})
+        }
+
+    # The existence check is part of the update itself, so it costs no extra read
+    try:
+        bikes_table.update_item(Key={'bike_id': bike_id}, **update_kwargs)
+    except bikes_table.meta.client.exceptions.ConditionalCheckFailedException:
+        return {
+            'statusCode': 404,
+            'headers': {'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': f'Bike with ID {bike_id} not found'})
+        }
+    bump_catalogue_version(catalogue_meta_table)
+
+    return {
+        'statusCode': 200,
+        'headers': {'Access-Control-Allow-Origin': '*'},
+        'body': json.dumps({'message': f'Bike {bike_id} updated successfully'})
+    }
+
+def bulk_add_bikes(event):
+    """
+    Adds every bike in a JSON array or CSV body. Rows are validated up front,
+    then written in 25-item BatchWriteItem chunks by parallel workers.
+    Returns a per-row report.
+    """
+    try:
+        rows = parse_bulk_rows(event)
+    except ValueError as e:
+        return bulk_error(str(e))
+
+    access_codes = generate_access_codes(len(rows))
+    results = [None] * len(rows)
+    pending = []
+
+    for index, row in enumerate(rows):
+        try:
+            bike_item = build_bike_item(row, access_codes[index])
+            pending.append((index, bike_item))
+        except (KeyError, ValueError, ArithmeticError) as e:
+            results[index] = row_result(index, 'failed', error=describe_row_error(e))
+
+    chunks = [pending[i:i + BATCH_WRITE_SIZE] for i in range(0, len(pending), BATCH_WRITE_SIZE)]
+
+    with ThreadPoolExecutor(max_workers=BULK_MAX_WORKERS) as executor:
+        for chunk, failed_ids in zip(chunks, executor.map(write_chunk, chunks)):
+            for index, bike_item in chunk:
+                if bike_item['bike_id'] in failed_ids:
+                    results[index] = row_result(index, 'failed', bike_item['bike_id'], error=failed_ids[bike_item['bike_id']])
+                else:
+                    results[index] = row_result(index, 'created', bike_item['bike_id'], access_code=bike_item['access_code'])
+
+    return bulk_report(results)
+
+def bulk_update_bikes(event):
+    """
+    Applies every update row in a JSON array or CSV body with parallel
+    conditional update_item calls (BatchWriteItem cannot update).
+    Returns a per-row report.
+    """
+    try:
+        rows = parse_bulk_rows(event)
+    except ValueError as e:
+        return bulk_error(str(e))
 
-    # 2. CRITICAL FIX: Safely build the update expression
+    # The low-level client is thread safe, the Table resource is not
+    client = bikes_table.meta.client
+    table_name = bikes_table.name
+
+    def apply_update(indexed_row):
+        index, row = indexed_row
+        bike_id = row.get('bike_id')
+        if not bike_id:
+            return row_result(index, 'failed', error='bike_id is required')
+
+        try:
+            client.update_item(TableName=table_name, Key={'bike_id': bike_id}, **build_update(row))
+            return row_result(index, 'updated', bike_id)
+        except client.exceptions.ConditionalCheckFailedException:
+            return row_result(index, 'failed', bike_id, error=f'Bike with ID {bike_id} not found')
+        except Exception as e:
+            return row_result(index, 'failed', bike_id, error=describe_row_error(e))
+
+    with ThreadPoolExecutor(max_workers=BULK_MAX_WORKERS) as executor:
+        results = list(executor.map(apply_update, enumerate(rows)))
+
+    return bulk_report(results)
+
+def build_bike_item(body, access_code):
+    return {
+        'bike_id': str(uuid.uuid4()),
+        'bike_type': body['bike_type'],
+        'hourly_rate': coerce_field('Decimal', body['hourly_rate']),
+        'franchise_id': body['franchise_id'],
+        'location': body.get('location', ''),
+        'features': coerce_field('List', body.get('features', [])),
+        'access_code': access_code,
+        'available': coerce_field('Boolean', body.get('available', True)),
+        'battery_life': body.get('battery_life', 'Standard'),
+        'height_adjustment': coerce_field('Boolean', body.get('height_adjustment', False)),
+        'created_date': datetime.now().isoformat()
+    }
+
+def build_update(body):
+    """
+    Builds the update_item arguments for the updatable fields present in body.
+    The update only applies to an existing bike.
+    """
     update_expression_parts = []
     expression_values = {}
     expression_names = {}
 
-    # Define which fields are updatable
-    updatable_fields = {
-        "hourly_rate": "Decimal",
-        "available": "Boolean",
-        "location": "String", # 'location' is a reserved word
-        "features": "List",
-        "battery_life": "String",
-        "height_adjustment": "Boolean"
-    }
-    
     for field, field_type in updatable_fields.items():
         if field in body:
             # Use placeholders for names and values to avoid injection issues
@@ -108,30 +213,125 @@ def update_bike(event):
             expression_names[name_placeholder] = field
 
             # Set value with correct type
-            if field_type == "Decimal":
-                expression_values[value_placeholder] = Decimal(str(body[field]))
-            else:
-                expression_values[value_placeholder] = body[field]
+            expression_values[value_placeholder] = coerce_field(field_type, body[field])
 
     if not update_expression_parts:
-        return {
-            'statusCode': 400,
-            'headers': {'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': 'No valid fields provided for update'})
-        }
+        raise ValueError('No valid fields provided for update')
 
-    update_expression = "SET " + ", ".join(update_expression_parts)
-    
-    # 3. Perform the update
-    bikes_table.update_item(
-        Key={'bike_id': bike_id},
-        UpdateExpression=update_expression,
-        ExpressionAttributeValues=expression_values,
-        ExpressionAttributeNames=expression_names
-    )
-    
     return {
-        'statusCode': 200,
+        'UpdateExpression': "SET " + ", ".join(update_expression_parts),
+        'ConditionExpression': 'attribute_exists(bike_id)',
+        'ExpressionAttributeValues': expression_values,
+        'ExpressionAttributeNames': expression_names
+    }
+
+def coerce_field(field_type, value):
+    """
+    Converts a field to its stored type. CSV rows carry every value as a
+    string, so booleans and lists are also accepted in text form.
+    """
+    if field_type == "Decimal":
+        return Decimal(str(value))
+    if field_type == "Boolean" and isinstance(value, str):
+        return value.strip().lower() in ('true', '1', 'yes')
+    if field_type == "List" and isinstance(value, str):
+        return [feature.strip() for feature in value.split(';') if feature.strip()]
+    return value
+
+def generate_access_code():
+    return f"ACCESS-{str(uuid.uuid4())[:8].upper()}"
+
+def generate_access_codes(count):
+    """Generates count distinct access codes."""
+    codes = set()
+    while len(codes) < count:
+        codes.add(generate_access_code())
+    return list(codes)
+
+def parse_bulk_rows(event):
+    """
+    Reads the rows of a bulk request: a JSON array (or {"bikes": [...]}) or,
+    with a text/csv content type, a CSV document with a header row.
+    Features in CSV are separated by ';'.
+    """
+    headers = {key.lower(): value for key, value in (event.get('headers') or {}).items()}
+    body = event.get('body') or ''
+
+    if headers.get('content-type', '').startswith('text/csv'):
+        rows = [
+            {field: value for field, value in row.items() if value not in (None, '')}
+            for row in csv.DictReader(io.StringIO(body))
+        ]
+    else:
+        try:
+            rows = json.loads(body)
+        except json.JSONDecodeError:
+            raise ValueError('Body must be a JSON array or CSV document')
+        if isinstance(rows, dict):
+            rows = rows.get('bikes')
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValueError('Body must be a JSON array of bike objects')
+
+    if not rows:
+        raise ValueError('No rows provided')
+    if len(rows) > MAX_BULK_ROWS:
+        raise ValueError(f'At most {MAX_BULK_ROWS} rows can be sent in one request')
+    return rows
+
+def write_chunk(chunk):
+    """
+    Writes one chunk of bike items with BatchWriteItem, retrying unprocessed
+    items with exponential backoff.
+    Returns {bike_id: error} for the items that could not be written.
+    """
+    client = bikes_table.meta.client
+    requests = [{'PutRequest': {'Item': bike_item}} for _, bike_item in chunk]
+
+    try:
+        for attempt in range(BATCH_WRITE_ATTEMPTS):
+            response = client.batch_write_item(RequestItems={bikes_table.name: requests})
+            requests = response.get('UnprocessedItems', {}).get(bikes_table.name, [])
+            if not requests:
+                return {}
+            time.sleep(0.05 * (2 ** attempt))
+    except Exception as e:
+        print(f"Error writing bike chunk: {e}")
+        return {bike_item['bike_id']: str(e) for _, bike_item in chunk}
+
+    return {request['PutRequest']['Item']['bike_id']: 'Write throttled, please retry' for request in requests}
+
+def row_result(index, status, bike_id=None, **extra):
+    result = {'row': index, 'status': status}
+    if bike_id:
+        result['bike_id'] = bike_id
+    result.update(extra)
+    return result
+
+def describe_row_error(error):
+    if isinstance(error, KeyError):
+        return f'Missing required field: {error.args[0]}'
+    if isinstance(error, ArithmeticError):
+        return 'hourly_rate must be a number'
+    return str(error)
+
+def bulk_report(results):
+    succeeded = sum(1 for result in results if result['status'] != 'failed')
+    if succeeded:
+        bump_catalogue_version(catalogue_meta_table)
+
+    return {
+        'statusCode': 200 if succeeded == len(results) else 207,
         'headers': {'Access-Control-Allow-Origin': '*'},
-        'body': json.dumps({'message': f'Bike {bike_id} updated successfully'})
+        'body': json.dumps({
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'results': results
+        })
+    }
+
+def bulk_error(message):
+    return {
+        'statusCode': 400,
+        'headers': {'Access-Control-Allow-Origin': '*'},
+        'body': json.dumps({'error': message})
     }
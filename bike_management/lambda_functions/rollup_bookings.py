@@ -0,0 +1,103 @@
+import time
+
+from dalscooter_common import deserialize_item, get_client
+
+from booking_rollups import ROLLUPS_TABLE, add_booking, lookup_franchises, new_deltas, rollup_shard, update_requests
+
+# Keeps the booking rollups in step with the bookings table through its
+# DynamoDB stream. A record adds its new image and subtracts its old one, so
+# only changes to the counted attributes touch the rollups. REMOVE records
+# are skipped: rows only leave the table when booking_lifecycle archives
+# them, and archived bookings still count.
+#
+# A record's updates go out in one transaction together with a conditional
+# put of an applied marker keyed by the stream event id, so a record is
+# counted once however often, and however late, the stream retries it. A
+# booking spanning more hours than one transaction holds is split into
+# chunks, each with its own marker: a retry skips the chunks already applied
+# and completes the rest. Markers expire after MARKER_RETENTION_SECONDS,
+# longer than the stream keeps records. The first record that fails is
+# reported in batchItemFailures and the batch resumes from it.
+dynamo = get_client('dynamodb')
+# DynamoDB's 100-item transaction limit, less the marker
+UPDATES_PER_TRANSACTION = 99
+MARKER_PREFIX = 'applied#'
+MARKER_RETENTION_SECONDS = 2 * 24 * 3600
+
+
+def lambda_handler(event, context):
+    records = event.get('Records', [])
+    images = [record_images(record) for record in records]
+
+    # One lookup for the bikes of bookings made before franchise_id was stamped
+    bike_ids = [
+        image['bike_id'] for pair in images for image in pair
+        if image and 'bike_id' in image and not image.get('franchise_id')
+    ]
+    franchises = lookup_franchises(bike_ids) if bike_ids else {}
+
+    applied = 0
+    for record, (old_image, new_image) in zip(records, images):
+        if record.get('eventName') == 'REMOVE':
+            continue
+        deltas = new_deltas()
+        if old_image:
+            add_booking(deltas, old_image, franchises.get(old_image.get('bike_id')), -1)
+        if new_image:
+            add_booking(deltas, new_image, franchises.get(new_image.get('bike_id')), 1)
+
+        booking_id = (new_image or old_image or {}).get('booking_id', record['eventID'])
+        updates = update_requests(deltas, rollup_shard(booking_id))
+        if not updates:
+            continue
+
+        try:
+            for chunk, start in enumerate(range(0, len(updates), UPDATES_PER_TRANSACTION)):
+                apply_once(record['eventID'], chunk, updates[start:start + UPDATES_PER_TRANSACTION])
+            applied += 1
+        except Exception as e:
+            print(f'Error rolling up booking record {record["eventID"]}: {e}')
+            print(f'Rolled up {applied} of {len(records)} records')
+            return {'batchItemFailures': [{'itemIdentifier': record['dynamodb']['SequenceNumber']}]}
+
+    print(f'Rolled up {applied} of {len(records)} records')
+    return {'batchItemFailures': []}
+
+
+def applied_marker(event_id, chunk):
+    """Conditional put of the marker recording that a chunk of a stream record was applied."""
+    return {
+        'TableName': ROLLUPS_TABLE,
+        'Item': {
+            'series': {'S': f"{MARKER_PREFIX}{event_id}"},
+            'period': {'S': str(chunk)},
+            'expires_at': {'N': str(int(time.time()) + MARKER_RETENTION_SECONDS)}
+        },
+        'ConditionExpression': 'attribute_not_exists(series)'
+    }
+
+
+def apply_once(event_id, chunk, updates):
+    """Applies one chunk of a record's updates with its marker; a chunk already applied is skipped."""
+    try:
+        dynamo.transact_write_items(
+            TransactItems=[{'Put': applied_marker(event_id, chunk)}] + [{'Update': update} for update in updates]
+        )
+    except dynamo.exceptions.TransactionCanceledException as e:
+        # The marker is the first item; only its condition can fail
+        reasons = e.response.get('CancellationReasons', [])
+        if reasons and reasons[0].get('Code') == 'ConditionalCheckFailed':
+            print(f'Skipping rollup chunk {chunk} of record {event_id}, already applied')
+            return
+        raise
+
+
+def record_images(record):
+    """Returns (old image, new image) of a stream record as native items; either may be None."""
+    change = record.get('dynamodb', {})
+    old_image = change.get('OldImage')
+    new_image = change.get('NewImage')
+    return (
+        deserialize_item(old_image) if old_image else None,
+        deserialize_item(new_image) if new_image else None
+    )
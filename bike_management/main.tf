@@ -59,6 +59,10 @@ resource "aws_dynamodb_table" "bookings" {
   billing_mode   = "PAY_PER_REQUEST"
   hash_key       = "booking_id"
 
+  # Feeds the booking rollups (rollup_bookings.py)
+  stream_enabled   = true
+  stream_view_type = "NEW_AND_OLD_IMAGES"
+
   attribute {
     name = "booking_id"
     type = "S"
@@ -79,6 +83,26 @@ resource "aws_dynamodb_table" "bookings" {
     type = "S"
   }
 
+  attribute {
+    name = "calendar_bike_id"
+    type = "S"
+  }
+
+  attribute {
+    name = "start_date"
+    type = "S"
+  }
+
+  attribute {
+    name = "change_day"
+    type = "S"
+  }
+
+  attribute {
+    name = "updated_at"
+    type = "S"
+  }
+
   global_secondary_index {
     name               = "CustomerIndex"
     hash_key           = "customer_id"
@@ -97,12 +121,121 @@ resource "aws_dynamodb_table" "bookings" {
     projection_type    = "ALL"
   }
 
+  # Sparse per-bike booking calendar: only live reservations carry
+  # calendar_bike_id, sorted by start_date for neighbour lookups. Eventually
+  # consistent, so it serves availability listings only; book_bike checks
+  # conflicts on the bike item's booking_calendar
+  global_secondary_index {
+    name               = "BikeCalendarIndex"
+    hash_key           = "calendar_bike_id"
+    range_key          = "start_date"
+    projection_type    = "INCLUDE"
+    non_key_attributes = ["end_date"]
+  }
+
+  # Bookings by day and time of last write, for the incremental analytics
+  # export (data_visualization_and_analytics/scripts/export_analytics.py).
+  # change_day is "<day>#<shard>" so a day's writes spread over
+  # dalscooter_common.changes.CHANGE_SHARDS partitions
+  global_secondary_index {
+    name               = "ChangeIndex"
+    hash_key           = "change_day"
+    range_key          = "updated_at"
+    projection_type    = "ALL"
+  }
+
   tags = {
     Name        = "dalscooter-bookings"
     Environment = var.environment
   }
 }
 
+# Booking counts, booked hours and revenue per bike type and franchise, per
+# hour and per day, maintained from the bookings stream. Hour items expire
+# after var.booking_rollup_hour_retention_days; day items are kept.
+resource "aws_dynamodb_table" "booking_rollups" {
+  name         = "dalscooter-booking-rollups"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "series"
+  range_key    = "period"
+
+  attribute {
+    name = "series"
+    type = "S"
+  }
+
+  attribute {
+    name = "period"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+
+  tags = {
+    Name        = "dalscooter-booking-rollups"
+    Environment = var.environment
+  }
+}
+
+# DynamoDB table for the catalogue version stamp. manage_bikes bumps it on
+# every write so warm containers know when their cached catalogue is stale.
+resource "aws_dynamodb_table" "catalogue_meta" {
+  name           = "dalscooter-catalogue-meta"
+  billing_mode   = "PAY_PER_REQUEST"
+  hash_key       = "meta_key"
+
+  attribute {
+    name = "meta_key"
+    type = "S"
+  }
+
+  tags = {
+    Name        = "dalscooter-catalogue-meta"
+    Environment = var.environment
+  }
+}
+
+# S3 bucket for archived bookings. booking_lifecycle writes completed bookings
+# here as gzipped JSON Lines, partitioned by end date, before deleting them
+# from the bookings table.
+resource "aws_s3_bucket" "booking_archive" {
+  bucket_prefix = "dalscooter-booking-archive-"
+
+  tags = {
+    Name        = "dalscooter-booking-archive"
+    Environment = var.environment
+  }
+}
+
+resource "aws_s3_bucket_public_access_block" "booking_archive" {
+  bucket                  = aws_s3_bucket.booking_archive.id
+  block_public_acls       = true
+  block_public_policy     = true
+  ignore_public_acls      = true
+  restrict_public_buckets = true
+}
+
+resource "aws_s3_bucket_lifecycle_configuration" "booking_archive" {
+  bucket = aws_s3_bucket.booking_archive.id
+
+  rule {
+    id     = "cold-storage"
+    status = "Enabled"
+
+    filter {
+      prefix = "bookings/"
+    }
+
+    transition {
+      days          = var.booking_archive_glacier_days
+      storage_class = "GLACIER_IR"
+    }
+  }
+}
+
 # IAM role for Lambda functions
 resource "aws_iam_role" "bike_lambda_role" {
   name = "dalscooter-bike-lambda-role"
@@ -145,21 +278,44 @@ resource "aws_iam_role_policy" "bike_lambda_policy" {
           "dynamodb:GetItem",
           "dynamodb:UpdateItem",
           "dynamodb:DeleteItem",
+          "dynamodb:BatchWriteItem",
           "dynamodb:Query",
           "dynamodb:Scan"
         ]
         Resource = [
           aws_dynamodb_table.bikes.arn,
           aws_dynamodb_table.bookings.arn,
+          aws_dynamodb_table.catalogue_meta.arn,
+          aws_dynamodb_table.booking_rollups.arn,
           var.booking_references_table_arn, # NEW: Permission for chatbot reference table
           "${aws_dynamodb_table.bikes.arn}/index/*",
           "${aws_dynamodb_table.bookings.arn}/index/*"
         ]
       },
+      {
+        Effect = "Allow"
+        Action = [
+          "dynamodb:DescribeStream",
+          "dynamodb:GetRecords",
+          "dynamodb:GetShardIterator",
+          "dynamodb:ListStreams"
+        ]
+        Resource = aws_dynamodb_table.bookings.stream_arn
+      },
+      {
+        Effect   = "Allow"
+        Action   = ["dynamodb:BatchGetItem"]
+        Resource = aws_dynamodb_table.bikes.arn
+      },
       {
         Effect   = "Allow"
         Action   = "lambda:InvokeFunction"
         Resource = var.notification_processor_lambda_arn
+      },
+      {
+        Effect   = "Allow"
+        Action   = "s3:PutObject"
+        Resource = "${aws_s3_bucket.booking_archive.arn}/*"
       }
     ]
   })
@@ -172,11 +328,13 @@ resource "aws_lambda_function" "get_bikes" {
   role             = aws_iam_role.bike_lambda_role.arn
   handler          = "get_bikes.lambda_handler"
   runtime          = "python3.9"
+  layers           = [var.shared_layer_arn]
   timeout          = 30
 
   environment {
     variables = {
-      BIKES_TABLE = aws_dynamodb_table.bikes.name
+      BIKES_TABLE          = aws_dynamodb_table.bikes.name
+      CATALOGUE_META_TABLE = aws_dynamodb_table.catalogue_meta.name
     }
   }
 
@@ -190,6 +348,7 @@ resource "aws_lambda_function" "book_bike" {
   role             = aws_iam_role.bike_lambda_role.arn
   handler          = "book_bike.lambda_handler"
   runtime          = "python3.9"
+  layers           = [var.shared_layer_arn]
   timeout          = 30
 
   environment {
@@ -212,11 +371,16 @@ resource "aws_lambda_function" "manage_bikes" {
   role             = aws_iam_role.bike_lambda_role.arn
   handler          = "manage_bikes.lambda_handler"
   runtime          = "python3.9"
+  layers           = [var.shared_layer_arn]
   timeout          = 30
+  memory_size      = 512
 
   environment {
     variables = {
-      BIKES_TABLE = aws_dynamodb_table.bikes.name
+      BIKES_TABLE          = aws_dynamodb_table.bikes.name
+      CATALOGUE_META_TABLE = aws_dynamodb_table.catalogue_meta.name
+      MAX_BULK_ROWS        = "1000"
+      BULK_MAX_WORKERS     = "8"
     }
   }
 
@@ -230,39 +394,245 @@ resource "aws_lambda_function" "check_availability" {
   role             = aws_iam_role.bike_lambda_role.arn
   handler          = "check_availability.lambda_handler"
   runtime          = "python3.9"
+  layers           = [var.shared_layer_arn]
   timeout          = 30
 
   environment {
     variables = {
-      BIKES_TABLE    = aws_dynamodb_table.bikes.name
-      BOOKINGS_TABLE = aws_dynamodb_table.bookings.name
+      BIKES_TABLE              = aws_dynamodb_table.bikes.name
+      BOOKINGS_TABLE           = aws_dynamodb_table.bookings.name
+      CATALOGUE_META_TABLE     = aws_dynamodb_table.catalogue_meta.name
+      AVAILABILITY_MAX_WORKERS = "10"
     }
   }
 
   depends_on = [data.archive_file.check_availability_zip]
 }
 
+# Lambda function for the booking lifecycle jobs (sweep and archive)
+resource "aws_lambda_function" "booking_lifecycle" {
+  filename         = "bike_management/lambda_functions/booking_lifecycle.zip"
+  function_name    = "dalscooter-booking-lifecycle"
+  role             = aws_iam_role.bike_lambda_role.arn
+  handler          = "booking_lifecycle.lambda_handler"
+  runtime          = "python3.9"
+  layers           = [var.shared_layer_arn]
+  timeout          = 900
+  memory_size      = 1024
+
+  environment {
+    variables = {
+      BOOKINGS_TABLE           = aws_dynamodb_table.bookings.name
+      BIKES_TABLE              = aws_dynamodb_table.bikes.name
+      BOOKING_REFERENCES_TABLE = var.booking_references_table_name
+      BOOKING_ARCHIVE_BUCKET   = aws_s3_bucket.booking_archive.bucket
+      ARCHIVE_AFTER_DAYS       = tostring(var.booking_archive_after_days)
+    }
+  }
+
+  depends_on = [data.archive_file.booking_lifecycle_zip]
+}
+
+# Lambda function for the booking rollups, fed by the bookings table stream
+resource "aws_lambda_function" "rollup_bookings" {
+  filename         = "bike_management/lambda_functions/rollup_bookings.zip"
+  function_name    = "dalscooter-rollup-bookings"
+  role             = aws_iam_role.bike_lambda_role.arn
+  handler          = "rollup_bookings.lambda_handler"
+  runtime          = "python3.9"
+  layers           = [var.shared_layer_arn]
+  timeout          = 60
+
+  environment {
+    variables = {
+      BOOKING_ROLLUPS_TABLE      = aws_dynamodb_table.booking_rollups.name
+      BIKES_TABLE                = aws_dynamodb_table.bikes.name
+      ROLLUP_HOUR_RETENTION_DAYS = tostring(var.booking_rollup_hour_retention_days)
+    }
+  }
+
+  depends_on = [data.archive_file.rollup_bookings_zip]
+}
+
+# Up to 100 booking changes per invocation; a failed record is reported in
+# batchItemFailures and the shard resumes from it
+resource "aws_lambda_event_source_mapping" "bookings_stream_mapping" {
+  event_source_arn                   = aws_dynamodb_table.bookings.stream_arn
+  function_name                      = aws_lambda_function.rollup_bookings.arn
+  starting_position                  = "TRIM_HORIZON"
+  batch_size                         = 100
+  maximum_batching_window_in_seconds = 5
+  maximum_retry_attempts             = 10
+  function_response_types            = ["ReportBatchItemFailures"]
+}
+
+# Lambda function for querying the booking rollups (Franchise functionality)
+resource "aws_lambda_function" "get_booking_rollups" {
+  filename         = "bike_management/lambda_functions/get_booking_rollups.zip"
+  function_name    = "dalscooter-get-booking-rollups"
+  role             = aws_iam_role.bike_lambda_role.arn
+  handler          = "get_booking_rollups.lambda_handler"
+  runtime          = "python3.9"
+  layers           = [var.shared_layer_arn]
+  timeout          = 30
+
+  environment {
+    variables = {
+      BOOKING_ROLLUPS_TABLE = aws_dynamodb_table.booking_rollups.name
+    }
+  }
+
+  depends_on = [data.archive_file.get_booking_rollups_zip]
+}
+
+# Complete finished bookings every 15 minutes, archive old ones nightly
+resource "aws_cloudwatch_event_rule" "booking_sweep" {
+  name                = "dalscooter-booking-sweep"
+  description         = "Completes bookings whose end date has passed"
+  schedule_expression = "rate(15 minutes)"
+}
+
+resource "aws_cloudwatch_event_target" "booking_sweep" {
+  rule  = aws_cloudwatch_event_rule.booking_sweep.name
+  arn   = aws_lambda_function.booking_lifecycle.arn
+  input = jsonencode({ action = "sweep" })
+}
+
+resource "aws_cloudwatch_event_rule" "booking_archive" {
+  name                = "dalscooter-booking-archive"
+  description         = "Moves old completed bookings to the S3 archive"
+  schedule_expression = "cron(30 3 * * ? *)"
+}
+
+resource "aws_cloudwatch_event_target" "booking_archive" {
+  rule  = aws_cloudwatch_event_rule.booking_archive.name
+  arn   = aws_lambda_function.booking_lifecycle.arn
+  input = jsonencode({ action = "archive" })
+}
+
+resource "aws_lambda_permission" "booking_sweep_invoke" {
+  statement_id  = "AllowBookingSweepSchedule"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.booking_lifecycle.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.booking_sweep.arn
+}
+
+resource "aws_lambda_permission" "booking_archive_invoke" {
+  statement_id  = "AllowBookingArchiveSchedule"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.booking_lifecycle.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.booking_archive.arn
+}
+
 # Create ZIP files for Lambda functions
 data "archive_file" "get_bikes_zip" {
   type        = "zip"
-  source_file = "${path.module}/lambda_functions/get_bikes.py"
   output_path = "${path.module}/lambda_functions/get_bikes.zip"
+
+  source {
+    content  = file("${path.module}/lambda_functions/get_bikes.py")
+    filename = "get_bikes.py"
+  }
+
+  source {
+    content  = file("${path.module}/lambda_functions/catalogue_cache.py")
+    filename = "catalogue_cache.py"
+  }
 }
 
 data "archive_file" "book_bike_zip" {
   type        = "zip"
-  source_file = "${path.module}/lambda_functions/book_bike.py"
   output_path = "${path.module}/lambda_functions/book_bike.zip"
+
+  source {
+    content  = file("${path.module}/lambda_functions/book_bike.py")
+    filename = "book_bike.py"
+  }
+
+  source {
+    content  = file("${path.module}/lambda_functions/availability.py")
+    filename = "availability.py"
+  }
 }
 
 data "archive_file" "manage_bikes_zip" {
   type        = "zip"
-  source_file = "${path.module}/lambda_functions/manage_bikes.py"
   output_path = "${path.module}/lambda_functions/manage_bikes.zip"
+
+  source {
+    content  = file("${path.module}/lambda_functions/manage_bikes.py")
+    filename = "manage_bikes.py"
+  }
+
+  source {
+    content  = file("${path.module}/lambda_functions/catalogue_cache.py")
+    filename = "catalogue_cache.py"
+  }
 }
 
 data "archive_file" "check_availability_zip" {
   type        = "zip"
-  source_file = "${path.module}/lambda_functions/check_availability.py"
   output_path = "${path.module}/lambda_functions/check_availability.zip"
+
+  source {
+    content  = file("${path.module}/lambda_functions/check_availability.py")
+    filename = "check_availability.py"
+  }
+
+  source {
+    content  = file("${path.module}/lambda_functions/availability.py")
+    filename = "availability.py"
+  }
+
+  source {
+    content  = file("${path.module}/lambda_functions/catalogue_cache.py")
+    filename = "catalogue_cache.py"
+  }
+}
+
+data "archive_file" "booking_lifecycle_zip" {
+  type        = "zip"
+  output_path = "${path.module}/lambda_functions/booking_lifecycle.zip"
+
+  source {
+    content  = file("${path.module}/lambda_functions/booking_lifecycle.py")
+    filename = "booking_lifecycle.py"
+  }
+
+  source {
+    content  = file("${path.module}/lambda_functions/availability.py")
+    filename = "availability.py"
+  }
+}
+
+data "archive_file" "rollup_bookings_zip" {
+  type        = "zip"
+  output_path = "${path.module}/lambda_functions/rollup_bookings.zip"
+
+  source {
+    content  = file("${path.module}/lambda_functions/rollup_bookings.py")
+    filename = "rollup_bookings.py"
+  }
+
+  source {
+    content  = file("${path.module}/lambda_functions/booking_rollups.py")
+    filename = "booking_rollups.py"
+  }
+}
+
+data "archive_file" "get_booking_rollups_zip" {
+  type        = "zip"
+  output_path = "${path.module}/lambda_functions/get_booking_rollups.zip"
+
+  source {
+    content  = file("${path.module}/lambda_functions/get_booking_rollups.py")
+    filename = "get_booking_rollups.py"
+  }
+
+  source {
+    content  = file("${path.module}/lambda_functions/booking_rollups.py")
+    filename = "booking_rollups.py"
+  }
 }
@@ -10,6 +10,11 @@ output "bikes_table_name" {
   value       = aws_dynamodb_table.bikes.name
 }
 
+output "bikes_table_arn" {
+  description = "ARN of the bikes DynamoDB table"
+  value       = aws_dynamodb_table.bikes.arn
+}
+
 output "bookings_table_name" {
   description = "Name of the bookings DynamoDB table"
   value       = aws_dynamodb_table.bookings.name
@@ -21,6 +26,18 @@ output "api_endpoints" {
     get_bikes         = "https://${aws_api_gateway_rest_api.bike_api.id}.execute-api.${data.aws_region.current.id}.amazonaws.com/${aws_api_gateway_stage.bike_api_stage.stage_name}/bikes"
     check_availability = "https://${aws_api_gateway_rest_api.bike_api.id}.execute-api.${data.aws_region.current.id}.amazonaws.com/${aws_api_gateway_stage.bike_api_stage.stage_name}/bikes/availability"
     manage_bikes      = "https://${aws_api_gateway_rest_api.bike_api.id}.execute-api.${data.aws_region.current.id}.amazonaws.com/${aws_api_gateway_stage.bike_api_stage.stage_name}/bikes"
+    bulk_manage_bikes = "https://${aws_api_gateway_rest_api.bike_api.id}.execute-api.${data.aws_region.current.id}.amazonaws.com/${aws_api_gateway_stage.bike_api_stage.stage_name}/bikes/bulk"
     book_bike         = "https://${aws_api_gateway_rest_api.bike_api.id}.execute-api.${data.aws_region.current.id}.amazonaws.com/${aws_api_gateway_stage.bike_api_stage.stage_name}/bookings"
+    booking_rollups   = "https://${aws_api_gateway_rest_api.bike_api.id}.execute-api.${data.aws_region.current.id}.amazonaws.com/${aws_api_gateway_stage.bike_api_stage.stage_name}/bookings/rollups"
   }
 }
+
+output "booking_archive_bucket" {
+  description = "S3 bucket holding archived bookings"
+  value       = aws_s3_bucket.booking_archive.bucket
+}
+
+output "booking_rollups_table_name" {
+  description = "Name of the booking rollups DynamoDB table"
+  value       = aws_dynamodb_table.booking_rollups.name
+}
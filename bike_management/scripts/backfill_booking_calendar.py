@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Script to add existing active bookings to the per-bike booking calendar
+(BikeCalendarIndex) and to the booking_calendar of their bike item, which
+book_bike checks conflicts against, and to rewrite calendar dates stored with
+a UTC offset in the naive UTC form the index sorts by. Run once after
+deploying; safe to re-run.
+
+Usage: backfill_booking_calendar.py [bookings_table] [bikes_table]
+"""
+
+import os
+import sys
+from datetime import datetime, timezone
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda_functions'))
+from availability import BIKE_CALENDAR_ATTRIBUTE, claim_calendar, to_calendar_timestamp  # noqa: E402
+
+# Initialize DynamoDB client
+dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+
+
+def backfill_booking_calendar(table_name='dalscooter-bookings'):
+    """Tag every active booking missing from the calendar and normalize calendar dates"""
+
+    table = dynamodb.Table(table_name)
+    scan_kwargs = {
+        'FilterExpression': Attr('status').eq('active'),
+        'ProjectionExpression': 'booking_id, bike_id, calendar_bike_id, start_date, end_date'
+    }
+
+    updated = 0
+    skipped = 0
+    live_bookings = {}
+    while True:
+        response = table.scan(**scan_kwargs)
+
+        for booking in response.get('Items', []):
+            try:
+                # Rewrite the dates in canonical (naive UTC) form so the sort key orders correctly
+                start_date = to_calendar_timestamp(booking['start_date'])
+                end_date = to_calendar_timestamp(booking['end_date'])
+                live_bookings.setdefault(booking['bike_id'], []).append((booking['booking_id'], start_date, end_date))
+                if ('calendar_bike_id' in booking and start_date == booking['start_date']
+                        and end_date == booking['end_date']):
+                    continue
+                table.update_item(
+                    Key={'booking_id': booking['booking_id']},
+                    UpdateExpression='SET calendar_bike_id = :bike_id, start_date = :start, end_date = :end',
+                    ExpressionAttributeValues={
+                        ':bike_id': booking['bike_id'],
+                        ':start': start_date,
+                        ':end': end_date
+                    }
+                )
+                updated += 1
+            except Exception as e:
+                skipped += 1
+                print(f"❌ Error adding booking {booking.get('booking_id')} to calendar: {str(e)}")
+
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    print(f"✅ Added or normalized {updated} bookings on the calendar ({skipped} skipped)")
+    return live_bookings
+
+
+def backfill_bike_calendars(live_bookings, table_name='dalscooter-bikes'):
+    """
+    Adds live bookings to the booking_calendar of their bike item. Each bike
+    is rewritten under its booking_seq, as book_bike does, so a booking made
+    while this runs is never dropped.
+    """
+
+    table = dynamodb.Table(table_name)
+    now = datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+    updated = 0
+    skipped = 0
+    for bike_id, bookings in live_bookings.items():
+        bookings = [booking for booking in bookings if booking[2] > now]
+        if not bookings:
+            continue
+        for attempt in range(5):
+            bike = table.get_item(
+                Key={'bike_id': bike_id},
+                ProjectionExpression=f'bike_id, booking_seq, {BIKE_CALENDAR_ATTRIBUTE}',
+                ConsistentRead=True
+            ).get('Item')
+            if bike is None:
+                print(f"⚠️  Bike {bike_id} not found, skipping its {len(bookings)} bookings")
+                skipped += 1
+                break
+
+            calendar = bike.get(BIKE_CALENDAR_ATTRIBUTE) or {}
+            for booking_id, start_date, end_date in bookings:
+                calendar = claim_calendar(dict(bike, **{BIKE_CALENDAR_ATTRIBUTE: calendar}), booking_id,
+                                          start_date, end_date)
+            if 'booking_seq' in bike:
+                condition = 'booking_seq = :seq'
+                values = {':seq': bike['booking_seq'], ':next': bike['booking_seq'] + 1, ':calendar': calendar}
+            else:
+                condition = 'attribute_not_exists(booking_seq)'
+                values = {':next': 1, ':calendar': calendar}
+            try:
+                table.update_item(
+                    Key={'bike_id': bike_id},
+                    UpdateExpression=f'SET booking_seq = :next, {BIKE_CALENDAR_ATTRIBUTE} = :calendar',
+                    ConditionExpression=f'attribute_exists(bike_id) AND {condition}',
+                    ExpressionAttributeValues=values
+                )
+                updated += 1
+                break
+            except table.meta.client.exceptions.ConditionalCheckFailedException:
+                continue
+        else:
+            skipped += 1
+            print(f"❌ Bike {bike_id} kept changing, re-run to add its bookings")
+
+    print(f"✅ Wrote the calendars of {updated} bikes ({skipped} skipped)")
+
+
+def main():
+    table_name = sys.argv[1] if len(sys.argv) > 1 else 'dalscooter-bookings'
+    bikes_table_name = sys.argv[2] if len(sys.argv) > 2 else 'dalscooter-bikes'
+    print(f"🗓️  Backfilling booking calendar for {table_name}...")
+    live_bookings = backfill_booking_calendar(table_name)
+    backfill_bike_calendars(live_bookings, bikes_table_name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Script to rebuild the booking rollups (dalscooter-booking-rollups) from every
+booking in dalscooter-bookings and, with --archive-bucket, the bookings
+booking_lifecycle has moved to the S3 archive. Run once after deploying the
+rollups table to backfill it, after ROLLUP_SHARDS (booking_rollups.py)
+changes, as it re-keys every rollup into its shard, and whenever they need
+reconciling; safe to re-run. Bookings made while it runs may be counted by both the rebuild
+and the stream consumer, so run it when bookings are quiet.
+
+Usage: rebuild_booking_rollups.py [--bookings-table dalscooter-bookings]
+           [--rollups-table dalscooter-booking-rollups]
+           [--bikes-table dalscooter-bikes] [--archive-bucket BUCKET] [--dry-run]
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SCRIPT_DIR, '..', 'lambda_functions'))
+sys.path.insert(0, os.path.join(SCRIPT_DIR, '..', '..', 'shared_layer', 'layer', 'python'))
+import booking_rollups  # noqa: E402
+from rollup_bookings import MARKER_PREFIX  # noqa: E402
+from dalscooter_common import deserialize_item  # noqa: E402
+
+SCAN_SEGMENTS = 4
+BATCH_WRITE_SIZE = 25
+BATCH_WRITE_ATTEMPTS = 8
+BOOKING_PROJECTION = 'booking_id, bike_id, bike_type, franchise_id, #status, start_date, end_date, total_cost'
+
+
+def scan_items(client, table_name, projection, names=None):
+    """Returns every item of a table, scanning segments in parallel"""
+
+    def scan_segment(segment):
+        scan_kwargs = {
+            'TableName': table_name,
+            'Segment': segment,
+            'TotalSegments': SCAN_SEGMENTS,
+            'ProjectionExpression': projection
+        }
+        if names:
+            scan_kwargs['ExpressionAttributeNames'] = names
+        items = []
+        while True:
+            response = client.scan(**scan_kwargs)
+            items.extend(deserialize_item(item) for item in response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                return items
+            scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    with ThreadPoolExecutor(max_workers=SCAN_SEGMENTS) as executor:
+        return [item for items in executor.map(scan_segment, range(SCAN_SEGMENTS)) for item in items]
+
+
+def archived_bookings(bucket, prefix, region):
+    """Every booking in the S3 archive (gzipped JSON Lines), read in parallel"""
+    s3 = boto3.client('s3', region_name=region)
+    keys = []
+    for page in s3.get_paginator('list_objects_v2').paginate(Bucket=bucket, Prefix=f"{prefix}/"):
+        keys.extend(item['Key'] for item in page.get('Contents', []) if item['Key'].endswith('.jsonl.gz'))
+
+    def read_part(key):
+        body = gzip.decompress(s3.get_object(Bucket=bucket, Key=key)['Body'].read()).decode('utf-8')
+        return [json.loads(line) for line in body.splitlines() if line.strip()]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        return [booking for part in executor.map(read_part, keys) for booking in part]
+
+
+def rollup_items(bookings):
+    """Counts bookings into complete rollup items, in low-level format"""
+    missing = [booking['bike_id'] for booking in bookings if not booking.get('franchise_id') and 'bike_id' in booking]
+    franchises = booking_rollups.lookup_franchises(missing) if missing else {}
+    # One set of deltas per shard, each booking in the shard the stream consumer uses
+    shard_deltas = {}
+    for booking in bookings:
+        shard = booking_rollups.rollup_shard(booking.get('booking_id'))
+        deltas = shard_deltas.setdefault(shard, booking_rollups.new_deltas())
+        booking_rollups.add_booking(deltas, booking, franchises.get(booking.get('bike_id')), 1)
+
+    items = {}
+    for shard, deltas in shard_deltas.items():
+        for (dimension, granularity, period, value), counters in deltas.items():
+            series = booking_rollups.series_key(dimension, granularity, shard)
+            period_key = booking_rollups.period_key(period, value)
+            item = {
+                'series': {'S': series},
+                'period': {'S': period_key},
+                dimension: {'S': value},
+                'period_start': {'S': period}
+            }
+            for counter in ('bookings', 'booked_hours', 'revenue'):
+                item[counter] = {'N': str(counters.get(counter, 0))}
+            if granularity == 'hour':
+                item['expires_at'] = {'N': str(booking_rollups.hour_expiry(period))}
+            items[(series, period_key)] = item
+    return items
+
+
+def batch_write(client, table_name, requests, workers=8):
+    """Writes requests in 25-item batches over parallel workers; returns the number that failed"""
+
+    def write_chunk(chunk):
+        try:
+            for attempt in range(BATCH_WRITE_ATTEMPTS):
+                response = client.batch_write_item(RequestItems={table_name: chunk})
+                chunk = response.get('UnprocessedItems', {}).get(table_name, [])
+                if not chunk:
+                    return 0
+                time.sleep(min(0.05 * (2 ** attempt), 2))
+        except Exception as e:
+            print(f"❌ Batch write failed: {str(e)}")
+        return len(chunk)
+
+    chunks = [requests[start:start + BATCH_WRITE_SIZE] for start in range(0, len(requests), BATCH_WRITE_SIZE)]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return sum(executor.map(write_chunk, chunks))
+
+
+def rebuild_booking_rollups(bookings_table, rollups_table, archive_bucket=None, archive_prefix='bookings',
+                            dry_run=False, region='us-east-1'):
+    """Replace the rollups with totals recomputed from the bookings table and archive"""
+
+    client = boto3.client('dynamodb', region_name=region)
+    started = time.monotonic()
+
+    bookings = {
+        booking['booking_id']: booking
+        for booking in scan_items(client, bookings_table, BOOKING_PROJECTION, {'#status': 'status'})
+    }
+    archived = 0
+    if archive_bucket:
+        # A booking archived twice, or archived and still in the table, counts once
+        for booking in archived_bookings(archive_bucket, archive_prefix, region):
+            if booking.get('booking_id') and booking['booking_id'] not in bookings:
+                bookings[booking['booking_id']] = booking
+                archived += 1
+
+    rebuilt = rollup_items(list(bookings.values()))
+    # The stream consumer's applied markers are not rollups and stay
+    existing = {
+        (item['series'], item['period'])
+        for item in scan_items(client, rollups_table, '#series, #period', {'#series': 'series', '#period': 'period'})
+        if not item['series'].startswith(MARKER_PREFIX)
+    }
+    stale = existing - rebuilt.keys()
+
+    print(f"📊 {len(bookings)} bookings ({archived} archived) -> {len(rebuilt)} rollups to write, "
+          f"{len(stale)} stale to delete")
+    if dry_run:
+        return
+
+    requests = [{'PutRequest': {'Item': item}} for item in rebuilt.values()]
+    requests.extend(
+        {'DeleteRequest': {'Key': {'series': {'S': series}, 'period': {'S': period}}}}
+        for series, period in stale
+    )
+    failed = batch_write(client, rollups_table, requests)
+    print(f"✅ Rebuilt booking rollups in {time.monotonic() - started:.2f}s ({failed} failed)")
+    if failed:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild the booking rollups from the bookings table and archive')
+    parser.add_argument('--region', default=os.environ.get('AWS_REGION', 'us-east-1'))
+    parser.add_argument('--bookings-table', default='dalscooter-bookings')
+    parser.add_argument('--rollups-table', default='dalscooter-booking-rollups')
+    parser.add_argument('--bikes-table', default='dalscooter-bikes', help='bikes table, for each bike franchise')
+    parser.add_argument('--archive-bucket', help='booking archive bucket (terraform output booking_archive_bucket)')
+    parser.add_argument('--archive-prefix', default='bookings')
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+
+    booking_rollups.ROLLUPS_TABLE = args.rollups_table
+    booking_rollups.BIKES_TABLE = args.bikes_table
+    print(f"🔁 Rebuilding {args.rollups_table} from {args.bookings_table}...")
+    rebuild_booking_rollups(args.bookings_table, args.rollups_table, args.archive_bucket, args.archive_prefix,
+                            args.dry_run, args.region)
+
+
+if __name__ == "__main__":
+    main()
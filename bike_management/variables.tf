@@ -9,3 +9,26 @@ variable "project_name" {
   type        = string
   default     = "dalscooter"
 }
+
+variable "shared_layer_arn" {
+  description = "ARN of the shared runtime Lambda layer"
+  type        = string
+}
+
+variable "booking_archive_after_days" {
+  description = "Days after their end date that completed bookings move to the S3 archive"
+  type        = number
+  default     = 30
+}
+
+variable "booking_archive_glacier_days" {
+  description = "Days after which archived booking files move to Glacier Instant Retrieval"
+  type        = number
+  default     = 90
+}
+
+variable "booking_rollup_hour_retention_days" {
+  description = "Days hourly booking rollups are kept before they expire (daily rollups are kept)"
+  type        = number
+  default     = 90
+}
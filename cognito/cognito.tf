@@ -10,6 +10,14 @@ variable "get_feedback_lambda" {
   type = string
 }
 
+variable "shared_layer_arn" {
+  type = string
+}
+
+variable "concern_queue_route_arns" {
+  type = list(string)
+}
+
 data "archive_file" "define_auth_lambda" {
   type        = "zip"
   source_file = "./cognito/functions/define_auth_lambda.py"
@@ -123,6 +131,13 @@ data "aws_iam_policy_document" "admin_role_permissions" {
       var.submit_feedback_lambda
     ]
   }
+
+  # Operator concern queue routes (AWS_IAM authorization)
+  statement {
+    effect    = "Allow"
+    actions   = ["execute-api:Invoke"]
+    resources = var.concern_queue_route_arns
+  }
 }
 
 resource "aws_cognito_user_pool" "cognito_user_pool" {
@@ -271,6 +286,7 @@ resource "aws_lambda_function" "define_auth_lambda" {
   filename         = data.archive_file.define_auth_lambda.output_path
   source_code_hash = data.archive_file.define_auth_lambda.output_base64sha256
   runtime          = "python3.11"
+  layers           = [var.shared_layer_arn]
 }
 
 resource "aws_lambda_permission" "create_auth_permission" {
@@ -287,6 +303,7 @@ resource "aws_lambda_function" "create_auth_lambda" {
   filename         = data.archive_file.create_auth_lambda.output_path
   source_code_hash = data.archive_file.create_auth_lambda.output_base64sha256
   runtime          = "python3.11"
+  layers           = [var.shared_layer_arn]
 }
 
 resource "aws_lambda_permission" "verify_auth_permission" {
@@ -303,6 +320,7 @@ resource "aws_lambda_function" "verify_auth_lambda" {
   filename         = data.archive_file.verify_auth_lambda.output_path
   source_code_hash = data.archive_file.verify_auth_lambda.output_base64sha256
   runtime          = "python3.11"
+  layers           = [var.shared_layer_arn]
 }
 
 resource "aws_lambda_permission" "pre_sign_up_permission" {
@@ -319,6 +337,7 @@ resource "aws_lambda_function" "pre_sign_up_lambda" {
   filename         = data.archive_file.pre_sign_up_lambda.output_path
   source_code_hash = data.archive_file.pre_sign_up_lambda.output_base64sha256
   runtime          = "python3.11"
+  layers           = [var.shared_layer_arn]
 }
 
 resource "aws_lambda_permission" "post_confirmation_permission" {
@@ -335,6 +354,7 @@ resource "aws_lambda_function" "post_confirmation_lambda" {
   filename         = data.archive_file.post_confirmation_lambda.output_path
   source_code_hash = data.archive_file.post_confirmation_lambda.output_base64sha256
   runtime          = "python3.11"
+  layers           = [var.shared_layer_arn]
 }
 
 output "cognito_user_pool_id" {
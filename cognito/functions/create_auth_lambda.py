@@ -1,7 +1,10 @@
-import boto3
 import random
+
+from dalscooter_common import get_client
+
+dynamo = get_client('dynamodb')
+
 def lambda_handler(event, context):
-    dynamo = boto3.client('dynamodb')
     username = event['userName']
     OFFSET = ord('A')
 
@@ -1,7 +1,8 @@
-import boto3
+from dalscooter_common import get_client
+
+cognito = get_client("cognito-idp")
 
 def lambda_handler(event, context):
-    cognito = boto3.client("cognito-idp")
     cognito.admin_add_user_to_group(
         UserPoolId=event['userPoolId'],
         Username=event['userName'],
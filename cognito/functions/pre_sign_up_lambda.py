@@ -1,11 +1,12 @@
-import boto3
+from dalscooter_common import get_client
+
+dynamo = get_client('dynamodb')
+
 def lambda_handler(event, context):
     # Uncommented because I was unable to continue testing confirmation code stuff
     event['response']['autoConfirmUser'] = True
     metadata = event['request']['clientMetadata']
 
-    dynamo = boto3.client('dynamodb')
-    
     item = {
         'userId': {
             'S': event['userName']
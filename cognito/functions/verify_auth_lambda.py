@@ -1,11 +1,13 @@
-import boto3
+from dalscooter_common import get_client
+
 def lambda_handler(event, context):
     challenge_type = event['request']['privateChallengeParameters']['challenge_type']
     given_answer = event['request']['challengeAnswer']
     correct = False
 
     if challenge_type == 'PASSWORD':
-        cognito = boto3.client('cognito-idp')
+        # Only password challenges need Cognito; the client is shared once created
+        cognito = get_client('cognito-idp')
         client_id = event['request']['clientMetadata']['CLIENT_ID']
         try:
             cognito.admin_initiate_auth(
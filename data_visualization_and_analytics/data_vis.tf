@@ -1,7 +1,18 @@
 data "archive_file" "submit_feedback_zip" {
   type        = "zip"
   output_path = "${path.module}/functions/submit_feedback.zip"
-  source_file = "${path.module}/functions/submit_feedback.py"
+  source {
+    content  = file("${path.module}/functions/submit_feedback.py")
+    filename = "submit_feedback.py"
+  }
+  source {
+    content  = file("${path.module}/functions/sentiment_engine.py")
+    filename = "sentiment_engine.py"
+  }
+  source {
+    content  = file("${path.module}/functions/sentiment_lexicon.json")
+    filename = "sentiment_lexicon.json"
+  }
 }
 
 data "archive_file" "get_feedback_zip" {
@@ -10,6 +21,32 @@ data "archive_file" "get_feedback_zip" {
   source_file = "${path.module}/functions/get_feedback.py"
 }
 
+data "archive_file" "aggregate_sentiment_zip" {
+  type        = "zip"
+  output_path = "${path.module}/functions/aggregate_sentiment.zip"
+  source {
+    content  = file("${path.module}/functions/aggregate_sentiment.py")
+    filename = "aggregate_sentiment.py"
+  }
+  source {
+    content  = file("${path.module}/functions/sentiment_aggregates.py")
+    filename = "sentiment_aggregates.py"
+  }
+}
+
+data "archive_file" "get_sentiment_summary_zip" {
+  type        = "zip"
+  output_path = "${path.module}/functions/get_sentiment_summary.zip"
+  source {
+    content  = file("${path.module}/functions/get_sentiment_summary.py")
+    filename = "get_sentiment_summary.py"
+  }
+  source {
+    content  = file("${path.module}/functions/sentiment_aggregates.py")
+    filename = "sentiment_aggregates.py"
+  }
+}
+
 data "aws_iam_policy_document" "data_vis_lambda_exec_policy_document" {
   statement {
     effect = "Allow"
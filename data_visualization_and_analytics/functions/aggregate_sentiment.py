@@ -0,0 +1,63 @@
+import hashlib
+
+from dalscooter_common import deserialize_item, get_client
+
+from sentiment_aggregates import add_feedback, lookup_bike_types, new_deltas, update_request
+
+# Keeps BikeSentimentAggregates in step with BikeFeedback through its
+# DynamoDB stream. Each record's counter changes are applied in one
+# transaction whose request token is derived from the stream event id, so a
+# retried record is not counted twice; the first record that fails is
+# reported in batchItemFailures and the batch resumes from it.
+dynamo = get_client('dynamodb')
+
+
+def lambda_handler(event, context):
+    records = event.get('Records', [])
+    images = [record_images(record) for record in records]
+
+    # One lookup for the bikes of the whole batch
+    bike_ids = [image['bike_id'] for pair in images for image in pair if image and 'bike_id' in image]
+    types = lookup_bike_types(bike_ids) if bike_ids else {}
+
+    applied = 0
+    for record, (old_image, new_image) in zip(records, images):
+        deltas = new_deltas()
+        if old_image and 'bike_id' in old_image:
+            add_feedback(deltas, old_image, types[old_image['bike_id']], -1)
+        if new_image and 'bike_id' in new_image:
+            add_feedback(deltas, new_image, types[new_image['bike_id']], 1)
+
+        updates = []
+        for (scope, bucket), counters in deltas.items():
+            counters = {counter: change for counter, change in counters.items() if change}
+            if counters:
+                bike_type = types[scope.split('#', 1)[1]] if scope.startswith('bike#') else None
+                updates.append({'Update': update_request(scope, bucket, counters, bike_type)})
+        if not updates:
+            continue
+
+        try:
+            dynamo.transact_write_items(
+                TransactItems=updates,
+                ClientRequestToken=hashlib.md5(record['eventID'].encode('utf-8')).hexdigest()
+            )
+            applied += 1
+        except Exception as e:
+            print(f'Error aggregating feedback record {record["eventID"]}: {e}')
+            print(f'Aggregated {applied} of {len(records)} records')
+            return {'batchItemFailures': [{'itemIdentifier': record['dynamodb']['SequenceNumber']}]}
+
+    print(f'Aggregated {applied} of {len(records)} records')
+    return {'batchItemFailures': []}
+
+
+def record_images(record):
+    """Returns (old image, new image) of a stream record as native items; either may be None."""
+    change = record.get('dynamodb', {})
+    old_image = change.get('OldImage')
+    new_image = change.get('NewImage')
+    return (
+        deserialize_item(old_image) if old_image else None,
+        deserialize_item(new_image) if new_image else None
+    )
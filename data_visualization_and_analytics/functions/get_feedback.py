@@ -1,21 +1,236 @@
-import boto3
+import base64
 import json
+import os
+import re
+from datetime import datetime
+
+from boto3.dynamodb.conditions import Attr, Key
+
+from dalscooter_common import dumps, get_table, json_response, to_native
+
+table = get_table(os.environ.get('DYNAMODB_TABLE', 'BikeFeedback'))
+
+# GET /feedback
+#   ?bike_id=...          one bike's feedback, newest first, through BikeTimeIndex
+#   &from=...&to=...      ISO timestamps, inclusive
+#   &fields=a,b           only these attributes
+#   &limit=...&cursor=... page size and the next_cursor of the previous page
+#   &format=ndjson        export: one item per line, as many as fit in one
+#                         response; the X-Next-Cursor header continues it
+TIME_INDEX = 'BikeTimeIndex'
+FIELD_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_]{0,63}$')
+
+DEFAULT_PAGE_SIZE = int(os.environ.get('DEFAULT_PAGE_SIZE', '50'))
+MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', '500'))
+# Export responses stay under the 6 MB Lambda payload limit, leaving room
+# for the headers, and stop early when the invocation is running out of time
+EXPORT_MAX_BYTES = int(os.environ.get('EXPORT_MAX_BYTES', '5000000'))
+EXPORT_READ_SIZE = 1000
+EXPORT_TIME_RESERVE_MS = 3000
 
 def lambda_handler(event, context):
-    dynamodb = boto3.resource('dynamodb')
-    table = dynamodb.Table('BikeFeedback')
+    try:
+        query_params = event.get('queryStringParameters', {}) or {}
+        bike_id = query_params.get('bike_id')
+        export = query_params.get('format') == 'ndjson'
+
+        try:
+            page_size = parse_page_size(query_params.get('limit'))
+            start_key = decode_cursor(query_params.get('cursor'), bike_id)
+            fields = parse_fields(query_params.get('fields'))
+            time_range = parse_time_range(query_params.get('from'), query_params.get('to'))
+        except ValueError as e:
+            return json_response(400, {'error': str(e)}, event)
+
+        operation, request_kwargs, key_fields = build_request(bike_id, time_range, fields, export)
+
+        if export:
+            return export_page(context, operation, request_kwargs, key_fields, fields, start_key)
+
+        items, last_key = read_page(operation, request_kwargs, page_size, start_key)
+        return json_response(200, {
+            'feedback': items,
+            'count': len(items),
+            'next_cursor': encode_cursor(last_key)
+        }, event)
+
+    except Exception as e:
+        print(f"Error: {e}")
+        return json_response(500, {'error': str(e)}, event)
+
+
+def build_request(bike_id, time_range, fields, export):
+    """
+    Returns (operation, request kwargs, key attributes) for the listing: a
+    query on BikeTimeIndex when the bike is known, otherwise a filtered scan.
+    Exports always read the key attributes so they can cut a cursor after any
+    item.
+    """
+    start, end = time_range
+    if bike_id:
+        operation = table.query
+        key_fields = ('bike_id', 'feedback_id', 'timestamp')
+        condition = Key('bike_id').eq(bike_id)
+        if start and end:
+            condition = condition & Key('timestamp').between(start, end)
+        elif start:
+            condition = condition & Key('timestamp').gte(start)
+        elif end:
+            condition = condition & Key('timestamp').lte(end)
+        request_kwargs = {
+            'IndexName': TIME_INDEX,
+            'KeyConditionExpression': condition,
+            'ScanIndexForward': False
+        }
+    else:
+        operation = table.scan
+        key_fields = ('bike_id', 'feedback_id')
+        request_kwargs = {}
+        conditions = []
+        if start:
+            conditions.append(Attr('timestamp').gte(start))
+        if end:
+            conditions.append(Attr('timestamp').lte(end))
+        if conditions:
+            request_kwargs['FilterExpression'] = conditions[0] if len(conditions) == 1 else conditions[0] & conditions[1]
+
+    if fields:
+        projected = list(dict.fromkeys(fields + (key_fields if export else ())))
+        # Placeholders for every name, since timestamp is a reserved word
+        request_kwargs['ProjectionExpression'] = ', '.join(f'#f{position}' for position in range(len(projected)))
+        request_kwargs['ExpressionAttributeNames'] = {f'#f{position}': name for position, name in enumerate(projected)}
+
+    return operation, request_kwargs, key_fields
+
+
+def read_page(operation, request_kwargs, page_size, start_key):
+    """
+    Reads up to page_size items starting after start_key. DynamoDB applies
+    Limit before the filter, so filtered reads keep going until the page is
+    full or the table/index is exhausted.
+    Returns (items, last_evaluated_key) where the key is None on the last page.
+    """
+    items = []
+    last_key = start_key
+
+    while True:
+        kwargs = dict(request_kwargs, Limit=page_size - len(items))
+        if last_key:
+            kwargs['ExclusiveStartKey'] = last_key
 
-    # Scan the entire table to get all feedbacks
-    response = table.scan()
+        response = operation(**kwargs)
+        items.extend(to_native(response.get('Items', [])))
+        last_key = response.get('LastEvaluatedKey')
 
-    feedback_items = response.get('Items', [])
+        if not last_key or len(items) >= page_size:
+            return items, last_key
 
-    # Handle pagination if needed
-    while 'LastEvaluatedKey' in response:
-        response = table.scan(ExclusiveStartKey=response['LastEvaluatedKey'])
-        feedback_items.extend(response.get('Items', []))
 
+def export_page(context, operation, request_kwargs, key_fields, fields, start_key):
+    """
+    Writes matching items as NDJSON, one DynamoDB page at a time, until the
+    response size or time budget runs out. Lines are serialized as items
+    arrive, so memory holds one page plus the body. The X-Next-Cursor header
+    is absent on the last chunk.
+    """
+    lines = []
+    size = 0
+    last_key = start_key
+
+    while True:
+        kwargs = dict(request_kwargs, Limit=EXPORT_READ_SIZE)
+        if last_key:
+            kwargs['ExclusiveStartKey'] = last_key
+
+        response = operation(**kwargs)
+        for item in to_native(response.get('Items', [])):
+            line = dumps({key: value for key, value in item.items() if key in fields} if fields else item)
+            line_size = len(line.encode('utf-8')) + 1
+            if size + line_size > EXPORT_MAX_BYTES and lines:
+                # Continue right after the last item that fit
+                return ndjson_response(lines, previous_key)
+            lines.append(line)
+            size += line_size
+            previous_key = {key: item[key] for key in key_fields}
+
+        last_key = response.get('LastEvaluatedKey')
+        out_of_time = context is not None and context.get_remaining_time_in_millis() < EXPORT_TIME_RESERVE_MS
+        if not last_key or out_of_time:
+            return ndjson_response(lines, last_key)
+
+
+def ndjson_response(lines, last_key):
+    headers = {
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Expose-Headers': 'X-Next-Cursor',
+        'Content-Type': 'application/x-ndjson'
+    }
+    cursor = encode_cursor(last_key)
+    if cursor:
+        headers['X-Next-Cursor'] = cursor
     return {
         'statusCode': 200,
-        'body': json.dumps(feedback_items)
+        'headers': headers,
+        'body': ''.join(line + '\n' for line in lines)
     }
+
+
+def parse_fields(value):
+    if not value:
+        return ()
+    fields = tuple(dict.fromkeys(field.strip() for field in value.split(',') if field.strip()))
+    invalid = [field for field in fields if not FIELD_NAME.match(field)]
+    if invalid:
+        raise ValueError(f"invalid field names: {', '.join(invalid)}")
+    return fields
+
+
+def parse_time_range(start, end):
+    for name, value in (('from', start), ('to', end)):
+        if value:
+            try:
+                datetime.fromisoformat(value)
+            except ValueError:
+                raise ValueError(f'{name} must be an ISO 8601 timestamp')
+    if start and end and start > end:
+        raise ValueError('from must not be after to')
+    return start, end
+
+
+def parse_page_size(value):
+    if value is None:
+        return DEFAULT_PAGE_SIZE
+    try:
+        page_size = int(value)
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    if page_size < 1:
+        raise ValueError('limit must be at least 1')
+    return min(page_size, MAX_PAGE_SIZE)
+
+
+def encode_cursor(last_key):
+    """Turns a LastEvaluatedKey into an opaque, URL-safe cursor."""
+    if not last_key:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(last_key, separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor, bike_id=None):
+    """
+    Returns the ExclusiveStartKey in a cursor. The key must fit the listing
+    it resumes: a BikeTimeIndex key (with timestamp) for that bike, or a table
+    key for a scan; anything else would fail in DynamoDB.
+    """
+    if not cursor:
+        return None
+    try:
+        last_key = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception:
+        raise ValueError('cursor is invalid')
+    if not isinstance(last_key, dict) or not {'bike_id', 'feedback_id'} <= last_key.keys():
+        raise ValueError('cursor is invalid')
+    expected = {'bike_id', 'feedback_id', 'timestamp'} if bike_id else {'bike_id', 'feedback_id'}
+    if last_key.keys() != expected or (bike_id and last_key['bike_id'] != bike_id):
+        raise ValueError('cursor does not belong to this listing, list again without a cursor')
+    return last_key
@@ -0,0 +1,38 @@
+from datetime import datetime, timezone
+
+from dalscooter_common import json_response
+
+from sentiment_aggregates import read_summary
+
+# GET /feedback/summary[?bike_id=...]
+# Sentiment counts per bike and per bike type, all time and over the last 7
+# and 30 days, read from the materialized aggregates.
+
+def lambda_handler(event, context):
+    try:
+        query_params = event.get('queryStringParameters', {}) or {}
+        bike_id = query_params.get('bike_id')
+
+        summary = read_summary(bike_id)
+
+        bikes = []
+        bike_types = []
+        for scope, counts in sorted(summary.items()):
+            kind, name = scope.split('#', 1)
+            if kind == 'bike':
+                bikes.append(dict(counts, bike_id=name, bike_type=counts.get('bike_type')))
+            else:
+                bike_types.append(dict(counts, bike_type=name))
+
+        if bike_id and not bikes:
+            return json_response(404, {'error': f'No feedback for bike {bike_id}'}, event)
+
+        return json_response(200, {
+            'bikes': bikes,
+            'bike_types': bike_types,
+            'generated_at': datetime.now(timezone.utc).isoformat()
+        }, event)
+
+    except Exception as e:
+        print(f"Error: {e}")
+        return json_response(500, {'error': str(e)}, event)
@@ -0,0 +1,245 @@
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from dalscooter_common import LRUCache, deserialize_item, get_client
+
+# Materialized sentiment counts for the feedback dashboards.
+#
+# Aggregate table items are keyed by scope ("bike#<bike_id>" or
+# "type#<bike_type>") and bucket ("total" or "day#YYYY-MM-DD"), and hold one
+# counter per sentiment. Day buckets expire through TTL once they fall out of
+# the widest window, so the 7- and 30-day windows are sums over at most 30
+# day items per scope. BucketIndex (bucket, scope) lists every scope of one
+# bucket, which makes the full summary one query per bucket.
+AGGREGATES_TABLE = os.environ.get('SENTIMENT_AGGREGATES_TABLE', 'BikeSentimentAggregates')
+BIKES_TABLE = os.environ.get('BIKES_TABLE')
+BUCKET_INDEX = 'BucketIndex'
+
+SENTIMENTS = ('Positive', 'Neutral', 'Negative')
+WINDOWS = {'last_7_days': 7, 'last_30_days': 30}
+TOTAL_BUCKET = 'total'
+# Day buckets outlive the widest window by a few days, so a late stream
+# record never lands on an already expired item
+DAY_BUCKET_RETENTION_DAYS = max(WINDOWS.values()) + 5
+UNKNOWN_BIKE_TYPE = 'unknown'
+
+# Bike types rarely change; the stream consumer looks each bike up once
+bike_types = LRUCache(max_items=10000, ttl_seconds=3600)
+
+
+def bike_scope(bike_id):
+    return f"bike#{bike_id}"
+
+
+def type_scope(bike_type):
+    return f"type#{bike_type}"
+
+
+def day_bucket(day):
+    return f"day#{day}"
+
+
+def counter_name(sentiment):
+    return sentiment.lower()
+
+
+def feedback_day(item):
+    """Returns the UTC date (YYYY-MM-DD) the feedback was submitted on, or None."""
+    timestamp = item.get('timestamp')
+    return timestamp[:10] if isinstance(timestamp, str) and len(timestamp) >= 10 else None
+
+
+def day_expiry(day):
+    """Epoch seconds at which a day bucket may be dropped (TTL attribute)."""
+    start = datetime.strptime(day, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+    return int((start + timedelta(days=DAY_BUCKET_RETENTION_DAYS)).timestamp())
+
+
+def retained_day(day, now=None):
+    """True when a day bucket for day is still inside the retention period."""
+    try:
+        return day_expiry(day) > (now or time.time())
+    except ValueError:
+        return False
+
+
+def lookup_bike_types(bike_ids):
+    """Returns {bike_id: bike_type}, reading unknown bikes from the bikes table in batches of 100."""
+    found = {}
+    missing = []
+    for bike_id in set(bike_ids):
+        bike_type = bike_types.get(bike_id)
+        if bike_type is None:
+            missing.append(bike_id)
+        else:
+            found[bike_id] = bike_type
+
+    if missing and BIKES_TABLE:
+        client = get_client('dynamodb')
+        for start in range(0, len(missing), 100):
+            keys = [{'bike_id': {'S': bike_id}} for bike_id in missing[start:start + 100]]
+            request = {BIKES_TABLE: {'Keys': keys, 'ProjectionExpression': 'bike_id, bike_type'}}
+            while request:
+                response = client.batch_get_item(RequestItems=request)
+                for item in response.get('Responses', {}).get(BIKES_TABLE, []):
+                    bike = deserialize_item(item)
+                    found[bike['bike_id']] = bike.get('bike_type') or UNKNOWN_BIKE_TYPE
+                request = response.get('UnprocessedKeys') or None
+
+    for bike_id in missing:
+        found.setdefault(bike_id, UNKNOWN_BIKE_TYPE)
+        bike_types.put(bike_id, found[bike_id])
+    return found
+
+
+def feedback_keys(item, bike_type):
+    """Aggregate keys (scope, bucket) a feedback item counts towards."""
+    day = feedback_day(item)
+    keys = []
+    for scope in (bike_scope(item['bike_id']), type_scope(bike_type)):
+        keys.append((scope, TOTAL_BUCKET))
+        if day and retained_day(day):
+            keys.append((scope, day_bucket(day)))
+    return keys
+
+
+def add_feedback(deltas, item, bike_type, sign):
+    """Adds sign (+1/-1) to the counters of every aggregate the feedback belongs to."""
+    sentiment = item.get('sentiment')
+    if sentiment not in SENTIMENTS:
+        return
+    for key in feedback_keys(item, bike_type):
+        deltas[key][counter_name(sentiment)] += sign
+
+
+def new_deltas():
+    """{(scope, bucket): {counter: change}}"""
+    return defaultdict(lambda: defaultdict(int))
+
+
+def update_request(scope, bucket, counters, bike_type=None):
+    """
+    Builds a low-level Update that adds counters to one aggregate item,
+    stamping the expiry on day buckets and the type on bike scopes.
+    """
+    names = {}
+    values = {}
+    additions = []
+    for position, (counter, change) in enumerate(sorted(counters.items())):
+        names[f'#c{position}'] = counter
+        values[f':c{position}'] = {'N': str(change)}
+        additions.append(f'#c{position} :c{position}')
+
+    assignments = []
+    if bucket != TOTAL_BUCKET:
+        assignments.append('expires_at = :expires_at')
+        values[':expires_at'] = {'N': str(day_expiry(bucket.split('#', 1)[1]))}
+    if bike_type is not None:
+        assignments.append('bike_type = :bike_type')
+        values[':bike_type'] = {'S': bike_type}
+
+    expression = 'ADD ' + ', '.join(additions)
+    if assignments:
+        expression = 'SET ' + ', '.join(assignments) + ' ' + expression
+    return {
+        'TableName': AGGREGATES_TABLE,
+        'Key': {'scope': {'S': scope}, 'bucket': {'S': bucket}},
+        'UpdateExpression': expression,
+        'ExpressionAttributeNames': names,
+        'ExpressionAttributeValues': values
+    }
+
+
+def counts(item):
+    return {sentiment: int(item.get(counter_name(sentiment), 0)) for sentiment in SENTIMENTS}
+
+
+def window_days(today=None):
+    """Returns {window: [YYYY-MM-DD, ...]} for the rolling windows ending today (UTC)."""
+    today = today or datetime.now(timezone.utc).date()
+    return {
+        window: [(today - timedelta(days=offset)).isoformat() for offset in range(length)]
+        for window, length in WINDOWS.items()
+    }
+
+
+def query_bucket(client, bucket):
+    """Every aggregate item of one bucket, through BucketIndex."""
+    kwargs = {
+        'TableName': AGGREGATES_TABLE,
+        'IndexName': BUCKET_INDEX,
+        'KeyConditionExpression': '#bucket = :bucket',
+        'ExpressionAttributeNames': {'#bucket': 'bucket'},
+        'ExpressionAttributeValues': {':bucket': {'S': bucket}}
+    }
+
+    items = []
+    while True:
+        response = client.query(**kwargs)
+        items.extend(deserialize_item(item) for item in response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            return items
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def query_scope(client, scope):
+    """Every aggregate item of one scope: its total and retained day buckets."""
+    kwargs = {
+        'TableName': AGGREGATES_TABLE,
+        'KeyConditionExpression': '#scope = :scope',
+        'ExpressionAttributeNames': {'#scope': 'scope'},
+        'ExpressionAttributeValues': {':scope': {'S': scope}}
+    }
+    items = []
+    while True:
+        response = client.query(**kwargs)
+        items.extend(deserialize_item(item) for item in response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            return items
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def summarize(items, today=None):
+    """
+    Folds aggregate items into {scope: {'total': counts, window: counts}};
+    bike scopes also carry their bike_type.
+    """
+    days = window_days(today)
+    window_buckets = {window: {day_bucket(day) for day in window_list} for window, window_list in days.items()}
+
+    summary = {}
+    for item in items:
+        scope = summary.setdefault(item['scope'], dict(
+            {'total': counts({})},
+            **{window: counts({}) for window in WINDOWS}
+        ))
+        if item.get('bike_type'):
+            scope['bike_type'] = item['bike_type']
+        item_counts = counts(item)
+        if item['bucket'] == TOTAL_BUCKET:
+            scope['total'] = item_counts
+            continue
+        for window, buckets in window_buckets.items():
+            if item['bucket'] in buckets:
+                for sentiment, count in item_counts.items():
+                    scope[window][sentiment] += count
+    return summary
+
+
+def read_summary(bike_id=None, today=None):
+    """
+    Returns the summary of every bike and bike type, or of one bike. The full
+    summary costs one BucketIndex query per bucket (total plus 30 days), run
+    in parallel, so it grows with the number of bikes, not with feedback.
+    """
+    client = get_client('dynamodb')
+    if bike_id:
+        return summarize(query_scope(client, bike_scope(bike_id)), today)
+
+    buckets = [TOTAL_BUCKET] + [day_bucket(day) for day in window_days(today)['last_30_days']]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        pages = list(executor.map(lambda bucket: query_bucket(client, bucket), buckets))
+    return summarize([item for page in pages for item in page], today)
@@ -0,0 +1,169 @@
+import json
+import os
+import re
+from itertools import repeat
+
+# Lexicon sentiment scoring for feedback, driven by sentiment_lexicon.json.
+#
+# Text is lowercased and split into word and punctuation tokens, so "badge"
+# is not "bad". Each lexicon word adds its weight; an intensifier right
+# before it ("very good") multiplies the weight, and a negator up to
+# negation_window tokens before it ("not really good") multiplies it by
+# negation_factor unless a clause break (punctuation, "but") comes in
+# between. Scores above threshold are Positive, below -threshold Negative.
+#
+# score() handles one message in pure Python for the submit Lambda;
+# score_batch() applies the same rules to many messages at once with NumPy
+# array operations (NumPy is only needed for batch scoring).
+LEXICON_PATH = os.environ.get(
+    'SENTIMENT_LEXICON_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sentiment_lexicon.json')
+)
+
+TOKEN_PATTERN = r"[a-z0-9]+(?:'[a-z]+)?|[.,!?;]"
+TOKEN = re.compile(TOKEN_PATTERN)
+# Batch mode joins messages with this separator and tokenizes them in one pass
+DOCUMENT_SEPARATOR = '\x1e'
+BATCH_TOKEN = re.compile(TOKEN_PATTERN + '|' + DOCUMENT_SEPARATOR)
+# Scores are rounded before thresholding so both modes label alike
+SCORE_DECIMALS = 6
+
+
+def normalize(text):
+    return (text or '').lower().replace('’', "'")
+
+
+class SentimentEngine:
+    """Lexicon compiled into lookup tables; build once per container."""
+
+    def __init__(self, lexicon):
+        self.version = lexicon.get('version', 1)
+        self.threshold = float(lexicon['threshold'])
+        self.negation_factor = float(lexicon['negation_factor'])
+        self.negation_window = int(lexicon['negation_window'])
+        self.words = {word: float(weight) for word, weight in lexicon['words'].items()}
+        self.intensifiers = {word: float(factor) for word, factor in lexicon['intensifiers'].items()}
+        self.negators = frozenset(lexicon['negators'])
+        self.clause_breaks = frozenset(lexicon['clause_breaks'])
+        self._tables = None
+
+    def label_for(self, score):
+        if score > self.threshold:
+            return 'Positive'
+        if score < -self.threshold:
+            return 'Negative'
+        return 'Neutral'
+
+    def score(self, text):
+        """Returns (label, score) for one message."""
+        total = 0.0
+        last_negator = last_break = -1
+        previous = None
+        for position, token in enumerate(TOKEN.findall(normalize(text))):
+            weight = self.words.get(token)
+            if weight:
+                if previous in self.intensifiers:
+                    weight *= self.intensifiers[previous]
+                if last_negator >= 0 and last_negator >= position - self.negation_window and last_negator > last_break:
+                    weight *= self.negation_factor
+                total += weight
+            if token in self.clause_breaks:
+                last_break = position
+            if token in self.negators:
+                last_negator = position
+            previous = token
+
+        total = round(total, SCORE_DECIMALS)
+        return self.label_for(total), total
+
+    def label(self, text):
+        return self.score(text)[0]
+
+    def _batch_tables(self):
+        """
+        Token ids for the vocabulary, and per-id weight, intensifier factor
+        and flags as arrays. The last id stands for every unknown token.
+        """
+        if self._tables is None:
+            import numpy as np
+
+            vocabulary = sorted(set(self.words) | set(self.intensifiers) | self.negators |
+                                self.clause_breaks | {DOCUMENT_SEPARATOR})
+            self._tables = {
+                'ids': {token: token_id for token_id, token in enumerate(vocabulary)},
+                'weight': np.array([self.words.get(token, 0.0) for token in vocabulary] + [0.0]),
+                'intensity': np.array([self.intensifiers.get(token, 1.0) for token in vocabulary] + [1.0]),
+                'negator': np.array([token in self.negators for token in vocabulary] + [False]),
+                'clause_break': np.array([token in self.clause_breaks or token == DOCUMENT_SEPARATOR
+                                          for token in vocabulary] + [False]),
+                'separator': vocabulary.index(DOCUMENT_SEPARATOR)
+            }
+        return self._tables
+
+    def score_batch(self, texts):
+        """
+        Returns (labels, scores) as NumPy arrays for a sequence of messages,
+        with the same results as score() on each. The messages are tokenized
+        in one regex pass over their concatenation and mapped to ids in one
+        C-level dict pass; everything after that is array arithmetic, with no
+        per-message Python loop.
+        """
+        import numpy as np
+
+        count = len(texts)
+        if count == 0:
+            return np.array([], dtype='<U8'), np.array([], dtype=float)
+
+        joined = DOCUMENT_SEPARATOR.join(texts)
+        if joined.count(DOCUMENT_SEPARATOR) != count - 1:
+            # A message contains the separator itself
+            joined = DOCUMENT_SEPARATOR.join(text.replace(DOCUMENT_SEPARATOR, ' ') for text in texts)
+        tokens = BATCH_TOKEN.findall(normalize(joined))
+        if not tokens:
+            return np.full(count, 'Neutral', dtype='<U8'), np.zeros(count)
+
+        tables = self._batch_tables()
+        ids = tables['ids']
+        index = np.fromiter(map(ids.get, tokens, repeat(len(ids))), dtype=np.int32, count=len(tokens))
+        del tokens
+
+        weight = tables['weight'][index]
+        intensity = tables['intensity'][index]
+        negator = tables['negator'][index]
+        clause_break = tables['clause_break'][index]
+        document = np.cumsum(index == tables['separator'])
+
+        # Intensifier: the token right before (separators are never intensifiers)
+        factor = np.ones_like(weight)
+        factor[1:] = intensity[:-1]
+
+        # Negation: the latest negator strictly before each token, within the
+        # window and with no clause break (or message boundary) since
+        positions = np.arange(index.size)
+        last_negator = np.full(index.size, -1)
+        last_negator[1:] = np.maximum.accumulate(np.where(negator, positions, -1))[:-1]
+        last_break = np.maximum.accumulate(np.where(clause_break, positions, -1))
+        negated = ((last_negator >= 0) & (last_negator >= positions - self.negation_window) &
+                   (last_negator > last_break))
+
+        contribution = weight * factor * np.where(negated, self.negation_factor, 1.0)
+        scores = np.round(np.bincount(document, weights=contribution, minlength=count)[:count], SCORE_DECIMALS)
+        labels = np.where(scores > self.threshold, 'Positive',
+                          np.where(scores < -self.threshold, 'Negative', 'Neutral'))
+        return labels, scores
+
+
+def load_lexicon(path=LEXICON_PATH):
+    with open(path, encoding='utf-8') as lexicon_file:
+        return json.load(lexicon_file)
+
+
+_engine = None
+
+
+def get_engine():
+    """The container-wide engine, compiled on first use."""
+    global _engine
+    if _engine is None:
+        _engine = SentimentEngine(load_lexicon())
+    return _engine
@@ -1,28 +1,28 @@
-import boto3
 import uuid
 import json
+import os
 from datetime import datetime
 
+from dalscooter_common import change_attributes, get_table
+
+from sentiment_engine import get_engine
+
+table = get_table(os.environ.get('DYNAMODB_TABLE', 'BikeFeedback'))
+# Lexicon compiled once per container (sentiment_lexicon.json)
+engine = get_engine()
+
 def lambda_handler(event, context):
     body = json.loads(event['body'])
     bike_id = body['bike_id']
     user_type = body['user_type']
     feedback_text = body['feedback']
 
-    # Simple sentiment analysis
-    positive_words = ['good', 'excellent', 'happy', 'great', 'satisfied', 'nice']
-    negative_words = ['bad', 'poor', 'sad', 'terrible', 'unsatisfied', 'worse']
-
-    feedback_lower = feedback_text.lower()
-    score = sum(word in feedback_lower for word in positive_words) - sum(word in feedback_lower for word in negative_words)
-    sentiment = "Positive" if score > 0 else "Negative" if score < 0 else "Neutral"
+    # Tokenized lexicon scoring with negation and intensifiers
+    sentiment = engine.label(feedback_text)
 
     feedback_id = str(uuid.uuid4())
     timestamp = datetime.now().isoformat()
 
-    dynamodb = boto3.resource('dynamodb')
-    table = dynamodb.Table('BikeFeedback')
-
     table.put_item(
         Item={
             'bike_id': bike_id,
@@ -30,7 +30,9 @@ def lambda_handler(event, context):
             'user_type': user_type,
             'feedback': feedback_text,
             'sentiment': sentiment,
-            'timestamp': timestamp
+            'timestamp': timestamp,
+            # updated_at/change_day for the analytics export's ChangeIndex
+            **change_attributes(feedback_id)
         }
     )
 
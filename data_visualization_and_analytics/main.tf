@@ -5,6 +5,10 @@ resource "aws_dynamodb_table" "feedback_table" {
   hash_key     = "bike_id"
   range_key    = "feedback_id"
 
+  # Feeds the sentiment aggregates (aggregate_sentiment.py)
+  stream_enabled   = true
+  stream_view_type = "NEW_AND_OLD_IMAGES"
+
   attribute {
     name = "bike_id"
     type = "S"
@@ -15,11 +19,81 @@ resource "aws_dynamodb_table" "feedback_table" {
     type = "S"
   }
 
+  attribute {
+    name = "timestamp"
+    type = "S"
+  }
+
+  # One bike's feedback in time order, for GET /feedback?bike_id=...
+  global_secondary_index {
+    name            = "BikeTimeIndex"
+    hash_key        = "bike_id"
+    range_key       = "timestamp"
+    projection_type = "ALL"
+  }
+
+  attribute {
+    name = "change_day"
+    type = "S"
+  }
+
+  attribute {
+    name = "updated_at"
+    type = "S"
+  }
+
+  # Feedback by day and time of last write, for the incremental analytics
+  # export (scripts/export_analytics.py). change_day is "<day>#<shard>" so a
+  # day's writes spread over dalscooter_common.changes.CHANGE_SHARDS partitions
+  global_secondary_index {
+    name            = "ChangeIndex"
+    hash_key        = "change_day"
+    range_key       = "updated_at"
+    projection_type = "ALL"
+  }
+
   tags = {
     Name = "BikeFeedback"
   }
 }
 
+# Sentiment counts per bike and bike type, all time and per day, maintained
+# from the feedback stream. Day buckets expire once they leave the 30-day
+# window.
+resource "aws_dynamodb_table" "sentiment_aggregates" {
+  name         = "BikeSentimentAggregates"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "scope"
+  range_key    = "bucket"
+
+  attribute {
+    name = "scope"
+    type = "S"
+  }
+
+  attribute {
+    name = "bucket"
+    type = "S"
+  }
+
+  # Every scope of one bucket, for the dashboard summary
+  global_secondary_index {
+    name            = "BucketIndex"
+    hash_key        = "bucket"
+    range_key       = "scope"
+    projection_type = "ALL"
+  }
+
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+
+  tags = {
+    Name = "BikeSentimentAggregates"
+  }
+}
+
 # IAM Role for Lambda Functions
 resource "aws_iam_role" "lambda_execution_role" {
   name = "${var.project_name}-lambda-execution-role"
@@ -63,8 +137,25 @@ resource "aws_iam_policy" "lambda_dynamodb_policy" {
         ]
         Resource = [
           aws_dynamodb_table.feedback_table.arn,
-          "${aws_dynamodb_table.feedback_table.arn}/*"
+          "${aws_dynamodb_table.feedback_table.arn}/*",
+          aws_dynamodb_table.sentiment_aggregates.arn,
+          "${aws_dynamodb_table.sentiment_aggregates.arn}/*"
+        ]
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "dynamodb:DescribeStream",
+          "dynamodb:GetRecords",
+          "dynamodb:GetShardIterator",
+          "dynamodb:ListStreams"
         ]
+        Resource = aws_dynamodb_table.feedback_table.stream_arn
+      },
+      {
+        Effect   = "Allow"
+        Action   = ["dynamodb:BatchGetItem"]
+        Resource = var.bikes_table_arn
       }
     ]
   })
@@ -123,6 +214,7 @@ resource "aws_lambda_function" "submit_feedback" {
   role             = aws_iam_role.lambda_execution_role.arn
   handler          = "submit_feedback.lambda_handler"
   runtime          = "python3.9"
+  layers           = [var.shared_layer_arn]
   timeout          = 30
   source_code_hash = data.archive_file.submit_feedback_zip.output_base64sha256
 
@@ -145,6 +237,7 @@ resource "aws_lambda_function" "get_feedback" {
   role             = aws_iam_role.lambda_execution_role.arn
   handler          = "get_feedback.lambda_handler"
   runtime          = "python3.9"
+  layers           = [var.shared_layer_arn]
   timeout          = 30
   source_code_hash = data.archive_file.get_feedback_zip.output_base64sha256
 
@@ -160,6 +253,65 @@ resource "aws_lambda_function" "get_feedback" {
   ]
 }
 
+# Lambda - Sentiment aggregates, fed by the feedback table stream
+resource "aws_lambda_function" "aggregate_sentiment" {
+  filename         = data.archive_file.aggregate_sentiment_zip.output_path
+  function_name    = "${var.project_name}-aggregate-sentiment"
+  role             = aws_iam_role.lambda_execution_role.arn
+  handler          = "aggregate_sentiment.lambda_handler"
+  runtime          = "python3.9"
+  layers           = [var.shared_layer_arn]
+  timeout          = 60
+  source_code_hash = data.archive_file.aggregate_sentiment_zip.output_base64sha256
+
+  environment {
+    variables = {
+      SENTIMENT_AGGREGATES_TABLE = aws_dynamodb_table.sentiment_aggregates.name
+      BIKES_TABLE                = var.bikes_table_name
+    }
+  }
+
+  depends_on = [
+    aws_iam_role_policy_attachment.lambda_logs_attach,
+    aws_iam_role_policy_attachment.lambda_dynamodb_attach
+  ]
+}
+
+# Up to 100 feedback changes per invocation; a failed record is reported in
+# batchItemFailures and the shard resumes from it
+resource "aws_lambda_event_source_mapping" "feedback_stream_mapping" {
+  event_source_arn                   = aws_dynamodb_table.feedback_table.stream_arn
+  function_name                      = aws_lambda_function.aggregate_sentiment.arn
+  starting_position                  = "TRIM_HORIZON"
+  batch_size                         = 100
+  maximum_batching_window_in_seconds = 5
+  maximum_retry_attempts             = 10
+  function_response_types            = ["ReportBatchItemFailures"]
+}
+
+# Lambda - Sentiment summary
+resource "aws_lambda_function" "get_sentiment_summary" {
+  filename         = data.archive_file.get_sentiment_summary_zip.output_path
+  function_name    = "${var.project_name}-get-sentiment-summary"
+  role             = aws_iam_role.lambda_execution_role.arn
+  handler          = "get_sentiment_summary.lambda_handler"
+  runtime          = "python3.9"
+  layers           = [var.shared_layer_arn]
+  timeout          = 30
+  source_code_hash = data.archive_file.get_sentiment_summary_zip.output_base64sha256
+
+  environment {
+    variables = {
+      SENTIMENT_AGGREGATES_TABLE = aws_dynamodb_table.sentiment_aggregates.name
+    }
+  }
+
+  depends_on = [
+    aws_iam_role_policy_attachment.lambda_logs_attach,
+    aws_iam_role_policy_attachment.lambda_dynamodb_attach
+  ]
+}
+
 # API Gateway
 resource "aws_api_gateway_rest_api" "api" {
   name        = "${var.project_name}-DataVis-api"
@@ -206,6 +358,29 @@ resource "aws_api_gateway_integration" "get_integration" {
   uri                     = aws_lambda_function.get_feedback.invoke_arn
 }
 
+# GET /feedback/summary
+resource "aws_api_gateway_resource" "feedback_summary" {
+  rest_api_id = aws_api_gateway_rest_api.api.id
+  parent_id   = aws_api_gateway_resource.feedback.id
+  path_part   = "summary"
+}
+
+resource "aws_api_gateway_method" "summary_get_method" {
+  rest_api_id   = aws_api_gateway_rest_api.api.id
+  resource_id   = aws_api_gateway_resource.feedback_summary.id
+  http_method   = "GET"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "summary_get_integration" {
+  rest_api_id             = aws_api_gateway_rest_api.api.id
+  resource_id             = aws_api_gateway_resource.feedback_summary.id
+  http_method             = aws_api_gateway_method.summary_get_method.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.get_sentiment_summary.invoke_arn
+}
+
 # Lambda Permissions
 resource "aws_lambda_permission" "submit_feedback_api" {
   statement_id  = "AllowSubmitFeedbackInvoke"
@@ -223,11 +398,20 @@ resource "aws_lambda_permission" "get_feedback_api" {
   source_arn    = "${aws_api_gateway_rest_api.api.execution_arn}/*/*"
 }
 
+resource "aws_lambda_permission" "get_sentiment_summary_api" {
+  statement_id  = "AllowGetSentimentSummaryInvoke"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.get_sentiment_summary.function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_api_gateway_rest_api.api.execution_arn}/*/*"
+}
+
 # Deployment
 resource "aws_api_gateway_deployment" "deployment" {
   depends_on = [
     aws_api_gateway_integration.post_integration,
-    aws_api_gateway_integration.get_integration
+    aws_api_gateway_integration.get_integration,
+    aws_api_gateway_integration.summary_get_integration
   ]
   rest_api_id = aws_api_gateway_rest_api.api.id
 
@@ -238,6 +422,9 @@ resource "aws_api_gateway_deployment" "deployment" {
       aws_api_gateway_method.get_method.id,
       aws_api_gateway_integration.post_integration.id,
       aws_api_gateway_integration.get_integration.id,
+      aws_api_gateway_resource.feedback_summary.id,
+      aws_api_gateway_method.summary_get_method.id,
+      aws_api_gateway_integration.summary_get_integration.id,
     ]))
   }
 
@@ -3,6 +3,11 @@ output "api_url" {
   description = "API Gateway endpoint for feedback"
 }
 
+output "sentiment_summary_url" {
+  value       = "${aws_api_gateway_stage.prod.invoke_url}/feedback/summary"
+  description = "API Gateway endpoint for the per-bike sentiment summary"
+}
+
 output "submit_feedback_lambda" {
   value = aws_lambda_function.submit_feedback.arn
 }
@@ -28,3 +33,8 @@ output "dynamodb_table_name" {
   value       = aws_dynamodb_table.feedback_table.name
   description = "Name of the DynamoDB table"
 }
+
+output "sentiment_aggregates_table_name" {
+  value       = aws_dynamodb_table.sentiment_aggregates.name
+  description = "Name of the sentiment aggregates DynamoDB table"
+}
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Script to export feedback (BikeFeedback) and bookings (dalscooter-bookings)
+for the Looker Studio dashboard as date-partitioned CSV or Parquet files.
+Run it on a schedule; each run only exports what changed since the last one.
+
+Every write to the two tables sets updated_at and change_day (see
+dalscooter_common.changes), and each table's ChangeIndex lists rows by
+change_day and updated_at. change_day is write-sharded, so a run queries
+every shard of each day between the table's high-water mark and now (plus
+the bare day, for rows last written before the index was sharded); its cost
+follows the number of changed rows, not the table size. The high-water mark
+is kept per table in <output>/_state/<table>.json and only advances after the
+files are written; a failed run is simply repeated. Rows written in the last SETTLE_SECONDS are
+left for the next run, so writes still in flight are not skipped.
+
+Files land in <output>/<table>/dt=<YYYY-MM-DD>/part-<run>.csv|parquet,
+partitioned by the row's own date (feedback timestamp, booking_date), so a
+changed row lands in the same partition as its earlier versions. Exports are
+upserts: when a key appears more than once, the row with the latest
+updated_at is current. Deleted rows (archived bookings) are not exported as
+deletions. The first run, and any run with --full, exports the whole table
+with a parallel scan; rows written before change tracking existed are only
+picked up that way.
+
+Parquet needs pyarrow (pip install pyarrow). Runs locally against DynamoDB
+Local when AWS_ENDPOINT_URL_DYNAMODB is set.
+
+Usage: export_analytics.py [--output analytics_export | s3://bucket/prefix]
+           [--format csv|parquet] [--tables feedback,bookings] [--full]
+           [--feedback-table BikeFeedback] [--bookings-table dalscooter-bookings]
+
+    AWS_ENDPOINT_URL_DYNAMODB=http://localhost:8000 \\
+        python data_visualization_and_analytics/scripts/export_analytics.py --output /tmp/analytics
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+
+import boto3
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SCRIPT_DIR, '..', '..', 'shared_layer', 'layer', 'python'))
+from dalscooter_common import CHANGE_INDEX, change_partitions, change_timestamp, deserialize_item  # noqa: E402
+
+SCAN_SEGMENTS = 4
+QUERY_WORKERS = 8
+SETTLE_SECONDS = 60
+STATE_PREFIX = '_state'
+
+# Export schemas: the attributes submit_feedback and book_bike write (plus
+# completed_at from booking_lifecycle), as (column, type). access_code and
+# the calendar key are left out on purpose.
+TABLES = {
+    'feedback': {
+        'table': 'BikeFeedback',
+        'date_column': 'timestamp',
+        'columns': [
+            ('bike_id', 'string'),
+            ('feedback_id', 'string'),
+            ('user_type', 'string'),
+            ('feedback', 'string'),
+            ('sentiment', 'string'),
+            ('timestamp', 'timestamp'),
+            ('updated_at', 'timestamp')
+        ]
+    },
+    'bookings': {
+        'table': 'dalscooter-bookings',
+        'date_column': 'booking_date',
+        'columns': [
+            ('booking_id', 'string'),
+            ('booking_reference', 'string'),
+            ('customer_id', 'string'),
+            ('bike_id', 'string'),
+            ('bike_type', 'string'),
+            ('franchise_id', 'string'),
+            ('status', 'string'),
+            ('start_date', 'timestamp'),
+            ('end_date', 'timestamp'),
+            ('booking_date', 'timestamp'),
+            ('duration_hours', 'number'),
+            ('total_cost', 'number'),
+            ('completed_at', 'timestamp'),
+            ('updated_at', 'timestamp')
+        ]
+    }
+}
+
+
+class LocalOutput:
+    """Export files and state under a local directory"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def read(self, path):
+        try:
+            with open(os.path.join(self.root, path), 'rb') as existing:
+                return existing.read()
+        except FileNotFoundError:
+            return None
+
+    def write(self, path, data):
+        target = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Written aside and renamed, so a crash never leaves half a file
+        partial = f"{target}.{uuid.uuid4().hex}.tmp"
+        with open(partial, 'wb') as output:
+            output.write(data)
+        os.replace(partial, target)
+
+
+class S3Output:
+    """Export files and state under an s3://bucket/prefix"""
+
+    def __init__(self, url, region):
+        self.bucket, _, prefix = url[len('s3://'):].partition('/')
+        self.prefix = prefix.strip('/')
+        self.client = boto3.client('s3', region_name=region)
+
+    def key(self, path):
+        return f"{self.prefix}/{path}" if self.prefix else path
+
+    def read(self, path):
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self.key(path))['Body'].read()
+        except self.client.exceptions.NoSuchKey:
+            return None
+
+    def write(self, path, data):
+        self.client.put_object(Bucket=self.bucket, Key=self.key(path), Body=data)
+
+
+def projection(spec):
+    """ProjectionExpression and names for the schema columns (some are reserved words)"""
+    names = {f'#c{position}': column for position, (column, _) in enumerate(spec['columns'])}
+    return ', '.join(names), names
+
+
+def scan_rows(client, spec):
+    """Every row of the table, scanning segments in parallel"""
+    expression, names = projection(spec)
+
+    def scan_segment(segment):
+        scan_kwargs = {
+            'TableName': spec['table'],
+            'Segment': segment,
+            'TotalSegments': SCAN_SEGMENTS,
+            'ProjectionExpression': expression,
+            'ExpressionAttributeNames': names
+        }
+        rows = []
+        while True:
+            response = client.scan(**scan_kwargs)
+            rows.extend(deserialize_item(item) for item in response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                return rows
+            scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    with ThreadPoolExecutor(max_workers=SCAN_SEGMENTS) as executor:
+        return [row for rows in executor.map(scan_segment, range(SCAN_SEGMENTS)) for row in rows]
+
+
+def changed_rows(client, spec, high_water_mark, bound):
+    """
+    Rows with high_water_mark < updated_at <= bound, read from ChangeIndex
+    with one query per change_day shard of each day in the range, in parallel.
+    """
+    expression, names = projection(spec)
+    names['#day'] = 'change_day'
+    names['#updated'] = 'updated_at'
+
+    first = date.fromisoformat(high_water_mark[:10])
+    last = date.fromisoformat(bound[:10])
+    days = [(first + timedelta(days=offset)).isoformat() for offset in range((last - first).days + 1)]
+    # Rows last written before change_day was sharded carry the bare day
+    partitions = [partition for day in days for partition in [day] + change_partitions(day)]
+
+    def query_day(day):
+        query_kwargs = {
+            'TableName': spec['table'],
+            'IndexName': CHANGE_INDEX,
+            'KeyConditionExpression': '#day = :day AND #updated BETWEEN :from AND :to',
+            'ProjectionExpression': expression,
+            'ExpressionAttributeNames': names,
+            'ExpressionAttributeValues': {
+                ':day': {'S': day}, ':from': {'S': high_water_mark}, ':to': {'S': bound}
+            }
+        }
+        rows = []
+        while True:
+            response = client.query(**query_kwargs)
+            rows.extend(deserialize_item(item) for item in response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                return rows
+            query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    with ThreadPoolExecutor(max_workers=QUERY_WORKERS) as executor:
+        rows = [row for rows in executor.map(query_day, partitions) for row in rows]
+    # BETWEEN is inclusive; rows at the mark itself went out last run
+    return [row for row in rows if row['updated_at'] != high_water_mark]
+
+
+def parse_timestamp(value):
+    """ISO timestamp as an aware UTC datetime; naive values were written in UTC by Lambda"""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def encode_csv(rows, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column for column, _ in columns])
+    for row in rows:
+        writer.writerow(['' if row.get(column) is None else str(row[column]) for column, _ in columns])
+    return buffer.getvalue().encode('utf-8')
+
+
+def encode_parquet(rows, columns):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {'string': pa.string(), 'number': pa.float64(), 'timestamp': pa.timestamp('us', tz='UTC')}
+    converters = {
+        'string': lambda value: None if value is None else str(value),
+        'number': lambda value: None if value is None else float(value),
+        'timestamp': parse_timestamp
+    }
+    arrays = [
+        pa.array([converters[kind](row.get(column)) for row in rows], type=types[kind])
+        for column, kind in columns
+    ]
+    buffer = io.BytesIO()
+    pq.write_table(pa.Table.from_arrays(arrays, names=[column for column, _ in columns]), buffer,
+                   compression='snappy')
+    return buffer.getvalue()
+
+
+ENCODERS = {'csv': encode_csv, 'parquet': encode_parquet}
+
+
+def partition_day(row, spec):
+    value = row.get(spec['date_column'])
+    return value[:10] if isinstance(value, str) and len(value) >= 10 else 'unknown'
+
+
+def load_state(output, name):
+    state = output.read(f"{STATE_PREFIX}/{name}.json")
+    return json.loads(state) if state else None
+
+
+def export_table(client, output, name, spec, fmt, full, run_id, bound):
+    """Exports one table's new and changed rows and advances its high-water mark"""
+
+    started = time.monotonic()
+    state = load_state(output, name)
+    if full or not state:
+        mode = 'full'
+        rows = scan_rows(client, spec)
+    else:
+        mode = 'incremental'
+        if state['high_water_mark'] >= bound:
+            print(f"⏭️  {name}: nothing to export since {state['high_water_mark']}")
+            return 0
+        rows = changed_rows(client, spec, state['high_water_mark'], bound)
+
+    partitions = defaultdict(list)
+    for row in rows:
+        partitions[partition_day(row, spec)].append(row)
+
+    files = []
+    for day, partition_rows in sorted(partitions.items()):
+        path = f"{name}/dt={day}/part-{run_id}.{fmt}"
+        output.write(path, ENCODERS[fmt](partition_rows, spec['columns']))
+        files.append(path)
+
+    # Only advanced once every file is written
+    output.write(f"{STATE_PREFIX}/{name}.json", json.dumps({
+        'table': spec['table'],
+        'high_water_mark': bound,
+        'exported_at': change_timestamp(),
+        'mode': mode,
+        'rows': len(rows),
+        'files': files
+    }, indent=2).encode('utf-8'))
+
+    print(f"✅ {name}: {mode} export of {len(rows)} rows into {len(files)} partitions "
+          f"in {time.monotonic() - started:.2f}s (high-water mark {bound})")
+    return len(rows)
+
+
+def export_analytics(output, fmt='csv', tables=('feedback', 'bookings'), full=False, region='us-east-1'):
+    """Export the new and changed rows of each table"""
+
+    client = boto3.client('dynamodb', region_name=region)
+    run_id = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S') + '-' + uuid.uuid4().hex[:8]
+    bound = change_timestamp(datetime.now(timezone.utc) - timedelta(seconds=SETTLE_SECONDS))
+    for name in tables:
+        export_table(client, output, name, TABLES[name], fmt, full, run_id, bound)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export changed feedback and bookings for the analytics dashboard')
+    parser.add_argument('--region', default=os.environ.get('AWS_REGION', 'us-east-1'))
+    parser.add_argument('--output', default='analytics_export', help='local directory or s3://bucket/prefix')
+    parser.add_argument('--format', choices=sorted(ENCODERS), default='csv')
+    parser.add_argument('--tables', default='feedback,bookings', help='comma-separated: feedback, bookings')
+    parser.add_argument('--full', action='store_true', help='export whole tables instead of the changes')
+    parser.add_argument('--feedback-table', default='BikeFeedback')
+    parser.add_argument('--bookings-table', default='dalscooter-bookings')
+    args = parser.parse_args()
+
+    tables = [name.strip() for name in args.tables.split(',') if name.strip()]
+    unknown = set(tables) - TABLES.keys()
+    if unknown:
+        sys.exit(f"❌ Unknown tables: {', '.join(sorted(unknown))}")
+    if args.format == 'parquet':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            sys.exit("❌ Parquet export needs pyarrow; install it with pip install pyarrow")
+
+    TABLES['feedback']['table'] = args.feedback_table
+    TABLES['bookings']['table'] = args.bookings_table
+    output = S3Output(args.output, args.region) if args.output.startswith('s3://') else LocalOutput(args.output)
+
+    print(f"📤 Exporting {', '.join(tables)} to {args.output} as {args.format}...")
+    export_analytics(output, args.format, tables, args.full, args.region)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Script to rebuild the sentiment aggregates (BikeSentimentAggregates) from
+every feedback item in BikeFeedback. Run once after deploying the aggregate
+table to backfill it, and again whenever the counts need reconciling; safe to
+re-run. Feedback submitted while it runs may be counted by both the rebuild
+and the stream consumer, so run it when feedback is quiet.
+
+Usage: rebuild_sentiment_aggregates.py [--feedback-table BikeFeedback]
+           [--aggregates-table BikeSentimentAggregates]
+           [--bikes-table dalscooter-bikes] [--dry-run]
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SCRIPT_DIR, '..', 'functions'))
+sys.path.insert(0, os.path.join(SCRIPT_DIR, '..', '..', 'shared_layer', 'layer', 'python'))
+import sentiment_aggregates  # noqa: E402
+from dalscooter_common import deserialize_item  # noqa: E402
+
+SCAN_SEGMENTS = 4
+BATCH_WRITE_SIZE = 25
+BATCH_WRITE_ATTEMPTS = 8
+
+
+def scan_items(client, table_name, projection, names=None):
+    """Returns every item of a table, scanning segments in parallel"""
+
+    def scan_segment(segment):
+        scan_kwargs = {
+            'TableName': table_name,
+            'Segment': segment,
+            'TotalSegments': SCAN_SEGMENTS,
+            'ProjectionExpression': projection
+        }
+        if names:
+            scan_kwargs['ExpressionAttributeNames'] = names
+        items = []
+        while True:
+            response = client.scan(**scan_kwargs)
+            items.extend(deserialize_item(item) for item in response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                return items
+            scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    with ThreadPoolExecutor(max_workers=SCAN_SEGMENTS) as executor:
+        return [item for items in executor.map(scan_segment, range(SCAN_SEGMENTS)) for item in items]
+
+
+def aggregate_items(feedback):
+    """Counts feedback into complete aggregate items, in low-level format"""
+    bike_types = sentiment_aggregates.lookup_bike_types([item['bike_id'] for item in feedback])
+    deltas = sentiment_aggregates.new_deltas()
+    for item in feedback:
+        sentiment_aggregates.add_feedback(deltas, item, bike_types[item['bike_id']], 1)
+
+    items = {}
+    for (scope, bucket), counters in deltas.items():
+        item = {'scope': {'S': scope}, 'bucket': {'S': bucket}}
+        for sentiment in sentiment_aggregates.SENTIMENTS:
+            counter = sentiment_aggregates.counter_name(sentiment)
+            item[counter] = {'N': str(counters.get(counter, 0))}
+        if bucket != sentiment_aggregates.TOTAL_BUCKET:
+            item['expires_at'] = {'N': str(sentiment_aggregates.day_expiry(bucket.split('#', 1)[1]))}
+        if scope.startswith('bike#'):
+            item['bike_type'] = {'S': bike_types[scope.split('#', 1)[1]]}
+        items[(scope, bucket)] = item
+    return items
+
+
+def batch_write(client, table_name, requests, workers=8):
+    """Writes requests in 25-item batches over parallel workers; returns the number that failed"""
+
+    def write_chunk(chunk):
+        try:
+            for attempt in range(BATCH_WRITE_ATTEMPTS):
+                response = client.batch_write_item(RequestItems={table_name: chunk})
+                chunk = response.get('UnprocessedItems', {}).get(table_name, [])
+                if not chunk:
+                    return 0
+                time.sleep(min(0.05 * (2 ** attempt), 2))
+        except Exception as e:
+            print(f"❌ Batch write failed: {str(e)}")
+        return len(chunk)
+
+    chunks = [requests[start:start + BATCH_WRITE_SIZE] for start in range(0, len(requests), BATCH_WRITE_SIZE)]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return sum(executor.map(write_chunk, chunks))
+
+
+def rebuild_sentiment_aggregates(feedback_table, aggregates_table, dry_run=False, region='us-east-1'):
+    """Replace the aggregates with counts recomputed from the feedback table"""
+
+    client = boto3.client('dynamodb', region_name=region)
+    started = time.monotonic()
+
+    feedback = scan_items(client, feedback_table, 'bike_id, sentiment, #timestamp', {'#timestamp': 'timestamp'})
+    rebuilt = aggregate_items(feedback)
+    existing = {
+        (item['scope'], item['bucket'])
+        for item in scan_items(client, aggregates_table, '#scope, #bucket', {'#scope': 'scope', '#bucket': 'bucket'})
+    }
+    stale = existing - rebuilt.keys()
+
+    print(f"📊 {len(feedback)} feedback items -> {len(rebuilt)} aggregates to write, {len(stale)} stale to delete")
+    if dry_run:
+        return
+
+    requests = [{'PutRequest': {'Item': item}} for item in rebuilt.values()]
+    requests.extend(
+        {'DeleteRequest': {'Key': {'scope': {'S': scope}, 'bucket': {'S': bucket}}}}
+        for scope, bucket in stale
+    )
+    failed = batch_write(client, aggregates_table, requests)
+    print(f"✅ Rebuilt sentiment aggregates in {time.monotonic() - started:.2f}s ({failed} failed)")
+    if failed:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild the sentiment aggregates from BikeFeedback')
+    parser.add_argument('--region', default=os.environ.get('AWS_REGION', 'us-east-1'))
+    parser.add_argument('--feedback-table', default='BikeFeedback')
+    parser.add_argument('--aggregates-table', default='BikeSentimentAggregates')
+    parser.add_argument('--bikes-table', default='dalscooter-bikes', help='bikes table, for each bike type')
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+
+    sentiment_aggregates.AGGREGATES_TABLE = args.aggregates_table
+    sentiment_aggregates.BIKES_TABLE = args.bikes_table
+    print(f"🔁 Rebuilding {args.aggregates_table} from {args.feedback_table}...")
+    rebuild_sentiment_aggregates(args.feedback_table, args.aggregates_table, args.dry_run, args.region)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Script to re-score the sentiment of every feedback item in BikeFeedback with
+the current sentiment_lexicon.json. Run after changing the lexicon or the
+engine; safe to re-run.
+
+The table is read with a parallel scan and scored in chunks with the
+engine's NumPy batch mode. Only items whose sentiment label changed are
+written back, each with a conditional update, so feedback edited in the
+meantime is left alone. The writes flow through the feedback stream, which
+keeps the sentiment aggregates in step, and set a new updated_at, so the
+next analytics export picks them up.
+
+Requires NumPy (pip install numpy).
+
+Usage: rescore_feedback.py [--table BikeFeedback] [--segments 8]
+           [--chunk-size 20000] [--dry-run]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SCRIPT_DIR, '..', 'functions'))
+sys.path.insert(0, os.path.join(SCRIPT_DIR, '..', '..', 'shared_layer', 'layer', 'python'))
+from sentiment_engine import SentimentEngine, load_lexicon, LEXICON_PATH  # noqa: E402
+from dalscooter_common import change_attributes  # noqa: E402
+
+try:
+    import numpy as np
+except ImportError:
+    sys.exit("❌ Re-scoring needs NumPy; install it with pip install numpy")
+
+
+class Rescorer:
+    """Scans, scores and writes back one table; segments run on parallel threads"""
+
+    def __init__(self, client, table_name, engine, chunk_size, writers, dry_run):
+        self.client = client
+        self.table_name = table_name
+        self.engine = engine
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        self.writer = ThreadPoolExecutor(max_workers=writers)
+        self.lock = threading.Lock()
+        self.scanned = 0
+        self.failed = 0
+        self.transitions = Counter()
+
+    def scan_segment(self, segment, total_segments):
+        scan_kwargs = {
+            'TableName': self.table_name,
+            'Segment': segment,
+            'TotalSegments': total_segments,
+            'ProjectionExpression': 'bike_id, feedback_id, feedback, sentiment'
+        }
+        chunk = []
+        while True:
+            response = self.client.scan(**scan_kwargs)
+            chunk.extend(response.get('Items', []))
+            if len(chunk) >= self.chunk_size:
+                self.score_chunk(chunk)
+                chunk = []
+            if 'LastEvaluatedKey' not in response:
+                break
+            scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        if chunk:
+            self.score_chunk(chunk)
+
+    def score_chunk(self, items):
+        """Scores raw items in one batch and writes back the changed labels"""
+        texts = [item.get('feedback', {}).get('S', '') for item in items]
+        current = np.array([item.get('sentiment', {}).get('S', '') for item in items], dtype='<U8')
+        labels, _ = self.engine.score_batch(texts)
+        changed = np.flatnonzero(labels != current)
+
+        transitions = Counter(zip(current[changed].tolist(), labels[changed].tolist()))
+        failed = 0
+        if not self.dry_run and changed.size:
+            updates = [(items[position], current[position], labels[position]) for position in changed.tolist()]
+            failed = sum(self.writer.map(lambda update: self.write(*update), updates))
+
+        with self.lock:
+            self.scanned += len(items)
+            self.failed += failed
+            self.transitions.update(transitions)
+            print(f"🔎 {self.scanned} scored, {sum(self.transitions.values())} changed")
+
+    def write(self, item, old_label, new_label):
+        """Sets the new label unless the item's sentiment changed since the scan; returns 1 on failure"""
+        condition = 'attribute_not_exists(sentiment)' if not old_label else 'sentiment = :old'
+        values = {':new': {'S': str(new_label)}}
+        values.update({f':{name}': {'S': value} for name, value in change_attributes(item['feedback_id']['S']).items()})
+        if old_label:
+            values[':old'] = {'S': str(old_label)}
+        try:
+            self.client.update_item(
+                TableName=self.table_name,
+                Key={'bike_id': item['bike_id'], 'feedback_id': item['feedback_id']},
+                UpdateExpression='SET sentiment = :new, updated_at = :updated_at, change_day = :change_day',
+                ConditionExpression=condition,
+                ExpressionAttributeValues=values
+            )
+            return 0
+        except self.client.exceptions.ConditionalCheckFailedException:
+            return 0
+        except Exception as e:
+            print(f"❌ Error updating {item['bike_id']['S']}/{item['feedback_id']['S']}: {str(e)}")
+            return 1
+
+
+def rescore_feedback(table_name='BikeFeedback', segments=8, chunk_size=20000, writers=16,
+                     dry_run=False, lexicon_path=LEXICON_PATH, region='us-east-1'):
+    """Re-score every feedback item, writing back only changed labels"""
+
+    engine = SentimentEngine(load_lexicon(lexicon_path))
+    rescorer = Rescorer(boto3.client('dynamodb', region_name=region), table_name, engine,
+                        chunk_size, writers, dry_run)
+    started = time.monotonic()
+
+    with ThreadPoolExecutor(max_workers=segments) as executor:
+        list(executor.map(lambda segment: rescorer.scan_segment(segment, segments), range(segments)))
+    rescorer.writer.shutdown()
+
+    for (old_label, new_label), count in rescorer.transitions.most_common():
+        print(f"   {old_label or '(none)'} -> {new_label}: {count}")
+    action = 'would change' if dry_run else 'changed'
+    print(f"✅ Scored {rescorer.scanned} feedback items with lexicon v{engine.version} in "
+          f"{time.monotonic() - started:.2f}s: {action} {sum(rescorer.transitions.values())} "
+          f"({rescorer.failed} failed)")
+    if rescorer.failed:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-score feedback sentiment with the current lexicon')
+    parser.add_argument('--region', default=os.environ.get('AWS_REGION', 'us-east-1'))
+    parser.add_argument('--table', default='BikeFeedback')
+    parser.add_argument('--segments', type=int, default=8, help='parallel scan segments')
+    parser.add_argument('--chunk-size', type=int, default=20000, help='items scored per batch')
+    parser.add_argument('--writers', type=int, default=16, help='parallel write-back workers')
+    parser.add_argument('--lexicon', default=LEXICON_PATH)
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+
+    print(f"🧮 Re-scoring feedback in {args.table}...")
+    rescore_feedback(args.table, args.segments, args.chunk_size, args.writers,
+                     args.dry_run, args.lexicon, args.region)
+
+
+if __name__ == "__main__":
+    main()
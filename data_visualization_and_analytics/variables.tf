@@ -8,3 +8,18 @@ variable "environment" {
   type        = string
   default     = "dev"
 }
+
+variable "shared_layer_arn" {
+  description = "ARN of the shared runtime Lambda layer"
+  type        = string
+}
+
+variable "bikes_table_name" {
+  description = "Name of the bikes DynamoDB table, for each bike's type"
+  type        = string
+}
+
+variable "bikes_table_arn" {
+  description = "ARN of the bikes DynamoDB table"
+  type        = string
+}
@@ -22,6 +22,9 @@ export default function Chatbot() {
   const [isLoading, setIsLoading] = useState(false);
   // More robust session ID generator
   const [sessionId] = useState(`react-session-${Date.now()}-${Math.random().toString(36).substr(2, 9)}`);
+  // Dialog state of the last reply, echoed so the API sends the next message
+  // to Lex while it is still asking for something
+  const [dialogState, setDialogState] = useState('');
 
   const chatContainerRef = useRef<HTMLDivElement>(null);
 
@@ -52,7 +55,7 @@ export default function Chatbot() {
 
     try {
       console.log('Sending request to:', API_GATEWAY_URL);
-      console.log('Payload:', { message: originalMessage, sessionId });
+      console.log('Payload:', { message: originalMessage, sessionId, dialogState });
 
       const response = await fetch(API_GATEWAY_URL, {
         method: 'POST',
@@ -63,7 +66,8 @@ export default function Chatbot() {
         mode: 'cors', // Explicitly set CORS mode
         body: JSON.stringify({
           message: originalMessage,
-          sessionId: sessionId
+          sessionId: sessionId,
+          dialogState: dialogState
         })
       });
 
@@ -78,6 +82,7 @@ export default function Chatbot() {
 
       const data = await response.json();
       console.log('Response data:', data);
+      setDialogState(data.dialogState || '');
       
       const botMessage: ChatMessage = { 
         sender: 'bot', 
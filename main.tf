@@ -11,22 +11,36 @@ provider "aws" {
   region = "us-east-1"
 }
 
+module "shared_layer" {
+  source = "./shared_layer"
+
+  project_name = "dalscooter"
+}
+
 module "cognito" {
   source = "./cognito"
 
   aws_region             = "us-east-1"
   submit_feedback_lambda = module.data_visualization_and_analytics.submit_feedback_lambda
   get_feedback_lambda    = module.data_visualization_and_analytics.get_feedback_lambda
+  shared_layer_arn       = module.shared_layer.layer_arn
+
+  concern_queue_route_arns = module.virtual_assistant.concern_queue_route_arns
 }
 
 module "message_passing" {
   source = "./message_passing"
+
+  shared_layer_arn = module.shared_layer.layer_arn
 }
 
 module "data_visualization_and_analytics" {
   source = "./data_visualization_and_analytics"
 
-  project_name = "dalscooter"
+  project_name     = "dalscooter"
+  shared_layer_arn = module.shared_layer.layer_arn
+  bikes_table_name = module.bike_management.bikes_table_name
+  bikes_table_arn  = module.bike_management.bikes_table_arn
 }
 
 module "notifications" {
@@ -42,6 +56,7 @@ module "virtual_assistant" {
   # Pass message passing module outputs
   feedback_sns_topic_arn = module.message_passing.feedback_sns_topic_arn
   feedback_lambda_arn    = module.message_passing.feedback_lambda_function_arn
+  shared_layer_arn       = module.shared_layer.layer_arn
 }
 
 module "bike_management" {
@@ -52,6 +67,7 @@ module "bike_management" {
   booking_references_table_name     = module.virtual_assistant.booking_references_table_name
   booking_references_table_arn      = module.virtual_assistant.booking_references_table_arn
   notification_processor_lambda_arn = module.notifications.notification_processor_function_arn
+  shared_layer_arn                  = module.shared_layer.layer_arn
 }
 
 module "frontend" {
@@ -1,26 +1,162 @@
-import boto3
+import json
 import os
+import time
+from datetime import datetime, timezone
+
+from dalscooter_common import get_client
+
+# Feedback and concern messages reach this function in batches from the
+# inbox queue (SNS -> SQS -> Lambda). Every record in a batch is logged with
+# BatchWriteItem and forwarded to the operator queue with SendMessageBatch;
+# records that fail are reported back in batchItemFailures so only they are
+# retried.
+#
+# Operator queue consumers were written against the body of the Lambda
+# on_success destination this function used to have, so each forwarded
+# message keeps that shape: {"version", "timestamp", "requestContext",
+# "requestPayload": {"Records": [<SNS record>]}, "responseContext",
+# "responsePayload": null}, one SNS record per message.
+dynamo = get_client('dynamodb')
+sqs = get_client('sqs')
+
+BATCH_WRITE_SIZE = 25
+SEND_BATCH_SIZE = 10
+BATCH_WRITE_ATTEMPTS = 5
+
+# SNS envelope fields in SQS are spelled differently from the SNS event record
+ENVELOPE_FIELDS = {'SigningCertURL': 'SigningCertUrl', 'UnsubscribeURL': 'UnsubscribeUrl'}
+
 
 def lambda_handler(event, context):
     table_name = os.environ["dynamodb_table_name"]
-    
-    dynamo = boto3.client('dynamodb')
+    records = event.get('Records', [])
 
-    msg = event['Records'][0]['Sns']
-    body = msg['Message']
-    ref_code = msg['MessageAttributes']['referenceCode']['Value']
+    # The log keeps the last message per referenceCode, as one put_item per
+    # record would; operators still get every message
+    log_items = {}
+    forwards = []
+    failed_ids = set()
+    for record in records:
+        record_id = record_identifier(record)
+        try:
+            notification = sns_record(record)
+            ref_code = notification['Sns']['MessageAttributes']['referenceCode']['Value']
+            body = notification['Sns']['Message']
+        except (KeyError, TypeError, ValueError) as e:
+            print(f'Unreadable record {record_id}: {e}')
+            failed_ids.add(record_id)
+            continue
 
-    print('Feedback recieved:')
-    print(f'Reference Code: {ref_code}')
-    print(f'Feedback Body: {body}')
+        print(f'Feedback recieved: {ref_code}')
+        log_items[ref_code] = {'messageBody': {'S': body}, 'referenceCode': {'S': ref_code}}
+        forwards.append((record_id, ref_code, destination_record(context, notification)))
 
-    item = {
-        'messageBody': {
-            'S': body
-        },
-        'referenceCode': {
-            'S': ref_code
+    unlogged = set(write_log(table_name, list(log_items.values())))
+    failed_ids.update(record_id for record_id, ref_code, _ in forwards if ref_code in unlogged)
+    forwards = [(record_id, message) for record_id, _, message in forwards if record_id not in failed_ids]
+
+    queue_url = os.environ.get('OPERATOR_QUEUE_URL')
+    if queue_url:
+        failed_ids.update(forward_to_operators(queue_url, forwards))
+
+    print(f'Processed {len(records)} records, {len(failed_ids)} failed')
+
+    # Direct SNS invocations carry one record and cannot report partial
+    # failures; raising lets the asynchronous retry pick the message up again
+    if failed_ids and any(record.get('EventSource') == 'aws:sns' for record in records):
+        raise RuntimeError(f'{len(failed_ids)} feedback records failed')
+    return {'batchItemFailures': [{'itemIdentifier': record_id} for record_id in failed_ids]}
+
+
+def record_identifier(record):
+    return record.get('messageId') or record.get('Sns', {}).get('MessageId')
+
+
+def sns_record(record):
+    """
+    Returns the SNS event record (as SNS would invoke a Lambda with it) for an
+    SQS record carrying an SNS notification (raw or enveloped), or the record
+    itself when it came from SNS directly.
+    """
+    if 'Sns' in record:
+        return record
+
+    attributes = record.get('messageAttributes') or {}
+    if 'referenceCode' in attributes:
+        # Raw message delivery: SNS attributes arrive as SQS attributes
+        message = {
+            'Type': 'Notification',
+            'MessageId': record['messageId'],
+            'Message': record['body'],
+            'MessageAttributes': {
+                name: {'Type': value['dataType'], 'Value': value['stringValue']}
+                for name, value in attributes.items()
+            }
         }
+    else:
+        envelope = json.loads(record['body'])
+        message = {ENVELOPE_FIELDS.get(name, name): value for name, value in envelope.items()}
+        message.setdefault('MessageAttributes', {})
+    return {'EventSource': 'aws:sns', 'EventVersion': '1.0', 'Sns': message}
+
+
+def destination_record(context, notification):
+    """Returns the on_success destination body for one SNS record, as the operator queue expects."""
+    return {
+        'version': '1.0',
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z'),
+        'requestContext': {
+            'requestId': getattr(context, 'aws_request_id', None),
+            'functionArn': getattr(context, 'invoked_function_arn', None),
+            'condition': 'Success',
+            'approximateInvokeCount': 1
+        },
+        'requestPayload': {'Records': [notification]},
+        'responseContext': {'statusCode': 200, 'executedVersion': '$LATEST'},
+        'responsePayload': None
     }
 
-    dynamo.put_item(TableName=table_name, Item=item)
+
+def write_log(table_name, items):
+    """
+    Writes the communication log items in 25-item batches, retrying
+    unprocessed items with exponential backoff. Returns the reference codes
+    that could not be written.
+    """
+    failed = []
+    for start in range(0, len(items), BATCH_WRITE_SIZE):
+        chunk = items[start:start + BATCH_WRITE_SIZE]
+        requests = [{'PutRequest': {'Item': item}} for item in chunk]
+        try:
+            for attempt in range(BATCH_WRITE_ATTEMPTS):
+                response = dynamo.batch_write_item(RequestItems={table_name: requests})
+                requests = response.get('UnprocessedItems', {}).get(table_name, [])
+                if not requests:
+                    break
+                time.sleep(0.05 * (2 ** attempt))
+            failed.extend(request['PutRequest']['Item']['referenceCode']['S'] for request in requests)
+        except Exception as e:
+            print(f'Error writing communication log: {e}')
+            failed.extend(item['referenceCode']['S'] for item in chunk)
+    return failed
+
+
+def forward_to_operators(queue_url, forwards):
+    """
+    Sends (record id, message) pairs to the operator queue, ten per call.
+    Returns the record ids that could not be sent.
+    """
+    failed = []
+    for start in range(0, len(forwards), SEND_BATCH_SIZE):
+        chunk = forwards[start:start + SEND_BATCH_SIZE]
+        entries = [
+            {'Id': str(position), 'MessageBody': json.dumps(message)}
+            for position, (_, message) in enumerate(chunk)
+        ]
+        try:
+            response = sqs.send_message_batch(QueueUrl=queue_url, Entries=entries)
+            failed.extend(chunk[int(entry['Id'])][0] for entry in response.get('Failed', []))
+        except Exception as e:
+            print(f'Error forwarding to operators: {e}')
+            failed.extend(record_id for record_id, _ in chunk)
+    return failed
@@ -1,3 +1,8 @@
+variable "shared_layer_arn" {
+  description = "ARN of the shared runtime Lambda layer"
+  type        = string
+}
+
 
 data "archive_file" "forward_message_lambda" {
   type        = "zip"
@@ -32,7 +37,8 @@ data "aws_iam_policy_document" "feedback_lambda_policies" {
     effect = "Allow"
     actions = [
       "dynamodb:PutItem",
-      "dynamodb:GetItem"
+      "dynamodb:GetItem",
+      "dynamodb:BatchWriteItem"
     ]
     resources = [aws_dynamodb_table.communication_log_table.arn]
   }
@@ -43,6 +49,15 @@ data "aws_iam_policy_document" "feedback_lambda_policies" {
     ]
     resources = [aws_sqs_queue.feedback_sqs.arn]
   }
+  statement {
+    effect = "Allow"
+    actions = [
+      "sqs:ReceiveMessage",
+      "sqs:DeleteMessage",
+      "sqs:GetQueueAttributes"
+    ]
+    resources = [aws_sqs_queue.feedback_inbox_sqs.arn]
+  }
 }
 
 resource "aws_iam_role" "feedback_lambda_role" {
@@ -79,6 +94,48 @@ resource "aws_sqs_queue" "feedback_sqs" {
   name = "FeedbackSQS"
 }
 
+# Inbox between the topic and the Lambda, so bursts are drained in batches
+# and only failed messages are retried (then parked in the DLQ)
+resource "aws_sqs_queue" "feedback_inbox_dlq" {
+  name                      = "FeedbackInboxDLQ"
+  message_retention_seconds = 1209600
+}
+
+resource "aws_sqs_queue" "feedback_inbox_sqs" {
+  name                       = "FeedbackInboxSQS"
+  visibility_timeout_seconds = 180
+
+  redrive_policy = jsonencode({
+    deadLetterTargetArn = aws_sqs_queue.feedback_inbox_dlq.arn
+    maxReceiveCount     = 5
+  })
+}
+
+data "aws_iam_policy_document" "feedback_inbox_policy" {
+  statement {
+    effect = "Allow"
+
+    principals {
+      type        = "Service"
+      identifiers = ["sns.amazonaws.com"]
+    }
+
+    actions   = ["sqs:SendMessage"]
+    resources = [aws_sqs_queue.feedback_inbox_sqs.arn]
+
+    condition {
+      test     = "ArnEquals"
+      variable = "aws:SourceArn"
+      values   = [aws_sns_topic.feedback_sns.arn]
+    }
+  }
+}
+
+resource "aws_sqs_queue_policy" "feedback_inbox_policy" {
+  queue_url = aws_sqs_queue.feedback_inbox_sqs.id
+  policy    = data.aws_iam_policy_document.feedback_inbox_policy.json
+}
+
 resource "aws_lambda_function" "feedback_lambda" {
   function_name    = "FeedbackLambda"
   role             = aws_iam_role.feedback_lambda_role.arn
@@ -86,34 +143,30 @@ resource "aws_lambda_function" "feedback_lambda" {
   filename         = data.archive_file.forward_message_lambda.output_path
   source_code_hash = data.archive_file.forward_message_lambda.output_base64sha256
   runtime          = "python3.11"
+  layers           = [var.shared_layer_arn]
+  timeout          = 30
 
   environment {
     variables = {
       "dynamodb_table_name" = aws_dynamodb_table.communication_log_table.name
+      "OPERATOR_QUEUE_URL"  = aws_sqs_queue.feedback_sqs.url
     }
   }
 }
 
-resource "aws_lambda_permission" "feedback_sns_lambda_permission" {
-  action        = "lambda:InvokeFunction"
-  function_name = aws_lambda_function.feedback_lambda.function_name
-  principal     = "sns.amazonaws.com"
-  source_arn    = aws_sns_topic.feedback_sns.arn
-}
-
-resource "aws_sns_topic_subscription" "feedback_sns_lambda_subscription" {
+resource "aws_sns_topic_subscription" "feedback_sns_inbox_subscription" {
   topic_arn  = aws_sns_topic.feedback_sns.arn
-  protocol   = "lambda"
-  endpoint   = aws_lambda_function.feedback_lambda.arn
-  depends_on = [aws_lambda_permission.feedback_sns_lambda_permission]
+  protocol   = "sqs"
+  endpoint   = aws_sqs_queue.feedback_inbox_sqs.arn
+  depends_on = [aws_sqs_queue_policy.feedback_inbox_policy]
 }
 
-resource "aws_lambda_function_event_invoke_config" "feedback_sqs_lambda_destination" {
-  function_name = aws_lambda_function.feedback_lambda.function_name
-  
-  destination_config {
-    on_success {
-      destination = aws_sqs_queue.feedback_sqs.arn
-    }
-  }
+# Up to 100 messages per invocation; the handler reports failed records in
+# batchItemFailures and forwards the rest to the operator queue itself
+resource "aws_lambda_event_source_mapping" "feedback_inbox_mapping" {
+  event_source_arn                   = aws_sqs_queue.feedback_inbox_sqs.arn
+  function_name                      = aws_lambda_function.feedback_lambda.arn
+  batch_size                         = 100
+  maximum_batching_window_in_seconds = 5
+  function_response_types            = ["ReportBatchItemFailures"]
 }
@@ -0,0 +1,17 @@
+"""
+Shared runtime for the DALScooter Lambda functions, shipped as a Lambda layer.
+"""
+
+from dalscooter_common.aws import get_client, get_resource, get_table
+from dalscooter_common.cache import LRUCache
+from dalscooter_common.changes import CHANGE_INDEX, change_attributes, change_partitions, change_timestamp
+from dalscooter_common.log import get_logger
+from dalscooter_common.references import find_booking_reference, reference_key
+from dalscooter_common.serialization import deserialize_item, dumps, json_response, to_native
+
+__all__ = [
+    'get_client', 'get_resource', 'get_table', 'get_logger', 'LRUCache',
+    'CHANGE_INDEX', 'change_attributes', 'change_partitions', 'change_timestamp',
+    'find_booking_reference', 'reference_key',
+    'deserialize_item', 'dumps', 'json_response', 'to_native'
+]
@@ -0,0 +1,72 @@
+import os
+import threading
+
+import boto3
+from botocore.config import Config
+
+# One botocore config for every client in the container: keep-alive
+# connections, a pool large enough for the handlers' worker threads, adaptive
+# retries, and tight timeouts so a slow endpoint fails fast instead of eating
+# the Lambda timeout. Each value can be tuned per function via environment.
+BOTO_CONFIG = Config(
+    connect_timeout=float(os.environ.get('AWS_CONNECT_TIMEOUT', '1')),
+    read_timeout=float(os.environ.get('AWS_READ_TIMEOUT', '5')),
+    max_pool_connections=int(os.environ.get('AWS_MAX_POOL_CONNECTIONS', '25')),
+    tcp_keepalive=True,
+    retries={
+        'mode': 'adaptive',
+        'max_attempts': int(os.environ.get('AWS_MAX_ATTEMPTS', '4'))
+    }
+)
+
+_clients = {}
+_resources = {}
+_tables = {}
+_lock = threading.Lock()
+
+
+def _config_for(overrides):
+    return BOTO_CONFIG.merge(Config(**overrides)) if overrides else BOTO_CONFIG
+
+
+def get_client(service_name, **config_overrides):
+    """
+    Returns the container-wide client for service_name, creating it on first
+    use. config_overrides (e.g. read_timeout=20) are merged into BOTO_CONFIG
+    and get their own cached client.
+    """
+    key = (service_name, tuple(sorted(config_overrides.items())))
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = boto3.client(service_name, config=_config_for(config_overrides))
+                _clients[key] = client
+    return client
+
+
+def get_resource(service_name, **config_overrides):
+    """
+    Returns the container-wide boto3 resource for service_name, creating it on
+    first use. Resources are not thread safe; worker threads should use
+    resource.meta.client instead.
+    """
+    key = (service_name, tuple(sorted(config_overrides.items())))
+    resource = _resources.get(key)
+    if resource is None:
+        with _lock:
+            resource = _resources.get(key)
+            if resource is None:
+                resource = boto3.resource(service_name, config=_config_for(config_overrides))
+                _resources[key] = resource
+    return resource
+
+
+def get_table(table_name):
+    """Returns a cached DynamoDB Table built on the shared resource."""
+    table = _tables.get(table_name)
+    if table is None:
+        table = get_resource('dynamodb').Table(table_name)
+        _tables[table_name] = table
+    return table
@@ -0,0 +1,40 @@
+import zlib
+from datetime import datetime, timezone
+
+# Rows the analytics export follows carry the time of their last write in
+# updated_at (UTC ISO 8601, so it sorts as a string) and a write-sharded date
+# in change_day ("<YYYY-MM-DD>#<shard>", the shard taken from the row's ID).
+# ChangeIndex (hash change_day, range updated_at) then lists the rows changed
+# since any point in time without scanning the table, one query per shard of
+# each day, while a day's writes spread over CHANGE_SHARDS index partitions
+# instead of throttling one.
+#
+# Writers and the export must agree on CHANGE_SHARDS, so it is a constant
+# rather than a setting. It may grow (the export then queries the new shards
+# as well) but must never shrink, or rows in the dropped shards are missed.
+UPDATED_AT_ATTRIBUTE = 'updated_at'
+CHANGE_DAY_ATTRIBUTE = 'change_day'
+CHANGE_INDEX = 'ChangeIndex'
+CHANGE_SHARDS = 16
+
+
+def change_timestamp(now=None):
+    """Returns the updated_at value for a write made at now (default: the current time)."""
+    now = now or datetime.now(timezone.utc)
+    return now.astimezone(timezone.utc).isoformat(timespec='microseconds')
+
+
+def change_shard(row_id):
+    """Returns the ChangeIndex shard of a row; stable across processes, unlike hash()."""
+    return zlib.crc32(str(row_id).encode('utf-8')) % CHANGE_SHARDS
+
+
+def change_partitions(day):
+    """Returns every change_day value of a day (YYYY-MM-DD), shards in order."""
+    return [f"{day}#{shard}" for shard in range(CHANGE_SHARDS)]
+
+
+def change_attributes(row_id, now=None):
+    """Returns the change-tracking attributes to set on every write of the row with ID row_id."""
+    updated_at = change_timestamp(now)
+    return {UPDATED_AT_ATTRIBUTE: updated_at, CHANGE_DAY_ATTRIBUTE: f"{updated_at[:10]}#{change_shard(row_id)}"}
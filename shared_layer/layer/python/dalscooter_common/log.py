@@ -0,0 +1,116 @@
+import json
+import os
+import random
+import re
+import sys
+
+# Structured JSON logging for the Lambda handlers.
+# - LOG_LEVEL sets the threshold per function (Terraform sets it per environment)
+# - LOG_DEBUG_SAMPLE_RATE turns on DEBUG detail for that share of invocations
+# - Messages use %-style arguments and are only formatted when emitted; a
+#   callable field value is only called when emitted
+# - Access codes are redacted from every message and field
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {DEBUG: 'DEBUG', INFO: 'INFO', WARNING: 'WARNING', ERROR: 'ERROR'}
+LEVELS = {name: level for level, name in LEVEL_NAMES.items()}
+
+LOG_LEVEL = LEVELS.get(os.environ.get('LOG_LEVEL', 'INFO').upper(), INFO)
+LOG_DEBUG_SAMPLE_RATE = float(os.environ.get('LOG_DEBUG_SAMPLE_RATE', '0.01'))
+
+REDACTED = '***'
+# Field names whose values are never logged, compared without case,
+# underscores or dashes. bookingcontext is the chatbot's session attribute
+# (booking_context.py); contexts from before it dropped access codes hold one.
+SECRET_FIELDS = {'accesscode', 'password', 'challengeanswer', 'bookingcontext'}
+ACCESS_CODE_PATTERN = re.compile(r'\bACCESS-[A-Z0-9]+\b', re.IGNORECASE)
+# Codes quoted in chatbot replies, e.g. "Access Code:** 7892"
+LABELLED_CODE_PATTERN = re.compile(r'(access code:\**\s*)([^\s*]+)', re.IGNORECASE)
+
+
+def redact(value):
+    """Returns value with access codes and secret fields masked."""
+    if isinstance(value, str):
+        value = ACCESS_CODE_PATTERN.sub('ACCESS-' + REDACTED, value)
+        return LABELLED_CODE_PATTERN.sub(lambda match: match.group(1) + REDACTED, value)
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if _is_secret(key) else redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    return value
+
+
+def _is_secret(key):
+    return isinstance(key, str) and key.lower().replace('_', '').replace('-', '') in SECRET_FIELDS
+
+
+class StructuredLogger:
+    """
+    Writes one JSON object per record to stdout. Call start_invocation at the
+    top of each handler so records carry the request ID and the debug sample
+    is drawn once per invocation.
+    """
+
+    def __init__(self, name, level=None):
+        self.name = name
+        self.level = LOG_LEVEL if level is None else level
+        self._debug_sampled = False
+        self._context = {}
+
+    def start_invocation(self, context=None, **fields):
+        self._debug_sampled = LOG_DEBUG_SAMPLE_RATE > 0 and random.random() < LOG_DEBUG_SAMPLE_RATE
+        self._context = {'request_id': getattr(context, 'aws_request_id', None)}
+        self._context.update(fields)
+
+    def is_enabled(self, level):
+        return level >= self.level or (level >= DEBUG and self._debug_sampled)
+
+    def debug(self, message, *args, **fields):
+        if self.is_enabled(DEBUG):
+            self._emit(DEBUG, message, args, fields)
+
+    def info(self, message, *args, **fields):
+        if self.is_enabled(INFO):
+            self._emit(INFO, message, args, fields)
+
+    def warning(self, message, *args, **fields):
+        if self.is_enabled(WARNING):
+            self._emit(WARNING, message, args, fields)
+
+    def error(self, message, *args, exc_info=False, **fields):
+        if self.is_enabled(ERROR):
+            if exc_info:
+                import traceback
+                fields['traceback'] = traceback.format_exc()
+            self._emit(ERROR, message, args, fields)
+
+    def _emit(self, level, message, args, fields):
+        if args:
+            try:
+                message = message % args
+            except (TypeError, ValueError):
+                message = f"{message} {args}"
+
+        record = {'level': LEVEL_NAMES[level], 'logger': self.name, 'message': message}
+        record.update(self._context)
+        for key, value in fields.items():
+            record[key] = value() if callable(value) else value
+
+        sys.stdout.write(json.dumps(redact(record), default=str, separators=(',', ':'), ensure_ascii=False) + '\n')
+
+
+_loggers = {}
+
+
+def get_logger(name):
+    """Returns the shared StructuredLogger for name."""
+    logger = _loggers.get(name)
+    if logger is None:
+        logger = _loggers[name] = StructuredLogger(name)
+    return logger
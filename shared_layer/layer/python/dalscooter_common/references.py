@@ -0,0 +1,26 @@
+from boto3.dynamodb.conditions import Key
+
+# Booking references are matched case-insensitively through a normalized copy
+# of the reference held in reference_key and indexed by ReferenceKeyIndex on
+# the booking references table.
+REFERENCE_KEY_ATTRIBUTE = 'reference_key'
+REFERENCE_KEY_INDEX = 'ReferenceKeyIndex'
+
+
+def reference_key(booking_reference):
+    """Returns the canonical lookup form of a booking reference."""
+    return booking_reference.strip().upper()
+
+
+def find_booking_reference(references_table, booking_reference):
+    """
+    Returns the booking reference item matching booking_reference in any
+    case, or None. Costs a single one-item index query.
+    """
+    response = references_table.query(
+        IndexName=REFERENCE_KEY_INDEX,
+        KeyConditionExpression=Key(REFERENCE_KEY_ATTRIBUTE).eq(reference_key(booking_reference)),
+        Limit=1
+    )
+    items = response.get('Items', [])
+    return items[0] if items else None
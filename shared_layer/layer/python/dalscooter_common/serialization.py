@@ -0,0 +1,126 @@
+import base64
+import gzip
+import json
+import os
+from decimal import Decimal
+
+from boto3.dynamodb.types import TypeDeserializer
+
+# Bodies at least this large are gzipped for clients that accept it. 0 turns
+# compression off. Only enable it behind an API that passes base64 bodies
+# through as binary (binary media types), otherwise clients get base64 text.
+RESPONSE_GZIP_MIN_BYTES = int(os.environ.get('RESPONSE_GZIP_MIN_BYTES', '0'))
+RESPONSE_GZIP_LEVEL = int(os.environ.get('RESPONSE_GZIP_LEVEL', '5'))
+
+
+def _native_number(value):
+    """Parses a DynamoDB number string as an int when it has no fraction or exponent."""
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+class NativeDeserializer(TypeDeserializer):
+    """
+    TypeDeserializer that returns ints and floats instead of Decimals, so
+    items read through the low-level client are JSON-ready as they arrive.
+    """
+
+    def _deserialize_n(self, value):
+        return _native_number(value)
+
+    def _deserialize_ns(self, value):
+        return [_native_number(number) for number in value]
+
+    def _deserialize_ss(self, value):
+        return list(value)
+
+    def _deserialize_bs(self, value):
+        return [self._deserialize_b(item) for item in value]
+
+
+_deserializer = NativeDeserializer()
+
+
+def deserialize_item(item):
+    """Converts a low-level client item ({'attr': {'S': ...}}) to native Python values."""
+    return {key: _deserializer.deserialize(value) for key, value in item.items()}
+
+
+def to_native(value):
+    """
+    Converts the Decimals and sets in an item already read through a Table
+    resource to ints, floats and lists. Use deserialize_item instead where the
+    raw client response is available.
+    """
+    if isinstance(value, dict):
+        return {key: to_native(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [to_native(item) for item in value]
+    if isinstance(value, Decimal):
+        return _native_number(str(value))
+    if isinstance(value, (set, frozenset)):
+        return [to_native(item) for item in value]
+    return value
+
+
+def _fallback(o):
+    # Only reached for values that skipped conversion; the common path never
+    # calls back into Python.
+    if isinstance(o, Decimal):
+        return _native_number(str(o))
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+
+_encoder = json.JSONEncoder(
+    separators=(',', ':'),
+    ensure_ascii=False,
+    check_circular=False,
+    default=_fallback
+)
+
+
+def dumps(payload):
+    """Serializes native payloads compactly through the C encoder."""
+    return _encoder.encode(payload)
+
+
+def accepts_gzip(event):
+    headers = (event or {}).get('headers') or {}
+    for key, value in headers.items():
+        if key.lower() == 'accept-encoding':
+            return 'gzip' in (value or '').lower()
+    return False
+
+
+def json_response(status_code, payload, event=None, headers=None):
+    """
+    Builds an API Gateway proxy response with a JSON body. Large bodies are
+    gzipped when RESPONSE_GZIP_MIN_BYTES is set and the caller sends
+    Accept-Encoding: gzip.
+    """
+    response_headers = {'Access-Control-Allow-Origin': '*'}
+    if headers:
+        response_headers.update(headers)
+
+    body = dumps(payload)
+
+    if RESPONSE_GZIP_MIN_BYTES and len(body) >= RESPONSE_GZIP_MIN_BYTES and accepts_gzip(event):
+        compressed = gzip.compress(body.encode('utf-8'), compresslevel=RESPONSE_GZIP_LEVEL)
+        response_headers['Content-Type'] = 'application/json'
+        response_headers['Content-Encoding'] = 'gzip'
+        return {
+            'statusCode': status_code,
+            'headers': response_headers,
+            'body': base64.b64encode(compressed).decode('ascii'),
+            'isBase64Encoded': True
+        }
+
+    return {
+        'statusCode': status_code,
+        'headers': response_headers,
+        'body': body
+    }
@@ -0,0 +1,16 @@
+# Shared Python runtime (dalscooter_common) used by every Lambda function.
+# Lambda adds /opt/python to sys.path, so the zip root must hold python/.
+data "archive_file" "shared_layer_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/layer"
+  output_path = "${path.module}/shared_layer.zip"
+  excludes    = ["**/__pycache__/**"]
+}
+
+resource "aws_lambda_layer_version" "shared_layer" {
+  layer_name          = "${var.project_name}-shared-runtime"
+  description         = "Pooled AWS clients and common helpers for DALScooter Lambda functions"
+  filename            = data.archive_file.shared_layer_zip.output_path
+  source_code_hash    = data.archive_file.shared_layer_zip.output_base64sha256
+  compatible_runtimes = ["python3.9", "python3.11"]
+}
@@ -0,0 +1,4 @@
+output "layer_arn" {
+  description = "ARN of the shared runtime Lambda layer version"
+  value       = aws_lambda_layer_version.shared_layer.arn
+}
@@ -0,0 +1,4 @@
+variable "project_name" {
+  description = "Name of the project"
+  type        = string
+}
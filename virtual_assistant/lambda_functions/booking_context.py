@@ -0,0 +1,94 @@
+import json
+import os
+import time
+
+from dalscooter_common import find_booking_reference, reference_key
+
+from classifier import classify
+
+# Booking details resolved in a conversation are kept in the Lex session
+# attributes, so follow-up turns about the same booking ("when does it
+# end?") are answered without a DynamoDB read. The context is one compact
+# JSON string: the normalized reference, an expiry (epoch seconds) and the
+# reply fields in BOOKING_FIELDS order. The access code is never stored
+# there, since session attributes travel through Lex, the chat client and
+# event logs; replies from the session leave it out, and turns that ask for
+# it ("what was the code again?") read the table. So do turns that may change
+# the booking (cancelling, extending, reporting a problem).
+SESSION_ATTRIBUTE = 'bookingContext'
+BOOKING_CONTEXT_TTL_SECONDS = int(os.environ.get('BOOKING_CONTEXT_TTL_SECONDS', '300'))
+BOOKING_FIELDS = (
+    'booking_reference', 'bike_type', 'bike_number',
+    'start_time', 'end_time', 'rental_duration', 'status'
+)
+
+
+def session_attributes(event):
+    """Returns a copy of the turn's Lex session attributes."""
+    return dict((event.get('sessionState') or {}).get('sessionAttributes') or {})
+
+
+def refresh_requested(event):
+    """
+    True when the turn must read the table: the transcript suggests the
+    booking has changed or asks for the access code (classification_rules.json).
+    """
+    classification = classify(event.get('inputTranscript', ''))
+    return classification['booking_refresh'] is not None or classification['code_request'] is not None
+
+
+def cached_booking(attributes, booking_reference=None):
+    """
+    Returns the cached booking item, or None when absent or expired. With a
+    booking_reference, only a context for that reference counts.
+    """
+    raw = attributes.get(SESSION_ATTRIBUTE)
+    if not raw:
+        return None
+    try:
+        context = json.loads(raw)
+        if context['e'] <= time.time():
+            return None
+        if booking_reference and context['r'] != reference_key(booking_reference):
+            return None
+        # Contexts written with another field list are ignored
+        if len(context['v']) != len(BOOKING_FIELDS):
+            return None
+        return {field: value for field, value in zip(BOOKING_FIELDS, context['v']) if value is not None}
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def remember_booking(attributes, item):
+    """Stores the reply fields of a booking item, without its access code, in the session attributes."""
+    if BOOKING_CONTEXT_TTL_SECONDS <= 0:
+        return
+    attributes[SESSION_ATTRIBUTE] = json.dumps({
+        'r': reference_key(item['booking_reference']),
+        'e': int(time.time()) + BOOKING_CONTEXT_TTL_SECONDS,
+        'v': [item.get(field) for field in BOOKING_FIELDS]
+    }, separators=(',', ':'), ensure_ascii=False, default=str)
+
+
+def forget_booking(attributes):
+    attributes.pop(SESSION_ATTRIBUTE, None)
+
+
+def lookup_booking(table, attributes, booking_reference, refresh=False):
+    """
+    Returns (booking item or None, served from session). Reads the table
+    only when the session holds no live context for this reference or a
+    refresh is forced, and stores what it finds for the next turns. Items
+    served from the session have no access_code.
+    """
+    if not refresh:
+        item = cached_booking(attributes, booking_reference)
+        if item is not None:
+            return item, True
+
+    item = find_booking_reference(table, booking_reference)
+    if item:
+        remember_booking(attributes, item)
+    else:
+        forget_booking(attributes)
+    return item, False
@@ -0,0 +1,114 @@
+# Reply texts shared by the Lex router and the API proxy's fast path, so a
+# message gets the same answer whichever way it is served.
+
+FAQ_RESPONSES = {
+    'register': """To register for DALScooter:
+1. Visit our registration page
+2. Fill in your personal details
+3. Create a username and password
+4. Verify your email address
+5. Complete the multi-factor authentication setup
+Once registered, you'll receive a confirmation notification!""",
+    
+    'bikes': """We offer three types of bikes:
+1. **Gyroscooter** - Perfect for short city rides
+2. **eBikes** - Electric bikes for longer distances
+3. **Segway** - Self-balancing personal transporters
+
+You can check availability and rates for each type on our main page.""",
+    
+    'cost': """Our rental rates vary by bike type:
+- Gyroscooter: Starting from $5/hour
+- eBikes: Starting from $8/hour  
+- Segway: Starting from $10/hour
+
+Registered customers may receive special discounts! Please check our rates page for current pricing.""",
+    
+    'booking': """To make a booking:
+1. Register and log in to your account
+2. Select your preferred bike type
+3. Choose your rental period
+4. Confirm your booking
+5. You'll receive a booking reference code
+6. Use this code to get your bike access code through me!""",
+    
+    'help': """I can help you with:
+- Registration process
+- Available bike types and rates
+- How to make bookings
+- Getting your bike access code (with booking reference)
+- Reporting issues or concerns
+- General navigation around the site
+
+What would you like to know more about?"""
+}
+
+FAQ_DEFAULT_RESPONSE = """I'd be happy to help! I can assist you with:
+
+• How to register and create an account
+• Information about our bike types (Gyroscooter, eBikes, Segway)
+• Rental rates and pricing
+• How to make bookings
+• Getting your bike access code
+• Reporting issues or problems
+• General site navigation
+
+Please ask me about any of these topics, or try rephrasing your question!"""
+
+
+# Stands in for the access code in replies served from the session context
+ACCESS_CODE_ON_REQUEST = 'ask me for your access code'
+
+
+def booking_reply(item, booking_reference, from_session=False):
+    """
+    Returns the reply for a booking reference lookup; item is None when not
+    found. Items from the session context carry no access code, so the reply
+    tells the customer to ask for it.
+    """
+    if item:
+        booking_reference = item.get('booking_reference', booking_reference)
+        bike_type = item.get('bike_type', 'N/A')
+        bike_number = item.get('bike_number', 'N/A')
+        access_code = ACCESS_CODE_ON_REQUEST if from_session else item.get('access_code', 'N/A')
+        start_time = item.get('start_time', 'N/A')
+        end_time = item.get('end_time', 'N/A')
+        rental_duration = item.get('rental_duration', 'N/A')
+        status = item.get('status', 'active')
+        
+        if status.lower() == 'active':
+            message = f"""✅ **Booking Details Found**
+
+🔖 **Booking Reference:** {booking_reference}
+🚲 **Bike Type:** {bike_type}
+🏷️ **Bike Number:** {bike_number}
+🔐 **Access Code:** {access_code}
+⏰ **Rental Period:** {start_time} to {end_time}
+⏱️ **Duration:** {rental_duration}
+
+**Instructions:**
+1. Locate bike #{bike_number}
+2. Enter access code: {access_code}
+3. Enjoy your ride!
+
+Need help finding your bike or have any issues? Just let me know!"""
+        else:
+            message = f"""📋 **Booking Status Update**
+
+🔖 **Booking Reference:** {booking_reference}
+📊 **Status:** {status.title()}
+
+This booking is no longer active. If you need assistance, please contact our support team or make a new booking."""
+    else:
+        message = f"""❌ **Booking Not Found**
+
+I couldn't find any booking with reference: **{booking_reference}**
+
+Please check:
+✓ Your booking reference is correct
+✓ The booking is still active
+✓ You're logged in to the correct account
+
+If you're still having trouble, please contact our support team for assistance."""
+
+    return message
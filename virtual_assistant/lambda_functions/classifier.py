@@ -0,0 +1,118 @@
+import json
+import os
+import re
+
+# Keyword classification for chatbot transcripts, driven by
+# classification_rules.json. Every keyword of every dimension is compiled into
+# one word-bounded alternation, so a transcript is read once whatever the
+# number of rules; each hit adds its weight to the labels it belongs to.
+#
+# Rules format:
+#   {"version": 3,
+#    "dimensions": {
+#      "priority": {"select": "first", "default": "low",
+#                   "labels": {"high": {"accident": 1, ...}, ...}}, ...}}
+# - select "first": the first label (in file order) with any hit wins, for
+#   severity-ordered dimensions
+# - select "score": the label with the highest total weight wins, file order
+#   breaking ties
+# - a keyword ending in '*' matches any word starting with it; spaces inside a
+#   keyword match any run of whitespace
+RULES_PATH = os.environ.get(
+    'CLASSIFICATION_RULES_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'classification_rules.json')
+)
+
+WORD_CHARACTER = 'a-z0-9'
+
+
+class Classifier:
+    """Rules compiled into a single pattern; build once per container."""
+
+    def __init__(self, rules):
+        self.version = rules.get('version', 0)
+        self.dimensions = {}
+        # One entry per pattern group: [(dimension, label, weight)]
+        self._targets = []
+        keyword_groups = {}
+
+        for dimension, config in rules['dimensions'].items():
+            labels = list(config['labels'])
+            self.dimensions[dimension] = {
+                'select': config.get('select', 'score'),
+                'default': config.get('default'),
+                'labels': labels,
+                'rank': {label: position for position, label in enumerate(labels)}
+            }
+            for label, keywords in config['labels'].items():
+                for keyword, weight in keywords.items():
+                    keyword = normalize(keyword).strip()
+                    if keyword not in keyword_groups:
+                        keyword_groups[keyword] = len(self._targets)
+                        self._targets.append([])
+                    self._targets[keyword_groups[keyword]].append((dimension, label, float(weight)))
+
+        # Longer keywords first, so "cannot unlock" wins over "unlock" at the
+        # same position
+        ordered = sorted(keyword_groups, key=len, reverse=True)
+        self._group_targets = [self._targets[keyword_groups[keyword]] for keyword in ordered]
+        alternatives = '|'.join(f'({keyword_pattern(keyword)})' for keyword in ordered)
+        self._pattern = re.compile(
+            f'(?<![{WORD_CHARACTER}])(?:{alternatives})(?![{WORD_CHARACTER}])'
+        ) if ordered else None
+
+    def scores(self, text):
+        """Returns {dimension: {label: total weight}} for the hits in text."""
+        totals = {dimension: {} for dimension in self.dimensions}
+        if self._pattern is None or not text:
+            return totals
+        for match in self._pattern.finditer(normalize(text)):
+            for dimension, label, weight in self._group_targets[match.lastindex - 1]:
+                labels = totals[dimension]
+                labels[label] = labels.get(label, 0.0) + weight
+        return totals
+
+    def classify(self, text):
+        """Returns {dimension: label} for text, using each dimension's default when nothing hits."""
+        result = {}
+        for dimension, labels in self.scores(text).items():
+            config = self.dimensions[dimension]
+            if not labels:
+                result[dimension] = config['default']
+            elif config['select'] == 'first':
+                result[dimension] = min(labels, key=config['rank'].get)
+            else:
+                result[dimension] = max(labels, key=lambda label: (labels[label], -config['rank'][label]))
+        return result
+
+
+def normalize(text):
+    """Lowercases text and straightens typographic apostrophes."""
+    return text.lower().replace('’', "'")
+
+
+def keyword_pattern(keyword):
+    if keyword.endswith('*'):
+        return r'\s+'.join(re.escape(word) for word in keyword[:-1].split()) + f'[{WORD_CHARACTER}]*'
+    return r'\s+'.join(re.escape(word) for word in keyword.split())
+
+
+def load_rules(path=RULES_PATH):
+    with open(path, encoding='utf-8') as rules_file:
+        return json.load(rules_file)
+
+
+_classifier = None
+
+
+def get_classifier():
+    """Returns the container's classifier, compiling the rules file on first use."""
+    global _classifier
+    if _classifier is None:
+        _classifier = Classifier(load_rules())
+    return _classifier
+
+
+def classify(text):
+    """Classifies text with the packaged rules."""
+    return get_classifier().classify(text)
@@ -0,0 +1,195 @@
+import base64
+import heapq
+import json
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from dalscooter_common import deserialize_item, get_client
+
+# Operator queue over the customer concerns table.
+# Every concern carries queue_shard = "<status>#<priority>#<shard>", the hash
+# key of StatusPriorityIndex (sorted by created_at). Spreading each
+# status/priority pair over CONCERN_QUEUE_SHARDS partitions keeps a burst of
+# open tickets off a single hot key; listings query the shards in parallel
+# and merge them oldest first, highest priority first.
+CONCERN_QUEUE_SHARDS = int(os.environ.get('CONCERN_QUEUE_SHARDS', '4'))
+QUEUE_INDEX = 'StatusPriorityIndex'
+QUEUE_KEY = 'queue_shard'
+
+PRIORITIES = ('high', 'medium', 'low')
+STATUSES = ('open', 'in_progress', 'pending_response', 'resolved')
+# Status -> statuses it may move to
+TRANSITIONS = {
+    'open': {'in_progress', 'pending_response', 'resolved'},
+    'in_progress': {'open', 'pending_response', 'resolved'},
+    'pending_response': {'open', 'in_progress', 'resolved'},
+    'resolved': {'open'}
+}
+
+LIST_ATTRIBUTES = 'concern_id, booking_reference, issue_description, #status, priority, category, created_at, updated_at, operator_response'
+
+
+class TransitionError(Exception):
+    """A status change that is not allowed from the concern's current status."""
+
+
+def concern_shard(concern_id):
+    """Stable shard for a concern, so status changes keep it in place."""
+    return zlib.crc32(concern_id.encode('utf-8')) % CONCERN_QUEUE_SHARDS
+
+
+def queue_key(status, priority, shard):
+    return f"{status}#{priority}#{shard}"
+
+
+def queue_attributes(concern_id, status, priority):
+    """Attributes to store on a concern so it is listed in the operator queue."""
+    return {QUEUE_KEY: queue_key(status, priority, concern_shard(concern_id))}
+
+
+def encode_cursor(state):
+    return base64.urlsafe_b64encode(json.dumps(state, separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor, status):
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError('Invalid cursor') from e
+    if not isinstance(state, dict) or state.keys() != {'status', 'priority', 'after', 'done'}:
+        raise ValueError('Invalid cursor')
+    if state['status'] != status:
+        raise ValueError('Cursor belongs to another listing')
+
+    shards = range(CONCERN_QUEUE_SHARDS)
+    priority, after, done = state['priority'], state['after'], state['done']
+    if type(priority) is not int or priority not in range(len(PRIORITIES)):
+        raise ValueError('Invalid cursor')
+    if not isinstance(done, list) or any(type(shard) is not int or shard not in shards for shard in done):
+        raise ValueError('Invalid cursor')
+    if not isinstance(after, dict) or any(shard not in {str(n) for n in shards} for shard in after):
+        raise ValueError('Invalid cursor')
+    for key in after.values():
+        if (not isinstance(key, dict) or key.keys() != {'concern_id', 'created_at'}
+                or not all(isinstance(value, str) for value in key.values())):
+            raise ValueError('Invalid cursor')
+    return state
+
+
+def list_concerns(table_name, status='open', limit=25, cursor=None):
+    """
+    Returns (concerns, next cursor) for one page of the operator queue: high
+    priority first, oldest first within a priority. Each page costs one query
+    per unfinished shard of the priorities it covers, whatever the queue
+    depth. The cursor is None after the last page.
+    """
+    if status not in STATUSES:
+        raise ValueError(f"Unknown status: {status}")
+
+    state = decode_cursor(cursor, status) if cursor else {'status': status, 'priority': 0, 'after': {}, 'done': []}
+    client = get_client('dynamodb')
+    concerns = []
+
+    while len(concerns) < limit and state['priority'] < len(PRIORITIES):
+        priority = PRIORITIES[state['priority']]
+        wanted = limit - len(concerns)
+        shards = [shard for shard in range(CONCERN_QUEUE_SHARDS) if shard not in state['done']]
+
+        def query_shard(shard):
+            kwargs = {
+                'TableName': table_name,
+                'IndexName': QUEUE_INDEX,
+                'KeyConditionExpression': f'{QUEUE_KEY} = :key',
+                'ProjectionExpression': LIST_ATTRIBUTES,
+                'ExpressionAttributeNames': {'#status': 'status'},
+                'ExpressionAttributeValues': {':key': {'S': queue_key(status, priority, shard)}},
+                'Limit': wanted
+            }
+            after = state['after'].get(str(shard))
+            if after:
+                kwargs['ExclusiveStartKey'] = {
+                    'concern_id': {'S': after['concern_id']},
+                    'created_at': {'S': after['created_at']},
+                    QUEUE_KEY: {'S': queue_key(status, priority, shard)}
+                }
+            response = client.query(**kwargs)
+            items = [deserialize_item(item) for item in response.get('Items', [])]
+            return shard, items, 'LastEvaluatedKey' in response
+
+        with ThreadPoolExecutor(max_workers=max(len(shards), 1)) as executor:
+            results = list(executor.map(query_shard, shards))
+
+        # Each shard returned its oldest `wanted` items, so the oldest
+        # `wanted` of the merge are the next page
+        merged = heapq.merge(*[
+            [(item.get('created_at', ''), item['concern_id'], shard, item) for item in items]
+            for shard, items, _ in results
+        ])
+        taken = {}
+        for created_at, concern_id, shard, item in merged:
+            if len(concerns) == limit:
+                break
+            concerns.append(item)
+            taken[shard] = taken.get(shard, 0) + 1
+            state['after'][str(shard)] = {'created_at': created_at, 'concern_id': concern_id}
+
+        for shard, items, has_more in results:
+            if taken.get(shard, 0) == len(items) and not has_more:
+                state['done'].append(shard)
+
+        if len(state['done']) == CONCERN_QUEUE_SHARDS:
+            state = {'status': status, 'priority': state['priority'] + 1, 'after': {}, 'done': []}
+
+    next_cursor = encode_cursor(state) if state['priority'] < len(PRIORITIES) else None
+    return concerns, next_cursor
+
+
+def transition_concern(table, concern_id, new_status, operator_response=None):
+    """
+    Moves a concern to new_status with one keyed read and one conditional
+    write, keeping its queue shard in step. Returns the updated concern, or
+    None when it does not exist. Raises TransitionError for a move that is
+    not allowed and ConditionalCheckFailedException when another operator
+    changed the concern in between.
+    """
+    if new_status not in STATUSES:
+        raise TransitionError(f"Unknown status: {new_status}")
+
+    current = table.get_item(
+        Key={'concern_id': concern_id},
+        ProjectionExpression='#status, priority',
+        ExpressionAttributeNames={'#status': 'status'},
+        ConsistentRead=True
+    ).get('Item')
+    if current is None:
+        return None
+
+    status = current.get('status', 'open')
+    if new_status != status and new_status not in TRANSITIONS.get(status, ()):
+        raise TransitionError(f"Cannot move a {status} concern to {new_status}")
+
+    now = datetime.utcnow().isoformat()
+    update = 'SET #status = :status, updated_at = :now, ' + f'{QUEUE_KEY} = :key'
+    values = {
+        ':status': new_status,
+        ':current': status,
+        ':now': now,
+        ':key': queue_key(new_status, current.get('priority', 'low'), concern_shard(concern_id))
+    }
+    if operator_response:
+        update += ', operator_response = :response'
+        values[':response'] = operator_response
+    if new_status == 'resolved':
+        update += ', resolved_at = :now'
+
+    response = table.update_item(
+        Key={'concern_id': concern_id},
+        UpdateExpression=update,
+        ConditionExpression='#status = :current',
+        ExpressionAttributeNames={'#status': 'status'},
+        ExpressionAttributeValues=values,
+        ReturnValues='ALL_NEW'
+    )
+    return response['Attributes']
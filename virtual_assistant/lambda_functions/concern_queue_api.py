@@ -0,0 +1,79 @@
+import json
+import os
+
+from dalscooter_common import get_logger, get_table, json_response, to_native
+
+from concern_queue import TransitionError, list_concerns, transition_concern
+
+# Operator API for the concern queue:
+#   GET  /concerns?status=open&limit=25&cursor=...   one page, highest priority
+#                                                    and oldest first
+#   POST /concerns/{concern_id}/status               {"status": ..., "operatorResponse": ...}
+logger = get_logger('concern_queue_api')
+
+table_name = os.environ['CUSTOMER_CONCERNS_TABLE']
+table = get_table(table_name)
+
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+
+def handler(event, context):
+    logger.start_invocation(context)
+    logger.debug("Received event", event=event)
+
+    try:
+        method = event.get('httpMethod', 'GET')
+        if method == 'OPTIONS':
+            return json_response(200, {}, event, headers={
+                'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Amz-Security-Token',
+                'Access-Control-Allow-Methods': 'OPTIONS,GET,POST'
+            })
+
+        concern_id = (event.get('pathParameters') or {}).get('concern_id')
+        if method == 'GET' and not concern_id:
+            return list_page(event)
+        if method == 'POST' and concern_id:
+            return change_status(event, concern_id)
+        return json_response(405, {'error': 'Method not allowed'}, event)
+
+    except Exception as e:
+        logger.error("Error handling concern queue request: %s", e, exc_info=True)
+        return json_response(500, {'error': 'Internal server error'}, event)
+
+
+def list_page(event):
+    params = event.get('queryStringParameters') or {}
+    status = params.get('status', 'open')
+    try:
+        limit = min(max(int(params.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+        concerns, next_cursor = list_concerns(table_name, status, limit, params.get('cursor'))
+    except ValueError as e:
+        return json_response(400, {'error': str(e)}, event)
+
+    logger.info("Listed concerns", status=status, count=len(concerns), more=next_cursor is not None)
+    return json_response(200, {'concerns': concerns, 'nextCursor': next_cursor}, event)
+
+
+def change_status(event, concern_id):
+    try:
+        body = json.loads(event.get('body') or '{}')
+    except ValueError:
+        return json_response(400, {'error': 'Body must be JSON'}, event)
+
+    new_status = body.get('status')
+    if not new_status:
+        return json_response(400, {'error': 'status is required'}, event)
+
+    try:
+        concern = transition_concern(table, concern_id, new_status, body.get('operatorResponse'))
+    except TransitionError as e:
+        return json_response(400, {'error': str(e)}, event)
+    except table.meta.client.exceptions.ConditionalCheckFailedException:
+        return json_response(409, {'error': 'Concern was changed by someone else; reload and retry'}, event)
+
+    if concern is None:
+        return json_response(404, {'error': f'Concern {concern_id} not found'}, event)
+
+    logger.info("Concern status changed", concern_id=concern_id, status=new_status)
+    return json_response(200, to_native(concern), event)
@@ -0,0 +1,38 @@
+import os
+import re
+
+from chat_replies import FAQ_RESPONSES
+from classifier import classify
+
+# Local intent matching for the chat API proxy. Messages that are clearly a
+# static FAQ question or a single booking reference lookup are answered
+# without the Lex round trip; anything else returns None and goes to Lex.
+FAST_PATH_MAX_WORDS = int(os.environ.get('FAST_PATH_MAX_WORDS', '10'))
+
+# Both reference formats in use: BOOK-XXXXXXXX from book_bike and the legacy
+# BKnnnnnn sample references
+BOOKING_REFERENCE_PATTERN = re.compile(r'\b(BOOK-[A-Z0-9]{8}|BK\d{6})\b', re.IGNORECASE)
+
+
+def match_fast_path(message):
+    """
+    Returns ('BookingIntent', booking_reference) or ('FAQIntent', topic) when
+    message can be answered locally with confidence, else None. A message
+    that reads like a concern or a problem with a bike, asks to change a
+    booking (cancel, extend, return...), names several references or is long
+    enough to mean something else is always left to Lex.
+    """
+    classification = classify(message)
+    if (classification['priority'] != 'low' or classification['concern_cue']
+            or classification['booking_refresh']):
+        return None
+
+    references = BOOKING_REFERENCE_PATTERN.findall(message)
+    if references:
+        return ('BookingIntent', references[0]) if len(references) == 1 else None
+
+    if len(message.split()) > FAST_PATH_MAX_WORDS or classification['category'] != 'other':
+        return None
+
+    topic = classification['faq_topic']
+    return ('FAQIntent', topic) if topic in FAQ_RESPONSES else None
@@ -0,0 +1,169 @@
+import heapq
+import math
+import os
+import re
+import time
+from collections import Counter
+
+from dalscooter_common import deserialize_item, get_client
+
+# In-memory ranked retrieval over the bot knowledge base.
+# The whole table is loaded once per container into an inverted index and
+# questions are ranked with BM25, so answering costs no DynamoDB reads.
+# Writers bump a version stamp held in a reserved item of the knowledge table;
+# readers check it at most every KB_VERSION_CHECK_SECONDS and rebuild the index
+# when it has moved.
+KB_VERSION_CHECK_SECONDS = int(os.environ.get('KB_VERSION_CHECK_SECONDS', '60'))
+KB_MIN_SCORE = float(os.environ.get('KB_MIN_SCORE', '1.0'))
+
+KB_VERSION_ID = '__kb_version__'
+
+# BM25 parameters and per-field term weights (the question is a list of
+# keywords written for matching, the answer is prose)
+BM25_K1 = 1.2
+BM25_B = 0.75
+FIELD_WEIGHTS = {'question': 3.0, 'category': 2.0, 'answer': 1.0}
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+STOP_WORDS = frozenset((
+    'a', 'an', 'and', 'are', 'can', 'do', 'does', 'for', 'how', 'i', 'in', 'is',
+    'it', 'me', 'my', 'of', 'on', 'or', 'the', 'to', 'what', 'where', 'which',
+    'with', 'you', 'your'
+))
+
+_index = {
+    'version': None,
+    'checked_at': 0.0,
+    'documents': [],
+    'postings': {},
+    'idf': {},
+    'norms': []
+}
+
+
+def tokenize(text):
+    """Lowercases text and returns its terms, without stop words and plurals."""
+    terms = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOP_WORDS:
+            continue
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        terms.append(token)
+    return terms
+
+
+def read_knowledge_version(table):
+    """Reads the knowledge base version stamp (0 if never written)."""
+    response = table.get_item(
+        Key={'question_id': KB_VERSION_ID},
+        ProjectionExpression='version'
+    )
+    return int(response.get('Item', {}).get('version', 0))
+
+
+def bump_knowledge_version(table):
+    """
+    Makes every container rebuild its index. Must be called after the
+    knowledge table writes have completed.
+    """
+    table.update_item(
+        Key={'question_id': KB_VERSION_ID},
+        UpdateExpression='ADD version :one',
+        ExpressionAttributeValues={':one': 1}
+    )
+
+
+def build_index(documents):
+    """
+    Builds the inverted index for documents: term -> [(document position,
+    weighted term frequency)], with the BM25 idf of each term and the length
+    normalization of each document precomputed.
+    """
+    postings = {}
+    lengths = []
+    for position, document in enumerate(documents):
+        frequencies = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            for term in tokenize(str(document.get(field) or '')):
+                frequencies[term] += weight
+        length = sum(frequencies.values())
+        lengths.append(length)
+        for term, frequency in frequencies.items():
+            postings.setdefault(term, []).append((position, frequency))
+
+    count = len(documents)
+    idf = {
+        term: math.log(1 + (count - len(entries) + 0.5) / (len(entries) + 0.5))
+        for term, entries in postings.items()
+    }
+    average_length = (sum(lengths) / count) if count else 0.0
+    norms = [BM25_K1 * (1 - BM25_B + BM25_B * length / (average_length or 1.0)) for length in lengths]
+    return {'documents': documents, 'postings': postings, 'idf': idf, 'norms': norms}
+
+
+def load_documents(table):
+    """Scans every knowledge item (except the version stamp) through a plain client."""
+    client = get_client('dynamodb')
+    scan_kwargs = {
+        'TableName': table.name,
+        'ProjectionExpression': 'question_id, category, question, answer'
+    }
+
+    documents = []
+    while True:
+        response = client.scan(**scan_kwargs)
+        for item in response.get('Items', []):
+            document = deserialize_item(item)
+            if document.get('question_id') != KB_VERSION_ID and document.get('answer'):
+                documents.append(document)
+        if 'LastEvaluatedKey' not in response:
+            return documents
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def get_index(table):
+    """
+    Returns the container's index, rebuilding it when the version stamp has
+    moved. Costs nothing between checks, one get_item per check and a full
+    scan when the knowledge base has changed.
+    """
+    now = time.monotonic()
+    if _index['version'] is not None and now - _index['checked_at'] < KB_VERSION_CHECK_SECONDS:
+        return _index
+
+    version = read_knowledge_version(table)
+    if version != _index['version']:
+        # The version is read before the scan, so a write that lands mid-scan
+        # bumps the stamp past this one and the next check rebuilds again.
+        _index.update(build_index(load_documents(table)))
+        _index['version'] = version
+        print(f"Knowledge index v{version} built with {len(_index['documents'])} entries")
+    _index['checked_at'] = now
+    return _index
+
+
+def rank(index, query, limit=3):
+    """Returns up to limit (score, document) pairs for query, best first."""
+    scores = {}
+    norms = index['norms']
+    for term in set(tokenize(query)):
+        idf = index['idf'].get(term)
+        if idf is None:
+            continue
+        for position, frequency in index['postings'][term]:
+            scores[position] = scores.get(position, 0.0) + idf * frequency * (BM25_K1 + 1) / (frequency + norms[position])
+
+    best = heapq.nlargest(limit, scores.items(), key=lambda entry: entry[1])
+    return [(score, index['documents'][position]) for position, score in best]
+
+
+def find_answer(table, query):
+    """
+    Returns the answer of the best matching knowledge item for query, or None
+    when nothing scores at least KB_MIN_SCORE.
+    """
+    matches = rank(get_index(table), query, limit=1)
+    if matches and matches[0][0] >= KB_MIN_SCORE:
+        return matches[0][1]['answer']
+    return None
@@ -13,6 +13,11 @@ terraform {
   }
 }
 
+locals {
+  # Handler log threshold for this environment (see dalscooter_common.log)
+  log_level = lookup(var.log_levels, var.environment, "INFO")
+}
+
 # DynamoDB table for storing bot knowledge base and FAQ
 resource "aws_dynamodb_table" "bot_knowledge_base" {
   name           = "${var.project_name}-${var.environment}-bot-knowledge"
@@ -53,6 +58,19 @@ resource "aws_dynamodb_table" "booking_references" {
     type = "S"
   }
 
+  attribute {
+    name = "reference_key"
+    type = "S"
+  }
+
+  # Case-insensitive lookups: reference_key is the trimmed, uppercased
+  # booking_reference, so the chatbot resolves any spelling in one query
+  global_secondary_index {
+    name            = "ReferenceKeyIndex"
+    hash_key        = "reference_key"
+    projection_type = "ALL"
+  }
+
   tags = {
     Name        = "${var.project_name}-${var.environment}-booking-references"
     Environment = var.environment
@@ -77,7 +95,12 @@ resource "aws_dynamodb_table" "customer_concerns" {
   }
 
   attribute {
-    name = "status"
+    name = "queue_shard"
+    type = "S"
+  }
+
+  attribute {
+    name = "created_at"
     type = "S"
   }
 
@@ -87,9 +110,13 @@ resource "aws_dynamodb_table" "customer_concerns" {
     projection_type = "ALL"
   }
 
+  # Operator queue: queue_shard is "<status>#<priority>#<shard>" (see
+  # concern_queue.py), so open tickets spread over several partitions per
+  # priority and each partition is already in created_at order
   global_secondary_index {
-    name            = "StatusIndex"
-    hash_key        = "status"
+    name            = "StatusPriorityIndex"
+    hash_key        = "queue_shard"
+    range_key       = "created_at"
     projection_type = "ALL"
   }
 
@@ -108,6 +135,18 @@ data "archive_file" "faq_handler_zip" {
     content  = file("${path.module}/lambda_functions/faq_handler.py")
     filename = "faq_handler.py"
   }
+  source {
+    content  = file("${path.module}/lambda_functions/knowledge_index.py")
+    filename = "knowledge_index.py"
+  }
+  source {
+    content  = file("${path.module}/lambda_functions/classifier.py")
+    filename = "classifier.py"
+  }
+  source {
+    content  = file("${path.module}/lambda_functions/classification_rules.json")
+    filename = "classification_rules.json"
+  }
 }
 
 data "archive_file" "booking_handler_zip" {
@@ -117,6 +156,22 @@ data "archive_file" "booking_handler_zip" {
     content  = file("${path.module}/lambda_functions/booking_handler.py")
     filename = "booking_handler.py"
   }
+  source {
+    content  = file("${path.module}/lambda_functions/booking_context.py")
+    filename = "booking_context.py"
+  }
+  source {
+    content  = file("${path.module}/lambda_functions/chat_replies.py")
+    filename = "chat_replies.py"
+  }
+  source {
+    content  = file("${path.module}/lambda_functions/classifier.py")
+    filename = "classifier.py"
+  }
+  source {
+    content  = file("${path.module}/lambda_functions/classification_rules.json")
+    filename = "classification_rules.json"
+  }
 }
 
 data "archive_file" "concern_handler_zip" {
@@ -128,6 +183,19 @@ data "archive_file" "concern_handler_zip" {
   }
 }
 
+data "archive_file" "concern_queue_api_zip" {
+  type        = "zip"
+  output_path = "${path.module}/concern_queue_api.zip"
+  source {
+    content  = file("${path.module}/lambda_functions/concern_queue_api.py")
+    filename = "concern_queue_api.py"
+  }
+  source {
+    content  = file("${path.module}/lambda_functions/concern_queue.py")
+    filename = "concern_queue.py"
+  }
+}
+
 # Router Lambda function archive
 data "archive_file" "router_handler_zip" {
   type        = "zip"
@@ -135,114 +203,113 @@ data "archive_file" "router_handler_zip" {
   source {
     content  = <<EOF
 import json
-import boto3
 import os
-import logging
+import re
 from datetime import datetime
 import uuid
 
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+from dalscooter_common import LRUCache, get_client, get_logger, get_table
+
+from booking_context import cached_booking, forget_booking, lookup_booking, refresh_requested, session_attributes
+from chat_replies import FAQ_DEFAULT_RESPONSE, FAQ_RESPONSES, booking_reply
+from classifier import classify, get_classifier
+from concern_queue import queue_attributes
+from knowledge_index import find_answer
 
-dynamodb = boto3.resource('dynamodb')
+logger = get_logger('router')
+
+# Hot FAQ turns ("how do I register", "what bikes") are answered from a
+# bounded LRU cache keyed by intent and normalized transcript
+response_cache = LRUCache(
+    max_items=int(os.environ.get('RESPONSE_CACHE_MAX_ITEMS', '512')),
+    ttl_seconds=int(os.environ.get('RESPONSE_CACHE_TTL_SECONDS', '300'))
+)
+UTTERANCE_NOISE = re.compile(r"[^a-z0-9' ]+")
+
+def normalize_utterance(text):
+    """Lowercases text and drops punctuation and repeated whitespace"""
+    return ' '.join(UTTERANCE_NOISE.sub(' ', text.lower()).split())
 
 def handler(event, context):
     """
     Router function that directs intents to appropriate handlers
     """
-    logger.info(f"Received event: {json.dumps(event)}")
+    logger.start_invocation(context)
+    logger.debug("Received event", event=event)
     
     try:
         intent_name = event['sessionState']['intent']['name']
+        # Booking context carried between turns (booking_context.py)
+        attributes = session_attributes(event)
         
         if intent_name == 'FAQIntent':
-            return handle_faq(event, context)
+            response = cached_response(event, context, intent_name, handle_faq)
         elif intent_name == 'BookingIntent':
-            return handle_booking(event, context)
+            response = handle_booking(event, context, attributes)
         elif intent_name == 'ConcernIntent':
-            return handle_concern(event, context)
+            response = handle_concern(event, context, attributes)
         else:
-            return default_response(event, intent_name)
+            response = default_response(event, intent_name)
+        return with_session(response, attributes)
             
     except Exception as e:
-        logger.error(f"Router error: {str(e)}")
-        return error_response(event.get('sessionState', {}).get('intent', {}).get('name', 'Unknown'))
+        logger.error("Router error: %s", e, exc_info=True)
+        return with_session(error_response(event.get('sessionState', {}).get('intent', {}).get('name', 'Unknown')),
+                            session_attributes(event))
+
+def with_session(response, attributes):
+    """
+    Returns response carrying the session attributes back to Lex. Builds a
+    new dict so responses shared through the cache never hold one user's
+    session.
+    """
+    return dict(response, sessionState=dict(response['sessionState'], sessionAttributes=attributes))
+
+def cached_response(event, context, intent_name, build_response):
+    """
+    Returns the cached response for this intent and utterance, building and
+    caching it with build_response on a miss. Only fulfilled responses that do
+    not depend on the user or session may go through here.
+    """
+    cache_key = (intent_name, normalize_utterance(event.get('inputTranscript', '')))
+    response = response_cache.get(cache_key)
+    if response is not None:
+        logger.info("Response served from cache", intent=intent_name, cache=response_cache.stats)
+        return response
+
+    response = build_response(event, context)
+    if response['sessionState']['intent']['state'] == 'Fulfilled':
+        response_cache.put(cache_key, response)
+    logger.info("Response built", intent=intent_name, cache=response_cache.stats)
+    return response
 
 def handle_faq(event, context):
     """Handle FAQ queries"""
     try:
-        table = dynamodb.Table(os.environ['KNOWLEDGE_BASE_TABLE'])
+        table = get_table(os.environ['KNOWLEDGE_BASE_TABLE'])
         input_text = event.get('inputTranscript', '').lower()
         
-        # Define FAQ responses
-        faq_responses = {
-            'register': """To register for DALScooter:
-1. Visit our registration page
-2. Fill in your personal details
-3. Create a username and password
-4. Verify your email address
-5. Complete the multi-factor authentication setup
-Once registered, you'll receive a confirmation notification!""",
-            
-            'bikes': """We offer three types of bikes:
-1. **Gyroscooter** - Perfect for short city rides
-2. **eBikes** - Electric bikes for longer distances
-3. **Segway** - Self-balancing personal transporters
-
-You can check availability and rates for each type on our main page.""",
-            
-            'cost': """Our rental rates vary by bike type:
-- Gyroscooter: Starting from $5/hour
-- eBikes: Starting from $8/hour  
-- Segway: Starting from $10/hour
-
-Registered customers may receive special discounts! Please check our rates page for current pricing.""",
-            
-            'booking': """To make a booking:
-1. Register and log in to your account
-2. Select your preferred bike type
-3. Choose your rental period
-4. Confirm your booking
-5. You'll receive a booking reference code
-6. Use this code to get your bike access code through me!""",
-            
-            'help': """I can help you with:
-- Registration process
-- Available bike types and rates
-- How to make bookings
-- Getting your bike access code (with booking reference)
-- Reporting issues or concerns
-- General navigation around the site
-
-What would you like to know more about?"""
-        }
+        # Try to find matching FAQ topic (classification_rules.json)
+        topic = classify(input_text)['faq_topic']
+        if topic in FAQ_RESPONSES:
+            return create_response('FAQIntent', 'Fulfilled', FAQ_RESPONSES[topic])
         
-        # Try to find matching FAQ
-        for keyword, response in faq_responses.items():
-            if keyword in input_text:
-                return create_response('FAQIntent', 'Fulfilled', response)
+        # Rank the knowledge base for more specific questions
+        answer = find_answer(table, input_text)
+        if answer:
+            return create_response('FAQIntent', 'Fulfilled', answer)
         
         # Default FAQ response
-        return create_response('FAQIntent', 'Fulfilled', """I'd be happy to help! I can assist you with:
-
-• How to register and create an account
-• Information about our bike types (Gyroscooter, eBikes, Segway)
-• Rental rates and pricing
-• How to make bookings
-• Getting your bike access code
-• Reporting issues or problems
-• General site navigation
-
-Please ask me about any of these topics, or try rephrasing your question!""")
+        return create_response('FAQIntent', 'Fulfilled', FAQ_DEFAULT_RESPONSE)
         
     except Exception as e:
-        logger.error(f"FAQ handler error: {str(e)}")
+        logger.error("FAQ handler error: %s", e)
         return error_response('FAQIntent')
 
-def handle_booking(event, context):
+def handle_booking(event, context, attributes):
     """Handle booking reference queries"""
     try:
-        table = dynamodb.Table(os.environ['BOOKING_REFERENCES_TABLE'])
+        table = get_table(os.environ['BOOKING_REFERENCES_TABLE'])
         slots = event['sessionState']['intent'].get('slots', {})
         
         # Get booking reference from slot
@@ -250,68 +317,32 @@ def handle_booking(event, context):
         if 'BookingReference' in slots and slots['BookingReference'] and slots['BookingReference']['value']:
             booking_reference = slots['BookingReference']['value']['interpretedValue']
         
+        if not booking_reference:
+            # Follow-up turn about the booking already resolved in this conversation
+            cached = cached_booking(attributes)
+            booking_reference = cached and cached.get('booking_reference')
+        
         if not booking_reference:
             return create_response('BookingIntent', 'Fulfilled', 
                 "Please provide your booking reference number so I can help you get your bike access code and rental details.")
         
-        # Query the booking references table
-        response = table.get_item(Key={'booking_reference': booking_reference})
+        # Session context first, then a case-insensitive keyed read on the
+        # booking references table; turns that may change the booking re-read it
+        item, from_session = lookup_booking(table, attributes, booking_reference, refresh_requested(event))
+        logger.info("Booking lookup", found=item is not None, from_session=from_session)
         
-        if 'Item' in response:
-            item = response['Item']
-            bike_type = item.get('bike_type', 'N/A')
-            bike_number = item.get('bike_number', 'N/A')
-            access_code = item.get('access_code', 'N/A')
-            start_time = item.get('start_time', 'N/A')
-            end_time = item.get('end_time', 'N/A')
-            rental_duration = item.get('rental_duration', 'N/A')
-            status = item.get('status', 'active')
-            
-            if status.lower() == 'active':
-                message = f"""✅ **Booking Details Found**
-
-🔖 **Booking Reference:** {booking_reference}
-🚲 **Bike Type:** {bike_type}
-🏷️ **Bike Number:** {bike_number}
-🔐 **Access Code:** {access_code}
-⏰ **Rental Period:** {start_time} to {end_time}
-⏱️ **Duration:** {rental_duration}
-
-**Instructions:**
-1. Locate bike #{bike_number}
-2. Enter access code: {access_code}
-3. Enjoy your ride!
-
-Need help finding your bike or have any issues? Just let me know!"""
-            else:
-                message = f"""📋 **Booking Status Update**
-
-🔖 **Booking Reference:** {booking_reference}
-📊 **Status:** {status.title()}
-
-This booking is no longer active. If you need assistance, please contact our support team or make a new booking."""
-        else:
-            message = f"""❌ **Booking Not Found**
-
-I couldn't find any booking with reference: **{booking_reference}**
-
-Please check:
-✓ Your booking reference is correct
-✓ The booking is still active
-✓ You're logged in to the correct account
-
-If you're still having trouble, please contact our support team for assistance."""
+        message = booking_reply(item, booking_reference, from_session)
         
         return create_response('BookingIntent', 'Fulfilled', message)
         
     except Exception as e:
-        logger.error(f"Booking handler error: {str(e)}")
+        logger.error("Booking handler error: %s", e)
         return error_response('BookingIntent')
 
-def handle_concern(event, context):
+def handle_concern(event, context, attributes):
     """Handle customer concerns"""
     try:
-        table = dynamodb.Table(os.environ['CUSTOMER_CONCERNS_TABLE'])
+        table = get_table(os.environ['CUSTOMER_CONCERNS_TABLE'])
         slots = event['sessionState']['intent'].get('slots', {})
         input_text = event.get('inputTranscript', '')
         
@@ -327,9 +358,10 @@ def handle_concern(event, context):
         concern_id = str(uuid.uuid4())
         timestamp = datetime.utcnow().isoformat()
         
-        # Determine priority and category
-        priority = determine_priority(issue_description)
-        category = determine_category(issue_description)
+        # Determine priority and category in one pass over the description
+        classification = classify(issue_description)
+        priority = classification['priority']
+        category = classification['category']
         
         # Create concern item
         concern_item = {
@@ -340,12 +372,18 @@ def handle_concern(event, context):
             'created_at': timestamp,
             'updated_at': timestamp,
             'priority': priority,
-            'category': category
+            'category': category,
+            'rules_version': get_classifier().version
         }
+        concern_item.update(queue_attributes(concern_id, 'open', priority))
         
         # Save to DynamoDB
         table.put_item(Item=concern_item)
         
+        # Operators may change the booking while handling the concern, so the
+        # next booking turn reads it again
+        forget_booking(attributes)
+        
         # Forward concern to operators via SNS
         forward_concern_to_operators(concern_id, booking_reference, issue_description, priority, category)
         
@@ -371,14 +409,14 @@ Thank you for reporting this issue. We'll resolve it as quickly as possible!"""
         return create_response('ConcernIntent', 'Fulfilled', message)
         
     except Exception as e:
-        logger.error(f"Concern handler error: {str(e)}")
+        logger.error("Concern handler error: %s", e)
         return error_response('ConcernIntent')
 
 def forward_concern_to_operators(concern_id, booking_reference, issue_description, priority, category):
     """Forward concern to operators via SNS"""
     try:
-        # Import SNS client
-        sns_client = boto3.client('sns')
+        # Shared SNS client, created on the first concern
+        sns_client = get_client('sns')
         
         # Prepare message for operators
         message_body = f"""
@@ -415,46 +453,12 @@ Please investigate and respond accordingly.
             }
         )
         
-        logger.info(f"Successfully forwarded concern {concern_id} to operators via SNS. MessageId: {response.get('MessageId')}")
+        logger.info("Forwarded concern to operators via SNS", concern_id=concern_id, message_id=response.get('MessageId'))
         
     except Exception as e:
-        logger.error(f"Error forwarding concern {concern_id} to operators: {str(e)}")
+        logger.error("Error forwarding concern to operators: %s", e, concern_id=concern_id)
         # Don't raise the error as the ticket was still created successfully
 
-def determine_priority(issue_description):
-    """Determine priority based on issue description"""
-    issue_lower = issue_description.lower()
-    high_priority_keywords = ['accident', 'injury', 'broken', 'damaged', 'safety', 'emergency', 'stuck', 'theft']
-    medium_priority_keywords = ['battery', 'not working', 'malfunction', 'dead', 'cannot unlock', 'won\'t start']
-    
-    for keyword in high_priority_keywords:
-        if keyword in issue_lower:
-            return 'high'
-    
-    for keyword in medium_priority_keywords:
-        if keyword in issue_lower:
-            return 'medium'
-    
-    return 'low'
-
-def determine_category(issue_description):
-    """Determine category based on issue description"""
-    issue_lower = issue_description.lower()
-    categories = {
-        'technical': ['battery', 'not working', 'malfunction', 'broken', 'dead', 'won\'t start', 'charging'],
-        'access': ['cannot unlock', 'access code', 'locked', 'unlock'],
-        'damage': ['damaged', 'broken', 'scratched', 'dent'],
-        'safety': ['accident', 'injury', 'safety', 'emergency'],
-        'theft': ['stolen', 'theft', 'missing'],
-    }
-    
-    for category, keywords in categories.items():
-        for keyword in keywords:
-            if keyword in issue_lower:
-                return category
-    
-    return 'other'
-
 def create_response(intent_name, state, message):
     """Create standard Lex response"""
     return {
@@ -485,6 +489,30 @@ def error_response(intent_name):
 EOF
     filename = "index.py"
   }
+  source {
+    content  = file("${path.module}/lambda_functions/booking_context.py")
+    filename = "booking_context.py"
+  }
+  source {
+    content  = file("${path.module}/lambda_functions/chat_replies.py")
+    filename = "chat_replies.py"
+  }
+  source {
+    content  = file("${path.module}/lambda_functions/concern_queue.py")
+    filename = "concern_queue.py"
+  }
+  source {
+    content  = file("${path.module}/lambda_functions/knowledge_index.py")
+    filename = "knowledge_index.py"
+  }
+  source {
+    content  = file("${path.module}/lambda_functions/classifier.py")
+    filename = "classifier.py"
+  }
+  source {
+    content  = file("${path.module}/lambda_functions/classification_rules.json")
+    filename = "classification_rules.json"
+  }
 }
 
 # API Gateway Proxy Lambda function archive
@@ -494,21 +522,40 @@ data "archive_file" "api_proxy_handler_zip" {
   source {
     content  = <<EOF
 import json
-import boto3
+import base64
 import os
-import logging
 import uuid
 
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+from dalscooter_common import LRUCache, find_booking_reference, get_client, get_logger, get_table
+
+from chat_replies import FAQ_RESPONSES, booking_reply
+from fast_path import match_fast_path
+
+logger = get_logger('api_proxy')
 
-lex_client = boto3.client('lexv2-runtime')
+# Lex waits on the router Lambda, so reads get more time than the default
+lex_client = get_client('lexv2-runtime', read_timeout=20)
+
+# Deterministic FAQ and booking reference messages are answered here without
+# the Lex and router round trips (see fast_path.py)
+FAST_PATH_ENABLED = os.environ.get('CHAT_FAST_PATH_ENABLED', 'true').lower() == 'true'
+# Sessions whose last Lex turn left a dialog open (a slot or confirmation
+# being asked for); their next message always goes to Lex. The client echoes
+# the dialogState of its last reply, which holds across containers; the cache
+# below covers clients that do not, for turns served by this container.
+# Entries live as long as an idle Lex session.
+OPEN_DIALOG_STATES = {'ElicitSlot', 'ConfirmIntent', 'ElicitIntent'}
+open_dialogs = LRUCache(
+    max_items=int(os.environ.get('OPEN_DIALOG_CACHE_MAX_ITEMS', '2048')),
+    ttl_seconds=int(os.environ.get('LEX_IDLE_SESSION_TTL_SECONDS', '300'))
+)
 
 def handler(event, context):
     """
     API Gateway proxy function that communicates with Lex V2
     """
-    logger.info(f"Received API Gateway event: {json.dumps(event)}")
+    logger.start_invocation(context)
+    logger.debug("Received API Gateway event", event=event)
     
     try:
         # Handle CORS preflight
@@ -539,6 +586,15 @@ def handler(event, context):
         if not message:
             return create_error_response(400, "Message is required")
         
+        # Answer locally when the message is unambiguous and no dialog is open
+        dialog_open = body.get('dialogState') in OPEN_DIALOG_STATES or open_dialogs.get(session_id) is not None
+        if FAST_PATH_ENABLED and not dialog_open:
+            local_reply = answer_locally(message)
+            if local_reply:
+                intent_name, bot_response = local_reply
+                logger.info("Answered on the fast path", intent=intent_name)
+                return chat_response(session_id, bot_response, 'Close', intent_name)
+        
         # Call Lex V2 RecognizeText API
         response = lex_client.recognize_text(
             botId=os.environ['BOT_ID'],
@@ -553,30 +609,63 @@ def handler(event, context):
         if 'messages' in response and response['messages']:
             bot_response = response['messages'][0].get('content', '')
         
+        dialog_state = response.get('sessionState', {}).get('dialogAction', {}).get('type', '')
+        if dialog_state in OPEN_DIALOG_STATES:
+            open_dialogs.put(session_id, dialog_state)
+        else:
+            open_dialogs.discard(session_id)
+        
         # Return formatted response
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type',
-                'Access-Control-Allow-Methods': 'OPTIONS,POST,GET',
-                'Content-Type': 'application/json'
-            },
-            'body': json.dumps({
-                'message': bot_response,
-                'sessionId': session_id,
-                'dialogState': response.get('sessionState', {}).get('dialogAction', {}).get('type', ''),
-                'intentName': response.get('sessionState', {}).get('intent', {}).get('name', ''),
-                'slotToElicit': response.get('sessionState', {}).get('dialogAction', {}).get('slotToElicit', ''),
-                'sessionAttributes': response.get('sessionState', {}).get('sessionAttributes', {}),
-                'requestAttributes': response.get('requestAttributes', {})
-            })
-        }
+        return chat_response(
+            session_id,
+            bot_response,
+            dialog_state,
+            response.get('sessionState', {}).get('intent', {}).get('name', ''),
+            slot_to_elicit=response.get('sessionState', {}).get('dialogAction', {}).get('slotToElicit', ''),
+            session_attributes=response.get('sessionState', {}).get('sessionAttributes', {}),
+            request_attributes=response.get('requestAttributes', {})
+        )
         
     except Exception as e:
-        logger.error(f"Error processing request: {str(e)}")
+        logger.error("Error processing request: %s", e, exc_info=True)
         return create_error_response(500, f"Internal server error: {str(e)}")
 
+def answer_locally(message):
+    """Returns (intent name, reply) for a fast path message, or None to ask Lex"""
+    match = match_fast_path(message)
+    if match is None:
+        return None
+    
+    intent_name, value = match
+    if intent_name == 'FAQIntent':
+        return intent_name, FAQ_RESPONSES[value]
+    
+    # Case-insensitive keyed read, as the router does for BookingIntent
+    item = find_booking_reference(get_table(os.environ['BOOKING_REFERENCES_TABLE']), value)
+    return intent_name, booking_reply(item, value)
+
+def chat_response(session_id, message, dialog_state, intent_name, slot_to_elicit='',
+                  session_attributes=None, request_attributes=None):
+    """Create chat response, the same shape for Lex and fast path answers"""
+    return {
+        'statusCode': 200,
+        'headers': {
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Headers': 'Content-Type',
+            'Access-Control-Allow-Methods': 'OPTIONS,POST,GET',
+            'Content-Type': 'application/json'
+        },
+        'body': json.dumps({
+            'message': message,
+            'sessionId': session_id,
+            'dialogState': dialog_state,
+            'intentName': intent_name,
+            'slotToElicit': slot_to_elicit,
+            'sessionAttributes': session_attributes or {},
+            'requestAttributes': request_attributes or {}
+        })
+    }
+
 def create_error_response(status_code, message):
     """Create error response"""
     return {
@@ -594,6 +683,22 @@ def create_error_response(status_code, message):
 EOF
     filename = "index.py"
   }
+  source {
+    content  = file("${path.module}/lambda_functions/fast_path.py")
+    filename = "fast_path.py"
+  }
+  source {
+    content  = file("${path.module}/lambda_functions/chat_replies.py")
+    filename = "chat_replies.py"
+  }
+  source {
+    content  = file("${path.module}/lambda_functions/classifier.py")
+    filename = "classifier.py"
+  }
+  source {
+    content  = file("${path.module}/lambda_functions/classification_rules.json")
+    filename = "classification_rules.json"
+  }
 }
 
 # IAM role for Lambda functions
@@ -696,12 +801,15 @@ resource "aws_lambda_function" "faq_handler" {
   role            = aws_iam_role.lambda_role.arn
   handler         = "faq_handler.handler"
   runtime         = "python3.9"
+  layers          = [var.shared_layer_arn]
   timeout         = 30
   source_code_hash = data.archive_file.faq_handler_zip.output_base64sha256
 
   environment {
     variables = {
       KNOWLEDGE_BASE_TABLE = aws_dynamodb_table.bot_knowledge_base.name
+      LOG_LEVEL             = local.log_level
+      LOG_DEBUG_SAMPLE_RATE = tostring(var.log_debug_sample_rate)
     }
   }
 
@@ -718,12 +826,16 @@ resource "aws_lambda_function" "booking_handler" {
   role            = aws_iam_role.lambda_role.arn
   handler         = "booking_handler.handler"
   runtime         = "python3.9"
+  layers          = [var.shared_layer_arn]
   timeout         = 30
   source_code_hash = data.archive_file.booking_handler_zip.output_base64sha256
 
   environment {
     variables = {
       BOOKING_REFERENCES_TABLE = aws_dynamodb_table.booking_references.name
+      BOOKING_CONTEXT_TTL_SECONDS = tostring(var.booking_context_ttl_seconds)
+      LOG_LEVEL             = local.log_level
+      LOG_DEBUG_SAMPLE_RATE = tostring(var.log_debug_sample_rate)
     }
   }
 
@@ -741,6 +853,7 @@ resource "aws_lambda_function" "concern_handler" {
   role            = aws_iam_role.lambda_role.arn
   handler         = "concern_handler.handler"
   runtime         = "python3.9"
+  layers          = [var.shared_layer_arn]
   timeout         = 30
   source_code_hash = data.archive_file.concern_handler_zip.output_base64sha256
 
@@ -767,6 +880,7 @@ resource "aws_lambda_function" "router_handler" {
   role            = aws_iam_role.lambda_role.arn
   handler         = "index.handler"
   runtime         = "python3.9"
+  layers          = [var.shared_layer_arn]
   timeout         = 30
   source_code_hash = data.archive_file.router_handler_zip.output_base64sha256
 
@@ -778,6 +892,12 @@ resource "aws_lambda_function" "router_handler" {
       # NEW: Add message passing variables
       FEEDBACK_SNS_TOPIC_ARN = var.feedback_sns_topic_arn
       FEEDBACK_LAMBDA_ARN    = var.feedback_lambda_arn
+      LOG_LEVEL             = local.log_level
+      LOG_DEBUG_SAMPLE_RATE = tostring(var.log_debug_sample_rate)
+      RESPONSE_CACHE_MAX_ITEMS   = tostring(var.response_cache_max_items)
+      RESPONSE_CACHE_TTL_SECONDS = tostring(var.response_cache_ttl_seconds)
+      CONCERN_QUEUE_SHARDS       = tostring(var.concern_queue_shards)
+      BOOKING_CONTEXT_TTL_SECONDS = tostring(var.booking_context_ttl_seconds)
     }
   }
 
@@ -795,6 +915,7 @@ resource "aws_lambda_function" "api_proxy_handler" {
   role            = aws_iam_role.lambda_role.arn
   handler         = "index.handler"
   runtime         = "python3.9"
+  layers          = [var.shared_layer_arn]
   timeout         = 30
   source_code_hash = data.archive_file.api_proxy_handler_zip.output_base64sha256
 
@@ -802,6 +923,11 @@ resource "aws_lambda_function" "api_proxy_handler" {
     variables = {
       BOT_ID = aws_lexv2models_bot.dalscooter_bot.id
       BOT_ALIAS_ID = "TSTALIASID"
+      BOOKING_REFERENCES_TABLE     = aws_dynamodb_table.booking_references.name
+      CHAT_FAST_PATH_ENABLED       = tostring(var.chat_fast_path_enabled)
+      LEX_IDLE_SESSION_TTL_SECONDS = tostring(aws_lexv2models_bot.dalscooter_bot.idle_session_ttl_in_seconds)
+      LOG_LEVEL             = local.log_level
+      LOG_DEBUG_SAMPLE_RATE = tostring(var.log_debug_sample_rate)
     }
   }
 
@@ -898,6 +1024,41 @@ resource "aws_lambda_permission" "api_gateway_invoke" {
   source_arn    = "${aws_api_gateway_rest_api.chatbot_api.execution_arn}/*/*"
 }
 
+# Operator concern queue API (GET /concerns, POST /concerns/{concern_id}/status)
+resource "aws_lambda_function" "concern_queue_api" {
+  filename         = data.archive_file.concern_queue_api_zip.output_path
+  function_name    = "${var.project_name}-${var.environment}-concern-queue-api"
+  role            = aws_iam_role.lambda_role.arn
+  handler         = "concern_queue_api.handler"
+  runtime         = "python3.9"
+  layers          = [var.shared_layer_arn]
+  timeout         = 30
+  source_code_hash = data.archive_file.concern_queue_api_zip.output_base64sha256
+
+  environment {
+    variables = {
+      CUSTOMER_CONCERNS_TABLE = aws_dynamodb_table.customer_concerns.name
+      CONCERN_QUEUE_SHARDS    = tostring(var.concern_queue_shards)
+      LOG_LEVEL             = local.log_level
+      LOG_DEBUG_SAMPLE_RATE = tostring(var.log_debug_sample_rate)
+    }
+  }
+
+  tags = {
+    Name        = "${var.project_name}-${var.environment}-concern-queue-api"
+    Environment = var.environment
+    Project     = var.project_name
+  }
+}
+
+resource "aws_lambda_permission" "concern_queue_api_invoke" {
+  statement_id  = "AllowConcernQueueFromAPIGateway"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.concern_queue_api.function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_api_gateway_rest_api.chatbot_api.execution_arn}/*/*"
+}
+
 # Lex Bot
 resource "aws_lexv2models_bot" "dalscooter_bot" {
   name     = "${var.project_name}-${var.environment}-assistant"
@@ -1172,11 +1333,104 @@ resource "aws_api_gateway_integration" "chat_options_integration" {
   uri                    = aws_lambda_function.api_proxy_handler.invoke_arn
 }
 
+# Operator concern queue routes; IAM-signed so only franchise operators
+# (the Cognito admin role) can call them
+resource "aws_api_gateway_resource" "concerns_resource" {
+  rest_api_id = aws_api_gateway_rest_api.chatbot_api.id
+  parent_id   = aws_api_gateway_rest_api.chatbot_api.root_resource_id
+  path_part   = "concerns"
+}
+
+resource "aws_api_gateway_resource" "concern_resource" {
+  rest_api_id = aws_api_gateway_rest_api.chatbot_api.id
+  parent_id   = aws_api_gateway_resource.concerns_resource.id
+  path_part   = "{concern_id}"
+}
+
+resource "aws_api_gateway_resource" "concern_status_resource" {
+  rest_api_id = aws_api_gateway_rest_api.chatbot_api.id
+  parent_id   = aws_api_gateway_resource.concern_resource.id
+  path_part   = "status"
+}
+
+resource "aws_api_gateway_method" "concerns_get" {
+  rest_api_id   = aws_api_gateway_rest_api.chatbot_api.id
+  resource_id   = aws_api_gateway_resource.concerns_resource.id
+  http_method   = "GET"
+  authorization = "AWS_IAM"
+}
+
+resource "aws_api_gateway_method" "concern_status_post" {
+  rest_api_id   = aws_api_gateway_rest_api.chatbot_api.id
+  resource_id   = aws_api_gateway_resource.concern_status_resource.id
+  http_method   = "POST"
+  authorization = "AWS_IAM"
+}
+
+# OPTIONS for CORS; browsers send preflights unsigned, so these stay open
+resource "aws_api_gateway_method" "concerns_options" {
+  rest_api_id   = aws_api_gateway_rest_api.chatbot_api.id
+  resource_id   = aws_api_gateway_resource.concerns_resource.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_method" "concern_status_options" {
+  rest_api_id   = aws_api_gateway_rest_api.chatbot_api.id
+  resource_id   = aws_api_gateway_resource.concern_status_resource.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "concerns_get_integration" {
+  rest_api_id = aws_api_gateway_rest_api.chatbot_api.id
+  resource_id = aws_api_gateway_resource.concerns_resource.id
+  http_method = aws_api_gateway_method.concerns_get.http_method
+
+  integration_http_method = "POST"
+  type                   = "AWS_PROXY"
+  uri                    = aws_lambda_function.concern_queue_api.invoke_arn
+}
+
+resource "aws_api_gateway_integration" "concern_status_post_integration" {
+  rest_api_id = aws_api_gateway_rest_api.chatbot_api.id
+  resource_id = aws_api_gateway_resource.concern_status_resource.id
+  http_method = aws_api_gateway_method.concern_status_post.http_method
+
+  integration_http_method = "POST"
+  type                   = "AWS_PROXY"
+  uri                    = aws_lambda_function.concern_queue_api.invoke_arn
+}
+
+resource "aws_api_gateway_integration" "concerns_options_integration" {
+  rest_api_id = aws_api_gateway_rest_api.chatbot_api.id
+  resource_id = aws_api_gateway_resource.concerns_resource.id
+  http_method = aws_api_gateway_method.concerns_options.http_method
+
+  integration_http_method = "POST"
+  type                   = "AWS_PROXY"
+  uri                    = aws_lambda_function.concern_queue_api.invoke_arn
+}
+
+resource "aws_api_gateway_integration" "concern_status_options_integration" {
+  rest_api_id = aws_api_gateway_rest_api.chatbot_api.id
+  resource_id = aws_api_gateway_resource.concern_status_resource.id
+  http_method = aws_api_gateway_method.concern_status_options.http_method
+
+  integration_http_method = "POST"
+  type                   = "AWS_PROXY"
+  uri                    = aws_lambda_function.concern_queue_api.invoke_arn
+}
+
 # API Gateway Deployment (without stage_name)
 resource "aws_api_gateway_deployment" "chatbot_deployment" {
   depends_on = [
     aws_api_gateway_integration.chat_integration,
-    aws_api_gateway_integration.chat_options_integration
+    aws_api_gateway_integration.chat_options_integration,
+    aws_api_gateway_integration.concerns_get_integration,
+    aws_api_gateway_integration.concern_status_post_integration,
+    aws_api_gateway_integration.concerns_options_integration,
+    aws_api_gateway_integration.concern_status_options_integration
   ]
 
   rest_api_id = aws_api_gateway_rest_api.chatbot_api.id
@@ -1188,6 +1442,16 @@ resource "aws_api_gateway_deployment" "chatbot_deployment" {
       aws_api_gateway_method.chat_options.id,
       aws_api_gateway_integration.chat_integration.id,
       aws_api_gateway_integration.chat_options_integration.id,
+      aws_api_gateway_resource.concerns_resource.id,
+      aws_api_gateway_resource.concern_status_resource.id,
+      aws_api_gateway_method.concerns_get.id,
+      aws_api_gateway_method.concern_status_post.id,
+      aws_api_gateway_integration.concerns_get_integration.id,
+      aws_api_gateway_integration.concern_status_post_integration.id,
+      aws_api_gateway_method.concerns_options.id,
+      aws_api_gateway_method.concern_status_options.id,
+      aws_api_gateway_integration.concerns_options_integration.id,
+      aws_api_gateway_integration.concern_status_options_integration.id,
     ]))
   }
 
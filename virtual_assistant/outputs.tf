@@ -20,6 +20,11 @@ output "api_gateway_url" {
   value       = "https://${aws_api_gateway_rest_api.chatbot_api.id}.execute-api.${data.aws_region.current.id}.amazonaws.com/${var.environment}/chat"
 }
 
+output "concerns_api_url" {
+  description = "The API Gateway endpoint URL for the operator concern queue (IAM-signed)"
+  value       = "https://${aws_api_gateway_rest_api.chatbot_api.id}.execute-api.${data.aws_region.current.id}.amazonaws.com/${var.environment}/concerns"
+}
+
 output "api_gateway_id" {
   description = "The ID of the API Gateway"
   value       = aws_api_gateway_rest_api.chatbot_api.id
@@ -63,10 +68,19 @@ output "lambda_functions" {
     faq_handler       = aws_lambda_function.faq_handler.arn
     booking_handler   = aws_lambda_function.booking_handler.arn
     concern_handler   = aws_lambda_function.concern_handler.arn
+    concern_queue_api = aws_lambda_function.concern_queue_api.arn
   }
 }
 
 output "booking_references_table_arn" {
   description = "The ARN of the DynamoDB booking references table"
   value       = aws_dynamodb_table.booking_references.arn
-}
\ No newline at end of file
+}
+
+output "concern_queue_route_arns" {
+  description = "execute-api ARNs of the operator concern queue routes, for the operator role"
+  value = [
+    "${aws_api_gateway_rest_api.chatbot_api.execution_arn}/*/GET/concerns",
+    "${aws_api_gateway_rest_api.chatbot_api.execution_arn}/*/POST/concerns/*/status"
+  ]
+}
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Script to add the normalized reference_key to existing booking references so
+the chatbot can find them through ReferenceKeyIndex. Run once after deploying
+the index; safe to re-run.
+"""
+
+import sys
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+
+# Initialize DynamoDB client
+dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+
+
+def backfill_reference_keys(table_name='dalscooter-dev-booking-references'):
+    """Set reference_key on every booking reference that is missing it"""
+
+    table = dynamodb.Table(table_name)
+    scan_kwargs = {
+        'FilterExpression': Attr('reference_key').not_exists(),
+        'ProjectionExpression': 'booking_reference'
+    }
+
+    updated = 0
+    skipped = 0
+    while True:
+        response = table.scan(**scan_kwargs)
+
+        for item in response.get('Items', []):
+            booking_reference = item['booking_reference']
+            try:
+                table.update_item(
+                    Key={'booking_reference': booking_reference},
+                    UpdateExpression='SET reference_key = :key',
+                    ConditionExpression='attribute_exists(booking_reference)',
+                    ExpressionAttributeValues={':key': booking_reference.strip().upper()}
+                )
+                updated += 1
+            except Exception as e:
+                skipped += 1
+                print(f"❌ Error adding reference key for {booking_reference}: {str(e)}")
+
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    print(f"✅ Added reference keys to {updated} booking references ({skipped} skipped)")
+
+
+def main():
+    table_name = sys.argv[1] if len(sys.argv) > 1 else 'dalscooter-dev-booking-references'
+    print(f"🔖 Backfilling reference keys for {table_name}...")
+    backfill_reference_keys(table_name)
+
+
+if __name__ == "__main__":
+    main()
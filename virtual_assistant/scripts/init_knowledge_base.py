@@ -128,6 +128,14 @@ This ensures your account stays secure. If you forget any authentication details
         except Exception as e:
             print(f"❌ Error adding {item['question_id']}: {str(e)}")
 
+    # Bump the version stamp so warm chatbot containers rebuild their index
+    table.update_item(
+        Key={'question_id': '__kb_version__'},
+        UpdateExpression='ADD version :one',
+        ExpressionAttributeValues={':one': 1}
+    )
+    print("🔄 Bumped knowledge base version")
+
 def init_sample_bookings():
     """Initialize sample booking data for testing"""
     
@@ -177,6 +185,8 @@ def init_sample_bookings():
     
     # Insert booking data
     for booking in bookings:
+        # Normalized copy of the reference for case-insensitive chatbot lookups
+        booking['reference_key'] = booking['booking_reference'].strip().upper()
         try:
             table.put_item(Item=booking)
             print(f"✅ Added booking: {booking['booking_reference']}")
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Script to re-classify every customer concern with the current
+classification_rules.json. Run after changing the rules; concerns already
+classified with the current rules version are skipped, so an interrupted run
+can simply be started again. Each concern's operator queue shard is written
+along with its priority, which also backfills concerns created before the
+queue index existed.
+
+Usage: reclassify_concerns.py [table_name] [--dry-run]
+"""
+
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SCRIPT_DIR, '..', 'lambda_functions'))
+sys.path.insert(0, os.path.join(SCRIPT_DIR, '..', '..', 'shared_layer', 'layer', 'python'))
+from classifier import get_classifier  # noqa: E402
+from concern_queue import QUEUE_KEY, concern_shard, queue_key  # noqa: E402
+
+SCAN_SEGMENTS = 4
+
+# Initialize DynamoDB client
+dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+
+
+def reclassify_segment(table, classifier, segment, dry_run):
+    """Re-classifies one parallel scan segment; returns (checked, changed, failed)"""
+
+    # Table resources are not thread safe, so each worker uses the low-level client
+    client = table.meta.client
+    scan_kwargs = {
+        'TableName': table.name,
+        'Segment': segment,
+        'TotalSegments': SCAN_SEGMENTS,
+        'ProjectionExpression': 'concern_id, issue_description, priority, category, #status, queue_shard',
+        'ExpressionAttributeNames': {'#status': 'status'},
+        'FilterExpression': (Attr('rules_version').not_exists() | Attr('rules_version').ne(classifier.version) |
+                             Attr(QUEUE_KEY).not_exists())
+    }
+
+    checked = changed = failed = 0
+    while True:
+        response = client.scan(**scan_kwargs)
+
+        for item in response.get('Items', []):
+            checked += 1
+            classification = classifier.classify(item.get('issue_description', ''))
+            if (classification['priority'], classification['category']) != (item.get('priority'), item.get('category')):
+                changed += 1
+                print(f"🔁 {item['concern_id']}: {item.get('priority')}/{item.get('category')} -> "
+                      f"{classification['priority']}/{classification['category']}")
+            shard_key = queue_key(item.get('status', 'open'), classification['priority'], concern_shard(item['concern_id']))
+            if dry_run:
+                continue
+
+            try:
+                client.update_item(
+                    TableName=table.name,
+                    Key={'concern_id': item['concern_id']},
+                    UpdateExpression='SET priority = :priority, category = :category, rules_version = :version, '
+                                     f'{QUEUE_KEY} = :key',
+                    # Skip concerns an operator moved in the meantime; the next run picks them up
+                    ConditionExpression='attribute_exists(concern_id) AND #status = :status',
+                    ExpressionAttributeNames={'#status': 'status'},
+                    ExpressionAttributeValues={
+                        ':priority': classification['priority'],
+                        ':category': classification['category'],
+                        ':version': classifier.version,
+                        ':key': shard_key,
+                        ':status': item.get('status', 'open')
+                    }
+                )
+            except Exception as e:
+                failed += 1
+                print(f"❌ Error re-classifying {item['concern_id']}: {str(e)}")
+
+        if 'LastEvaluatedKey' not in response:
+            return checked, changed, failed
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def reclassify_concerns(table_name='dalscooter-dev-customer-concerns', dry_run=False):
+    """Re-classify every concern not yet classified with the current rules"""
+
+    table = dynamodb.Table(table_name)
+    classifier = get_classifier()
+
+    with ThreadPoolExecutor(max_workers=SCAN_SEGMENTS) as executor:
+        results = list(executor.map(
+            lambda segment: reclassify_segment(table, classifier, segment, dry_run),
+            range(SCAN_SEGMENTS)
+        ))
+
+    checked, changed, failed = (sum(column) for column in zip(*results))
+    action = 'would change' if dry_run else 'changed'
+    print(f"✅ Checked {checked} concerns with rules v{classifier.version}: {action} {changed} ({failed} failed)")
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if arg != '--dry-run']
+    table_name = args[0] if args else 'dalscooter-dev-customer-concerns'
+    print(f"🏷️ Re-classifying concerns in {table_name}...")
+    reclassify_concerns(table_name, dry_run='--dry-run' in sys.argv[1:])
+
+
+if __name__ == "__main__":
+    main()
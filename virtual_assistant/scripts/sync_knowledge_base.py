@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Bulk loader for the virtual assistant tables. Safe to re-run.
+
+  faq       Syncs the bot knowledge table with FAQ entries read from JSON or
+            YAML files (a list of entries, or {"items": [...]}). Each entry is
+            content-hashed; only new or changed entries are written, entries
+            no longer in the files are deleted, and the knowledge version
+            stamp is bumped so warm chatbot containers rebuild their index.
+  bookings  Writes a deterministic set of synthetic booking references for
+            load testing (the same --seed gives the same items), or removes
+            them again with --purge.
+
+Writes go through 25-item BatchWriteItem calls spread over parallel workers,
+with unprocessed items retried under exponential backoff.
+
+Usage:
+    sync_knowledge_base.py faq virtual_assistant/knowledge_base/faq.json
+    sync_knowledge_base.py faq extra.yaml --environment prod --dry-run
+    sync_knowledge_base.py bookings --count 50000
+    sync_knowledge_base.py bookings --purge
+
+YAML files need PyYAML (pip install pyyaml).
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from decimal import Decimal
+from itertools import islice
+from pathlib import Path
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+
+# Reserved knowledge item holding the version stamp (see knowledge_index.py)
+KB_VERSION_ID = '__kb_version__'
+HASH_ATTRIBUTE = 'content_hash'
+REQUIRED_FIELDS = ('question_id', 'question', 'answer')
+
+BATCH_WRITE_SIZE = 25
+BATCH_WRITE_ATTEMPTS = 8
+SCAN_SEGMENTS = 4
+# Batches handed to the workers at a time, so large loads stream
+BATCHES_IN_FLIGHT = 200
+
+BIKE_TYPES = [('eBike', 'EB'), ('Gyroscooter', 'GS'), ('Segway', 'SW')]
+REFERENCE_ALPHABET = '0123456789ABCDEF'
+
+
+def table_name(args, suffix):
+    return args.table or f"{args.project}-{args.environment}-{suffix}"
+
+
+def load_entries(paths):
+    """Reads FAQ entries from JSON/YAML files, checking ids are present and unique"""
+    entries = {}
+    for path in paths:
+        path = Path(path)
+        with path.open(encoding='utf-8') as entries_file:
+            if path.suffix.lower() in ('.yaml', '.yml'):
+                try:
+                    import yaml
+                except ImportError:
+                    sys.exit(f"❌ {path} is YAML; install PyYAML (pip install pyyaml)")
+                # Round trip through JSON so dates become strings
+                data = json.loads(json.dumps(yaml.safe_load(entries_file), default=str), parse_float=Decimal)
+            else:
+                # DynamoDB takes Decimals, not floats
+                data = json.load(entries_file, parse_float=Decimal)
+
+        if isinstance(data, dict):
+            data = data.get('items', [])
+        for position, entry in enumerate(data or []):
+            missing = [field for field in REQUIRED_FIELDS if not entry.get(field)]
+            if missing:
+                sys.exit(f"❌ {path} entry {position}: missing {', '.join(missing)}")
+            question_id = str(entry['question_id'])
+            if question_id == KB_VERSION_ID:
+                sys.exit(f"❌ {path} entry {position}: {KB_VERSION_ID} is reserved")
+            if question_id in entries:
+                sys.exit(f"❌ {path} entry {position}: duplicate question_id {question_id}")
+            entries[question_id] = {key: value for key, value in entry.items() if key != HASH_ATTRIBUTE}
+    return entries
+
+
+def content_hash(entry):
+    """Stable hash of an entry's content, independent of key order"""
+    canonical = json.dumps(entry, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def scan_hashes(table):
+    """Returns {question_id: content_hash} for the table, scanning segments in parallel"""
+    client = table.meta.client
+
+    def scan_segment(segment):
+        scan_kwargs = {
+            'TableName': table.name,
+            'Segment': segment,
+            'TotalSegments': SCAN_SEGMENTS,
+            'ProjectionExpression': 'question_id, content_hash'
+        }
+        hashes = {}
+        while True:
+            response = client.scan(**scan_kwargs)
+            for item in response.get('Items', []):
+                hashes[item['question_id']] = item.get(HASH_ATTRIBUTE)
+            if 'LastEvaluatedKey' not in response:
+                return hashes
+            scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    hashes = {}
+    with ThreadPoolExecutor(max_workers=SCAN_SEGMENTS) as executor:
+        for segment_hashes in executor.map(scan_segment, range(SCAN_SEGMENTS)):
+            hashes.update(segment_hashes)
+    hashes.pop(KB_VERSION_ID, None)
+    return hashes
+
+
+def batch_write(table, requests, workers):
+    """
+    Sends write requests (any iterable) in 25-item batches over parallel
+    workers, retrying unprocessed items with exponential backoff. Returns
+    (requests sent, requests that could not be written).
+    """
+    client = table.meta.client
+    requests = iter(requests)
+
+    def write_chunk(chunk):
+        try:
+            for attempt in range(BATCH_WRITE_ATTEMPTS):
+                response = client.batch_write_item(RequestItems={table.name: chunk})
+                chunk = response.get('UnprocessedItems', {}).get(table.name, [])
+                if not chunk:
+                    return 0
+                time.sleep(min(0.05 * (2 ** attempt), 2))
+        except Exception as e:
+            print(f"❌ Batch write failed: {str(e)}")
+        return len(chunk)
+
+    sent = failed = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            chunks = []
+            for _ in range(BATCHES_IN_FLIGHT):
+                chunk = list(islice(requests, BATCH_WRITE_SIZE))
+                if not chunk:
+                    break
+                chunks.append(chunk)
+            if not chunks:
+                return sent, failed
+            sent += sum(len(chunk) for chunk in chunks)
+            failed += sum(executor.map(write_chunk, chunks))
+
+
+def sync_faq(args):
+    """Bring the knowledge table in line with the FAQ files"""
+    table = boto3.resource('dynamodb', region_name=args.region).Table(table_name(args, 'bot-knowledge'))
+    entries = load_entries(args.files)
+    existing = scan_hashes(table)
+
+    puts = []
+    for question_id, entry in entries.items():
+        entry_hash = content_hash(entry)
+        if existing.get(question_id) != entry_hash:
+            puts.append({'PutRequest': {'Item': dict(entry, **{HASH_ATTRIBUTE: entry_hash})}})
+    deletes = [] if args.keep_removed else [
+        {'DeleteRequest': {'Key': {'question_id': question_id}}}
+        for question_id in existing if question_id not in entries
+    ]
+
+    unchanged = len(entries) - len(puts)
+    print(f"📚 {table.name}: {len(puts)} to write, {len(deletes)} to delete, {unchanged} unchanged")
+    if args.dry_run or not (puts or deletes):
+        return
+
+    started = time.monotonic()
+    _, failed = batch_write(table, puts + deletes, args.workers)
+
+    # Warm containers rebuild their index once the writes are in
+    table.update_item(
+        Key={'question_id': KB_VERSION_ID},
+        UpdateExpression='ADD version :one',
+        ExpressionAttributeValues={':one': 1}
+    )
+    print(f"✅ Synced in {time.monotonic() - started:.2f}s ({failed} failed), knowledge version bumped")
+    if failed:
+        sys.exit(1)
+
+
+def synthetic_bookings(count, seed):
+    """Yields count deterministic booking reference items"""
+    rng = random.Random(seed)
+    base = datetime(2025, 1, 1)
+    # A batch may not hold the same key twice, so references never repeat
+    seen = set()
+    for number in range(count):
+        booking_reference = None
+        while booking_reference is None or booking_reference in seen:
+            booking_reference = 'BOOK-' + ''.join(rng.choice(REFERENCE_ALPHABET) for _ in range(8))
+        seen.add(booking_reference)
+        bike_type, bike_prefix = rng.choice(BIKE_TYPES)
+        start = base + timedelta(minutes=15 * rng.randrange(0, 4 * 24 * 365))
+        hours = rng.randint(1, 6)
+        yield {
+            'booking_reference': booking_reference,
+            'reference_key': booking_reference,
+            'bike_type': bike_type,
+            'bike_number': f"{bike_prefix}{rng.randint(1, 999):03d}",
+            'access_code': f"{rng.randint(0, 9999):04d}",
+            'start_time': start.strftime('%Y-%m-%d %H:%M'),
+            'end_time': (start + timedelta(hours=hours)).strftime('%Y-%m-%d %H:%M'),
+            'rental_duration': f"{hours} hours" if hours > 1 else '1 hour',
+            'status': rng.choice(('active', 'active', 'completed', 'cancelled')),
+            'customer_id': f"loadtest-{number % 5000:04d}",
+            'created_at': start.isoformat(),
+            'synthetic': True
+        }
+
+
+def load_bookings(args):
+    """Write (or with --purge remove) synthetic booking references"""
+    table = boto3.resource('dynamodb', region_name=args.region).Table(table_name(args, 'booking-references'))
+    started = time.monotonic()
+
+    if args.purge:
+        client = table.meta.client
+        scan_kwargs = {
+            'TableName': table.name,
+            'ProjectionExpression': 'booking_reference',
+            'FilterExpression': Attr('synthetic').eq(True)
+        }
+        keys = []
+        while True:
+            response = client.scan(**scan_kwargs)
+            keys.extend(item['booking_reference'] for item in response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                break
+            scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        requests = [{'DeleteRequest': {'Key': {'booking_reference': key}}} for key in keys]
+        action = 'Removed'
+    else:
+        # Generated lazily so large sets stream
+        requests = ({'PutRequest': {'Item': item}} for item in synthetic_bookings(args.count, args.seed))
+        action = 'Wrote'
+
+    if args.dry_run:
+        print(f"🎫 {table.name}: would {'remove' if args.purge else 'write'} "
+              f"{len(requests) if args.purge else args.count} synthetic booking references")
+        return
+
+    sent, failed = batch_write(table, requests, args.workers)
+    print(f"✅ {action} {sent - failed} synthetic booking references in "
+          f"{time.monotonic() - started:.2f}s ({failed} failed)")
+    if failed:
+        sys.exit(1)
+
+
+def main():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--region', default=os.environ.get('AWS_REGION', 'us-east-1'))
+    common.add_argument('--project', default='dalscooter')
+    common.add_argument('--environment', default='dev')
+    common.add_argument('--table', help='table name, overriding <project>-<environment>-<table>')
+    common.add_argument('--workers', type=int, default=8)
+    common.add_argument('--dry-run', action='store_true')
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    faq = commands.add_parser('faq', parents=[common], help='sync FAQ entries from JSON/YAML files')
+    faq.add_argument('files', nargs='+')
+    faq.add_argument('--keep-removed', action='store_true', help='do not delete entries missing from the files')
+    faq.set_defaults(run=sync_faq)
+
+    bookings = commands.add_parser('bookings', parents=[common], help='write synthetic booking references')
+    bookings.add_argument('--count', type=int, default=10000)
+    bookings.add_argument('--seed', type=int, default=42)
+    bookings.add_argument('--purge', action='store_true', help='remove synthetic references instead')
+    bookings.set_defaults(run=load_bookings)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -18,4 +18,55 @@ variable "feedback_sns_topic_arn" {
 variable "feedback_lambda_arn" {
   description = "ARN of the feedback lambda function"
   type        = string
-}
\ No newline at end of file
+}
+
+variable "shared_layer_arn" {
+  description = "ARN of the shared runtime Lambda layer"
+  type        = string
+}
+
+variable "log_levels" {
+  description = "Handler log level per environment; unlisted environments log at INFO"
+  type        = map(string)
+  default = {
+    dev     = "DEBUG"
+    staging = "INFO"
+    prod    = "WARNING"
+  }
+}
+
+variable "log_debug_sample_rate" {
+  description = "Share of invocations that log DEBUG detail regardless of level"
+  type        = number
+  default     = 0.01
+}
+
+variable "response_cache_max_items" {
+  description = "Distinct FAQ utterances the router keeps cached per container"
+  type        = number
+  default     = 512
+}
+
+variable "response_cache_ttl_seconds" {
+  description = "How long the router serves a cached FAQ response; 0 disables the cache"
+  type        = number
+  default     = 300
+}
+
+variable "booking_context_ttl_seconds" {
+  description = "How long a conversation reuses booking details kept in its Lex session; 0 disables it"
+  type        = number
+  default     = 300
+}
+
+variable "chat_fast_path_enabled" {
+  description = "Let the chat API proxy answer clear FAQ and booking reference messages without calling Lex"
+  type        = bool
+  default     = true
+}
+
+variable "concern_queue_shards" {
+  description = "Partitions per status and priority in the operator concern queue index"
+  type        = number
+  default     = 4
+}